@@ -34,11 +34,15 @@ CREATE TABLE `graduado_otra_universidad` (
 CREATE TABLE `profesor` (
     `dni`                      INTEGER,
     `nacionalidad_universidad` TEXT,
+    `cargo`                    INTEGER,
     PRIMARY KEY(dni),
     FOREIGN KEY(dni) REFERENCES empadronado(dni) ON DELETE CASCADE
 );
+-- [inicio, fin): fechas ('AAAA-MM-DD') en que duran los cargos elegidos en el período
 CREATE TABLE `calendario_electoral` (
     `periodo` INTEGER,
+    `inicio`  TEXT,
+    `fin`     TEXT,
     PRIMARY KEY(periodo)
 );
 CREATE TABLE `agrupacion_politica` (
@@ -127,5 +131,348 @@ CREATE TABLE `rector_fue_votado_por_consejero_superior` (
     FOREIGN KEY(dni_rector, periodo_rector) REFERENCES rector(dni, periodo),
     FOREIGN KEY(dni_consejero_superior, periodo_consejero_superior) REFERENCES consejero_superior(dni, periodo)
 );
+CREATE INDEX `idx_facultad_nombre` ON `facultad` (nombre);
+CREATE INDEX `idx_empadronado_id_facultad` ON `empadronado` (id_facultad);
+CREATE INDEX `idx_empadronado_claustro` ON `empadronado` (claustro, dni);
+CREATE INDEX `idx_agrupacion_politica_se_presenta_durante_calendario_electoral_periodo`
+    ON `agrupacion_politica_se_presenta_durante_calendario_electoral` (periodo, id_agrupacion_politica, votos_recibidos);
+CREATE INDEX `idx_consejero_directivo_id_agrupacion_politica` ON `consejero_directivo` (id_agrupacion_politica);
+CREATE INDEX `idx_consejero_directivo_periodo` ON `consejero_directivo` (periodo, claustro, id_agrupacion_politica);
+CREATE INDEX `idx_voto_a_decano_consejero_directivo`
+    ON `voto_a_decano` (dni_consejero_directivo, periodo_consejero_directivo, dni_decano, periodo_decano);
+CREATE INDEX `idx_voto_a_consejero_superior_consejero_directivo`
+    ON `voto_a_consejero_superior` (dni_consejero_directivo, periodo_consejero_directivo, dni_consejero_superior, periodo_consejero_superior);
+CREATE INDEX `idx_rector_fue_votado_por_consejero_directivo_consejero_directivo`
+    ON `rector_fue_votado_por_consejero_directivo` (dni_consejero_directivo, periodo_consejero_directivo, dni_rector, periodo_rector);
+CREATE INDEX `idx_rector_fue_votado_por_decano_decano`
+    ON `rector_fue_votado_por_decano` (dni_decano, periodo_decano, dni_rector, periodo_rector);
+CREATE INDEX `idx_rector_fue_votado_por_consejero_superior_consejero_superior`
+    ON `rector_fue_votado_por_consejero_superior` (dni_consejero_superior, periodo_consejero_superior, dni_rector, periodo_rector);
+CREATE INDEX `idx_decano_periodo` ON `decano` (periodo, dni);
+CREATE INDEX `idx_consejero_superior_periodo` ON `consejero_superior` (periodo, dni);
+CREATE INDEX `idx_rector_periodo` ON `rector` (periodo, dni);
+CREATE INDEX `idx_rector_fue_votado_por_consejero_directivo_periodo_rector`
+    ON `rector_fue_votado_por_consejero_directivo` (periodo_rector, dni_rector);
+CREATE INDEX `idx_rector_fue_votado_por_consejero_superior_periodo_rector`
+    ON `rector_fue_votado_por_consejero_superior` (periodo_rector, dni_rector);
+CREATE INDEX `idx_rector_fue_votado_por_decano_periodo_rector`
+    ON `rector_fue_votado_por_decano` (periodo_rector, dni_rector);
+-- Resúmenes de las elecciones, mantenidos por triggers al insertar o borrar filas:
+-- recuento_votos: votos recibidos por cada candidato (eleccion: 0 decano, 1 consejo superior, 2 rector)
+-- resumen_periodo: agrupaciones que se presentaron y votos emitidos en cada período
+-- resumen_consejo_directivo: consejeros directivos de cada agrupación por período y claustro
+CREATE TABLE `recuento_votos` (
+    `eleccion` INTEGER,
+    `periodo`  INTEGER,
+    `dni`      INTEGER,
+    `votos`    INTEGER,
+    PRIMARY KEY(eleccion, periodo, dni)
+);
+CREATE TABLE `resumen_periodo` (
+    `periodo`         INTEGER,
+    `agrupaciones`    INTEGER,
+    `votos_recibidos` INTEGER,
+    PRIMARY KEY(periodo)
+);
+CREATE TABLE `resumen_consejo_directivo` (
+    `periodo`                INTEGER,
+    `claustro`               INTEGER,
+    `id_agrupacion_politica` INTEGER,
+    `consejeros`             INTEGER,
+    PRIMARY KEY(periodo, claustro, id_agrupacion_politica)
+);
+
+CREATE TRIGGER `recuento_votos_insertar_decano` AFTER INSERT ON `decano` BEGIN
+    INSERT OR IGNORE INTO recuento_votos (eleccion, periodo, dni, votos) VALUES (0, NEW.periodo, NEW.dni, 0);
+END;
+CREATE TRIGGER `recuento_votos_borrar_decano` AFTER DELETE ON `decano` BEGIN
+    DELETE FROM recuento_votos WHERE eleccion = 0 AND periodo = OLD.periodo AND dni = OLD.dni;
+END;
+CREATE TRIGGER `recuento_votos_insertar_consejero_superior` AFTER INSERT ON `consejero_superior` BEGIN
+    INSERT OR IGNORE INTO recuento_votos (eleccion, periodo, dni, votos) VALUES (1, NEW.periodo, NEW.dni, 0);
+END;
+CREATE TRIGGER `recuento_votos_borrar_consejero_superior` AFTER DELETE ON `consejero_superior` BEGIN
+    DELETE FROM recuento_votos WHERE eleccion = 1 AND periodo = OLD.periodo AND dni = OLD.dni;
+END;
+CREATE TRIGGER `recuento_votos_insertar_rector` AFTER INSERT ON `rector` BEGIN
+    INSERT OR IGNORE INTO recuento_votos (eleccion, periodo, dni, votos) VALUES (2, NEW.periodo, NEW.dni, 0);
+END;
+CREATE TRIGGER `recuento_votos_borrar_rector` AFTER DELETE ON `rector` BEGIN
+    DELETE FROM recuento_votos WHERE eleccion = 2 AND periodo = OLD.periodo AND dni = OLD.dni;
+END;
+
+CREATE TRIGGER `recuento_votos_insertar_voto_a_decano` AFTER INSERT ON `voto_a_decano` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 0 AND periodo = NEW.periodo_decano AND dni = NEW.dni_decano;
+END;
+CREATE TRIGGER `recuento_votos_borrar_voto_a_decano` AFTER DELETE ON `voto_a_decano` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 0 AND periodo = OLD.periodo_decano AND dni = OLD.dni_decano;
+END;
+CREATE TRIGGER `recuento_votos_insertar_voto_a_consejero_superior` AFTER INSERT ON `voto_a_consejero_superior` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 1 AND periodo = NEW.periodo_consejero_superior AND dni = NEW.dni_consejero_superior;
+END;
+CREATE TRIGGER `recuento_votos_borrar_voto_a_consejero_superior` AFTER DELETE ON `voto_a_consejero_superior` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 1 AND periodo = OLD.periodo_consejero_superior AND dni = OLD.dni_consejero_superior;
+END;
+CREATE TRIGGER `recuento_votos_insertar_voto_de_consejero_directivo_a_rector` AFTER INSERT ON `rector_fue_votado_por_consejero_directivo` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 2 AND periodo = NEW.periodo_rector AND dni = NEW.dni_rector;
+END;
+CREATE TRIGGER `recuento_votos_borrar_voto_de_consejero_directivo_a_rector` AFTER DELETE ON `rector_fue_votado_por_consejero_directivo` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 2 AND periodo = OLD.periodo_rector AND dni = OLD.dni_rector;
+END;
+CREATE TRIGGER `recuento_votos_insertar_voto_de_consejero_superior_a_rector` AFTER INSERT ON `rector_fue_votado_por_consejero_superior` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 2 AND periodo = NEW.periodo_rector AND dni = NEW.dni_rector;
+END;
+CREATE TRIGGER `recuento_votos_borrar_voto_de_consejero_superior_a_rector` AFTER DELETE ON `rector_fue_votado_por_consejero_superior` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 2 AND periodo = OLD.periodo_rector AND dni = OLD.dni_rector;
+END;
+CREATE TRIGGER `recuento_votos_insertar_voto_de_decano_a_rector` AFTER INSERT ON `rector_fue_votado_por_decano` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 2 AND periodo = NEW.periodo_rector AND dni = NEW.dni_rector;
+END;
+CREATE TRIGGER `recuento_votos_borrar_voto_de_decano_a_rector` AFTER DELETE ON `rector_fue_votado_por_decano` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 2 AND periodo = OLD.periodo_rector AND dni = OLD.dni_rector;
+END;
+
+CREATE TRIGGER `resumen_periodo_insertar` AFTER INSERT ON `agrupacion_politica_se_presenta_durante_calendario_electoral` BEGIN
+    INSERT INTO resumen_periodo (periodo, agrupaciones, votos_recibidos) VALUES (NEW.periodo, 1, IFNULL(NEW.votos_recibidos, 0))
+    ON CONFLICT(periodo) DO UPDATE SET agrupaciones = agrupaciones + 1,
+                                       votos_recibidos = votos_recibidos + excluded.votos_recibidos;
+END;
+CREATE TRIGGER `resumen_periodo_borrar` AFTER DELETE ON `agrupacion_politica_se_presenta_durante_calendario_electoral` BEGIN
+    UPDATE resumen_periodo SET agrupaciones = agrupaciones - 1, votos_recibidos = votos_recibidos - IFNULL(OLD.votos_recibidos, 0)
+    WHERE periodo = OLD.periodo;
+    DELETE FROM resumen_periodo WHERE periodo = OLD.periodo AND agrupaciones = 0;
+END;
+
+CREATE TRIGGER `resumen_consejo_directivo_insertar` AFTER INSERT ON `consejero_directivo` BEGIN
+    INSERT INTO resumen_consejo_directivo (periodo, claustro, id_agrupacion_politica, consejeros)
+    VALUES (NEW.periodo, NEW.claustro, NEW.id_agrupacion_politica, 1)
+    ON CONFLICT(periodo, claustro, id_agrupacion_politica) DO UPDATE SET consejeros = consejeros + 1;
+END;
+CREATE TRIGGER `resumen_consejo_directivo_borrar` AFTER DELETE ON `consejero_directivo` BEGIN
+    UPDATE resumen_consejo_directivo SET consejeros = consejeros - 1
+    WHERE periodo = OLD.periodo AND claustro = OLD.claustro AND id_agrupacion_politica = OLD.id_agrupacion_politica;
+    DELETE FROM resumen_consejo_directivo
+    WHERE periodo = OLD.periodo AND claustro = OLD.claustro AND id_agrupacion_politica = OLD.id_agrupacion_politica
+      AND consejeros = 0;
+END;
+-- Afiliaciones a las agrupaciones (cada persona a lo sumo a una) y votos obtenidos por cada candidato a
+-- consejero directivo en cada período
+CREATE TABLE `afiliado` (
+    `dni`                    INTEGER,
+    `id_agrupacion_politica` INTEGER,
+    PRIMARY KEY(dni),
+    FOREIGN KEY(dni) REFERENCES empadronado(dni),
+    FOREIGN KEY(id_agrupacion_politica) REFERENCES agrupacion_politica(id)
+);
+CREATE TABLE `candidato_a_consejero` (
+    `dni`     INTEGER,
+    `periodo` INTEGER,
+    `votos`   INTEGER,
+    PRIMARY KEY(dni, periodo),
+    FOREIGN KEY(dni) REFERENCES empadronado(dni),
+    FOREIGN KEY(periodo) REFERENCES calendario_electoral(periodo)
+);
+CREATE INDEX `idx_afiliado_id_agrupacion_politica` ON `afiliado` (id_agrupacion_politica, dni);
+CREATE INDEX `idx_candidato_a_consejero_periodo` ON `candidato_a_consejero` (periodo, votos);
+-- Índice de texto completo sobre los nombres del padrón, mantenido por triggers (ver
+-- tp_api.model_test.buscar_empadronados). No distingue acentos y tiene índices de prefijos de 2 y 3 letras.
+CREATE VIRTUAL TABLE `empadronado_nombre` USING fts5(
+    nombre,
+    content = 'empadronado',
+    content_rowid = 'dni',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+-- Los nombres nuevos o modificados se indexan de a 1000 en una sola sentencia (FTS5 guarda lo pendiente al
+-- terminar cada sentencia, y eso cuesta casi lo mismo para un nombre que para mil). Hasta entonces esperan
+-- en empadronado_nombre_pendiente; model_test.buscar_empadronados indexa los que queden antes de buscar.
+CREATE TABLE `empadronado_nombre_pendiente` (
+    `secuencia` INTEGER PRIMARY KEY,
+    `dni`       INTEGER
+);
+CREATE TRIGGER `empadronado_nombre_insertar` AFTER INSERT ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre_pendiente (dni) VALUES (NEW.dni);
+END;
+-- Un nombre que todavía no se indexó no está en el índice: alcanza con sacarlo de los pendientes
+CREATE TRIGGER `empadronado_nombre_borrar` AFTER DELETE ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre (empadronado_nombre, rowid, nombre)
+    SELECT 'delete', OLD.dni, OLD.nombre
+    WHERE NOT EXISTS (SELECT 1 FROM empadronado_nombre_pendiente WHERE dni = OLD.dni);
+    DELETE FROM empadronado_nombre_pendiente WHERE dni = OLD.dni;
+END;
+CREATE TRIGGER `empadronado_nombre_modificar` AFTER UPDATE OF dni, nombre ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre (empadronado_nombre, rowid, nombre)
+    SELECT 'delete', OLD.dni, OLD.nombre
+    WHERE NOT EXISTS (SELECT 1 FROM empadronado_nombre_pendiente WHERE dni = OLD.dni);
+    DELETE FROM empadronado_nombre_pendiente WHERE dni = OLD.dni;
+    INSERT INTO empadronado_nombre_pendiente (dni) VALUES (NEW.dni);
+END;
+-- La secuencia vuelve a empezar cada vez que se vacía la tabla, así que cuenta los pendientes
+CREATE TRIGGER `empadronado_nombre_indexar` AFTER INSERT ON `empadronado_nombre_pendiente`
+WHEN NEW.secuencia >= 1000 BEGIN
+    INSERT INTO empadronado_nombre (rowid, nombre)
+    SELECT e.dni, e.nombre FROM empadronado_nombre_pendiente p JOIN empadronado e ON e.dni = p.dni;
+    DELETE FROM empadronado_nombre_pendiente;
+END;
+-- Intervalos del calendario electoral: por defecto cada período dura su año. Los períodos de los cargos
+-- se agregan solos al calendario.
+CREATE INDEX `idx_calendario_electoral_intervalo` ON `calendario_electoral` (inicio, fin, periodo);
+CREATE TRIGGER `calendario_electoral_intervalo` AFTER INSERT ON `calendario_electoral`
+WHEN NEW.inicio IS NULL BEGIN
+    UPDATE calendario_electoral SET inicio = printf('%04d-01-01', periodo), fin = printf('%04d-01-01', periodo + 1)
+    WHERE periodo = NEW.periodo;
+END;
+CREATE TRIGGER `calendario_electoral_consejero_directivo` AFTER INSERT ON `consejero_directivo` BEGIN
+    INSERT OR IGNORE INTO calendario_electoral (periodo) VALUES (NEW.periodo);
+END;
+CREATE TRIGGER `calendario_electoral_decano` AFTER INSERT ON `decano` BEGIN
+    INSERT OR IGNORE INTO calendario_electoral (periodo) VALUES (NEW.periodo);
+END;
+CREATE TRIGGER `calendario_electoral_consejero_superior` AFTER INSERT ON `consejero_superior` BEGIN
+    INSERT OR IGNORE INTO calendario_electoral (periodo) VALUES (NEW.periodo);
+END;
+CREATE TRIGGER `calendario_electoral_rector` AFTER INSERT ON `rector` BEGIN
+    INSERT OR IGNORE INTO calendario_electoral (periodo) VALUES (NEW.periodo);
+END;
+-- Filas insertadas o modificadas de las tablas de datos, para las exportaciones incrementales de
+-- src/exportar.py: cada cambio agrega una entrada al final, y exportar.py borra las que ya exportaron todas
+-- las tablas salvo la última (así la secuencia nunca vuelve a empezar).
+CREATE TABLE `exportacion_modificadas` (
+    `secuencia` INTEGER PRIMARY KEY,
+    `tabla`     TEXT,
+    `fila`      INTEGER
+);
+CREATE TRIGGER `exportacion_facultad_insertar` AFTER INSERT ON `facultad` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('facultad', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_facultad_modificar` AFTER UPDATE ON `facultad` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('facultad', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_empadronado_insertar` AFTER INSERT ON `empadronado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('empadronado', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_empadronado_modificar` AFTER UPDATE ON `empadronado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('empadronado', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_estudiante_insertar` AFTER INSERT ON `estudiante` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('estudiante', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_estudiante_modificar` AFTER UPDATE ON `estudiante` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('estudiante', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_graduado_insertar` AFTER INSERT ON `graduado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('graduado', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_graduado_modificar` AFTER UPDATE ON `graduado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('graduado', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_graduado_otra_universidad_insertar` AFTER INSERT ON `graduado_otra_universidad` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('graduado_otra_universidad', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_graduado_otra_universidad_modificar` AFTER UPDATE ON `graduado_otra_universidad` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('graduado_otra_universidad', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_profesor_insertar` AFTER INSERT ON `profesor` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('profesor', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_profesor_modificar` AFTER UPDATE ON `profesor` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('profesor', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_calendario_electoral_insertar` AFTER INSERT ON `calendario_electoral` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('calendario_electoral', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_calendario_electoral_modificar` AFTER UPDATE ON `calendario_electoral` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('calendario_electoral', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_agrupacion_politica_insertar` AFTER INSERT ON `agrupacion_politica` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('agrupacion_politica', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_agrupacion_politica_modificar` AFTER UPDATE ON `agrupacion_politica` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('agrupacion_politica', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_agrupacion_politica_se_presenta_durante_calendario_electoral_insertar` AFTER INSERT ON `agrupacion_politica_se_presenta_durante_calendario_electoral` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('agrupacion_politica_se_presenta_durante_calendario_electoral', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_agrupacion_politica_se_presenta_durante_calendario_electoral_modificar` AFTER UPDATE ON `agrupacion_politica_se_presenta_durante_calendario_electoral` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('agrupacion_politica_se_presenta_durante_calendario_electoral', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_consejero_directivo_insertar` AFTER INSERT ON `consejero_directivo` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('consejero_directivo', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_consejero_directivo_modificar` AFTER UPDATE ON `consejero_directivo` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('consejero_directivo', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_decano_insertar` AFTER INSERT ON `decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('decano', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_decano_modificar` AFTER UPDATE ON `decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('decano', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_voto_a_decano_insertar` AFTER INSERT ON `voto_a_decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('voto_a_decano', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_voto_a_decano_modificar` AFTER UPDATE ON `voto_a_decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('voto_a_decano', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_consejero_superior_insertar` AFTER INSERT ON `consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_consejero_superior_modificar` AFTER UPDATE ON `consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_voto_a_consejero_superior_insertar` AFTER INSERT ON `voto_a_consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('voto_a_consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_voto_a_consejero_superior_modificar` AFTER UPDATE ON `voto_a_consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('voto_a_consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_rector_insertar` AFTER INSERT ON `rector` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_rector_modificar` AFTER UPDATE ON `rector` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_rector_fue_votado_por_consejero_directivo_insertar` AFTER INSERT ON `rector_fue_votado_por_consejero_directivo` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_consejero_directivo', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_rector_fue_votado_por_consejero_directivo_modificar` AFTER UPDATE ON `rector_fue_votado_por_consejero_directivo` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_consejero_directivo', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_rector_fue_votado_por_decano_insertar` AFTER INSERT ON `rector_fue_votado_por_decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_decano', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_rector_fue_votado_por_decano_modificar` AFTER UPDATE ON `rector_fue_votado_por_decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_decano', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_rector_fue_votado_por_consejero_superior_insertar` AFTER INSERT ON `rector_fue_votado_por_consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_rector_fue_votado_por_consejero_superior_modificar` AFTER UPDATE ON `rector_fue_votado_por_consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_afiliado_insertar` AFTER INSERT ON `afiliado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('afiliado', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_afiliado_modificar` AFTER UPDATE ON `afiliado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('afiliado', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_candidato_a_consejero_insertar` AFTER INSERT ON `candidato_a_consejero` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('candidato_a_consejero', NEW.rowid);
+END;
+CREATE TRIGGER `exportacion_candidato_a_consejero_modificar` AFTER UPDATE ON `candidato_a_consejero` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('candidato_a_consejero', NEW.rowid);
+END;
 COMMIT;
+-- Versión del esquema: debe coincidir con la última migración de db/migraciones
+PRAGMA user_version = 12;
 PRAGMA foreign_keys = 1;
@@ -0,0 +1,9 @@
+# coding: utf-8
+
+# La API registra el cargo de cada profesor, pero la columna no estaba en el esquema original.
+# Algunas bases ya la tienen (fueron creadas a mano), así que sólo se agrega si falta.
+
+def migrar(conn):
+    columnas = [fila[1] for fila in conn.execute('PRAGMA table_info(profesor)')]
+    if 'cargo' not in columnas:
+        conn.execute('ALTER TABLE `profesor` ADD COLUMN `cargo` INTEGER')
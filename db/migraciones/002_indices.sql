@@ -0,0 +1,17 @@
+-- Índices secundarios para las búsquedas por claves foráneas que no son prefijo de la clave primaria
+CREATE INDEX IF NOT EXISTS `idx_facultad_nombre` ON `facultad` (nombre);
+CREATE INDEX IF NOT EXISTS `idx_empadronado_id_facultad` ON `empadronado` (id_facultad);
+CREATE INDEX IF NOT EXISTS `idx_agrupacion_politica_se_presenta_durante_calendario_electoral_periodo`
+    ON `agrupacion_politica_se_presenta_durante_calendario_electoral` (periodo, id_agrupacion_politica, votos_recibidos);
+CREATE INDEX IF NOT EXISTS `idx_consejero_directivo_id_agrupacion_politica` ON `consejero_directivo` (id_agrupacion_politica);
+CREATE INDEX IF NOT EXISTS `idx_consejero_directivo_periodo` ON `consejero_directivo` (periodo, claustro, id_agrupacion_politica);
+CREATE INDEX IF NOT EXISTS `idx_voto_a_decano_consejero_directivo`
+    ON `voto_a_decano` (dni_consejero_directivo, periodo_consejero_directivo, dni_decano, periodo_decano);
+CREATE INDEX IF NOT EXISTS `idx_voto_a_consejero_superior_consejero_directivo`
+    ON `voto_a_consejero_superior` (dni_consejero_directivo, periodo_consejero_directivo, dni_consejero_superior, periodo_consejero_superior);
+CREATE INDEX IF NOT EXISTS `idx_rector_fue_votado_por_consejero_directivo_consejero_directivo`
+    ON `rector_fue_votado_por_consejero_directivo` (dni_consejero_directivo, periodo_consejero_directivo, dni_rector, periodo_rector);
+CREATE INDEX IF NOT EXISTS `idx_rector_fue_votado_por_decano_decano`
+    ON `rector_fue_votado_por_decano` (dni_decano, periodo_decano, dni_rector, periodo_rector);
+CREATE INDEX IF NOT EXISTS `idx_rector_fue_votado_por_consejero_superior_consejero_superior`
+    ON `rector_fue_votado_por_consejero_superior` (dni_consejero_superior, periodo_consejero_superior, dni_rector, periodo_rector);
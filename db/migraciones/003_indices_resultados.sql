@@ -0,0 +1,10 @@
+-- Índices para contar los votos de cada elección por período
+CREATE INDEX IF NOT EXISTS `idx_decano_periodo` ON `decano` (periodo, dni);
+CREATE INDEX IF NOT EXISTS `idx_consejero_superior_periodo` ON `consejero_superior` (periodo, dni);
+CREATE INDEX IF NOT EXISTS `idx_rector_periodo` ON `rector` (periodo, dni);
+CREATE INDEX IF NOT EXISTS `idx_rector_fue_votado_por_consejero_directivo_periodo_rector`
+    ON `rector_fue_votado_por_consejero_directivo` (periodo_rector, dni_rector);
+CREATE INDEX IF NOT EXISTS `idx_rector_fue_votado_por_consejero_superior_periodo_rector`
+    ON `rector_fue_votado_por_consejero_superior` (periodo_rector, dni_rector);
+CREATE INDEX IF NOT EXISTS `idx_rector_fue_votado_por_decano_periodo_rector`
+    ON `rector_fue_votado_por_decano` (periodo_rector, dni_rector);
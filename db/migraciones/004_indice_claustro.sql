@@ -0,0 +1,2 @@
+-- Índice para listar el padrón de un claustro ordenado por DNI
+CREATE INDEX IF NOT EXISTS `idx_empadronado_claustro` ON `empadronado` (claustro, dni);
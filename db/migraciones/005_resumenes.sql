@@ -0,0 +1,137 @@
+-- Resúmenes de las elecciones, mantenidos por triggers al insertar o borrar filas:
+-- recuento_votos: votos recibidos por cada candidato (eleccion: 0 decano, 1 consejo superior, 2 rector)
+-- resumen_periodo: agrupaciones que se presentaron y votos emitidos en cada período
+-- resumen_consejo_directivo: consejeros directivos de cada agrupación por período y claustro
+CREATE TABLE IF NOT EXISTS `recuento_votos` (
+    `eleccion` INTEGER,
+    `periodo`  INTEGER,
+    `dni`      INTEGER,
+    `votos`    INTEGER,
+    PRIMARY KEY(eleccion, periodo, dni)
+);
+CREATE TABLE IF NOT EXISTS `resumen_periodo` (
+    `periodo`         INTEGER,
+    `agrupaciones`    INTEGER,
+    `votos_recibidos` INTEGER,
+    PRIMARY KEY(periodo)
+);
+CREATE TABLE IF NOT EXISTS `resumen_consejo_directivo` (
+    `periodo`                INTEGER,
+    `claustro`               INTEGER,
+    `id_agrupacion_politica` INTEGER,
+    `consejeros`             INTEGER,
+    PRIMARY KEY(periodo, claustro, id_agrupacion_politica)
+);
+
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_insertar_decano` AFTER INSERT ON `decano` BEGIN
+    INSERT OR IGNORE INTO recuento_votos (eleccion, periodo, dni, votos) VALUES (0, NEW.periodo, NEW.dni, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_borrar_decano` AFTER DELETE ON `decano` BEGIN
+    DELETE FROM recuento_votos WHERE eleccion = 0 AND periodo = OLD.periodo AND dni = OLD.dni;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_insertar_consejero_superior` AFTER INSERT ON `consejero_superior` BEGIN
+    INSERT OR IGNORE INTO recuento_votos (eleccion, periodo, dni, votos) VALUES (1, NEW.periodo, NEW.dni, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_borrar_consejero_superior` AFTER DELETE ON `consejero_superior` BEGIN
+    DELETE FROM recuento_votos WHERE eleccion = 1 AND periodo = OLD.periodo AND dni = OLD.dni;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_insertar_rector` AFTER INSERT ON `rector` BEGIN
+    INSERT OR IGNORE INTO recuento_votos (eleccion, periodo, dni, votos) VALUES (2, NEW.periodo, NEW.dni, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_borrar_rector` AFTER DELETE ON `rector` BEGIN
+    DELETE FROM recuento_votos WHERE eleccion = 2 AND periodo = OLD.periodo AND dni = OLD.dni;
+END;
+
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_insertar_voto_a_decano` AFTER INSERT ON `voto_a_decano` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 0 AND periodo = NEW.periodo_decano AND dni = NEW.dni_decano;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_borrar_voto_a_decano` AFTER DELETE ON `voto_a_decano` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 0 AND periodo = OLD.periodo_decano AND dni = OLD.dni_decano;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_insertar_voto_a_consejero_superior` AFTER INSERT ON `voto_a_consejero_superior` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 1 AND periodo = NEW.periodo_consejero_superior AND dni = NEW.dni_consejero_superior;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_borrar_voto_a_consejero_superior` AFTER DELETE ON `voto_a_consejero_superior` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 1 AND periodo = OLD.periodo_consejero_superior AND dni = OLD.dni_consejero_superior;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_insertar_voto_de_consejero_directivo_a_rector` AFTER INSERT ON `rector_fue_votado_por_consejero_directivo` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 2 AND periodo = NEW.periodo_rector AND dni = NEW.dni_rector;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_borrar_voto_de_consejero_directivo_a_rector` AFTER DELETE ON `rector_fue_votado_por_consejero_directivo` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 2 AND periodo = OLD.periodo_rector AND dni = OLD.dni_rector;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_insertar_voto_de_consejero_superior_a_rector` AFTER INSERT ON `rector_fue_votado_por_consejero_superior` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 2 AND periodo = NEW.periodo_rector AND dni = NEW.dni_rector;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_borrar_voto_de_consejero_superior_a_rector` AFTER DELETE ON `rector_fue_votado_por_consejero_superior` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 2 AND periodo = OLD.periodo_rector AND dni = OLD.dni_rector;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_insertar_voto_de_decano_a_rector` AFTER INSERT ON `rector_fue_votado_por_decano` BEGIN
+    UPDATE recuento_votos SET votos = votos + 1
+    WHERE eleccion = 2 AND periodo = NEW.periodo_rector AND dni = NEW.dni_rector;
+END;
+CREATE TRIGGER IF NOT EXISTS `recuento_votos_borrar_voto_de_decano_a_rector` AFTER DELETE ON `rector_fue_votado_por_decano` BEGIN
+    UPDATE recuento_votos SET votos = votos - 1
+    WHERE eleccion = 2 AND periodo = OLD.periodo_rector AND dni = OLD.dni_rector;
+END;
+
+CREATE TRIGGER IF NOT EXISTS `resumen_periodo_insertar` AFTER INSERT ON `agrupacion_politica_se_presenta_durante_calendario_electoral` BEGIN
+    INSERT INTO resumen_periodo (periodo, agrupaciones, votos_recibidos) VALUES (NEW.periodo, 1, IFNULL(NEW.votos_recibidos, 0))
+    ON CONFLICT(periodo) DO UPDATE SET agrupaciones = agrupaciones + 1,
+                                       votos_recibidos = votos_recibidos + excluded.votos_recibidos;
+END;
+CREATE TRIGGER IF NOT EXISTS `resumen_periodo_borrar` AFTER DELETE ON `agrupacion_politica_se_presenta_durante_calendario_electoral` BEGIN
+    UPDATE resumen_periodo SET agrupaciones = agrupaciones - 1, votos_recibidos = votos_recibidos - IFNULL(OLD.votos_recibidos, 0)
+    WHERE periodo = OLD.periodo;
+    DELETE FROM resumen_periodo WHERE periodo = OLD.periodo AND agrupaciones = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS `resumen_consejo_directivo_insertar` AFTER INSERT ON `consejero_directivo` BEGIN
+    INSERT INTO resumen_consejo_directivo (periodo, claustro, id_agrupacion_politica, consejeros)
+    VALUES (NEW.periodo, NEW.claustro, NEW.id_agrupacion_politica, 1)
+    ON CONFLICT(periodo, claustro, id_agrupacion_politica) DO UPDATE SET consejeros = consejeros + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS `resumen_consejo_directivo_borrar` AFTER DELETE ON `consejero_directivo` BEGIN
+    UPDATE resumen_consejo_directivo SET consejeros = consejeros - 1
+    WHERE periodo = OLD.periodo AND claustro = OLD.claustro AND id_agrupacion_politica = OLD.id_agrupacion_politica;
+    DELETE FROM resumen_consejo_directivo
+    WHERE periodo = OLD.periodo AND claustro = OLD.claustro AND id_agrupacion_politica = OLD.id_agrupacion_politica
+      AND consejeros = 0;
+END;
+
+-- Calcular los resúmenes de los datos existentes (recuento_votos puede existir de antes, cuando lo
+-- mantenía la aplicación)
+DELETE FROM recuento_votos;
+INSERT INTO recuento_votos (eleccion, periodo, dni, votos)
+    SELECT 0, d.periodo, d.dni,
+           (SELECT COUNT(*) FROM voto_a_decano v WHERE v.dni_decano = d.dni AND v.periodo_decano = d.periodo)
+    FROM decano d
+    UNION ALL
+    SELECT 1, cs.periodo, cs.dni,
+           (SELECT COUNT(*) FROM voto_a_consejero_superior v
+            WHERE v.dni_consejero_superior = cs.dni AND v.periodo_consejero_superior = cs.periodo)
+    FROM consejero_superior cs
+    UNION ALL
+    SELECT 2, r.periodo, r.dni,
+           (SELECT COUNT(*) FROM rector_fue_votado_por_consejero_directivo v WHERE v.dni_rector = r.dni AND v.periodo_rector = r.periodo)
+         + (SELECT COUNT(*) FROM rector_fue_votado_por_consejero_superior v WHERE v.dni_rector = r.dni AND v.periodo_rector = r.periodo)
+         + (SELECT COUNT(*) FROM rector_fue_votado_por_decano v WHERE v.dni_rector = r.dni AND v.periodo_rector = r.periodo)
+    FROM rector r;
+DELETE FROM resumen_periodo;
+INSERT INTO resumen_periodo (periodo, agrupaciones, votos_recibidos)
+    SELECT periodo, COUNT(*), IFNULL(SUM(votos_recibidos), 0)
+    FROM agrupacion_politica_se_presenta_durante_calendario_electoral
+    GROUP BY periodo;
+DELETE FROM resumen_consejo_directivo;
+INSERT INTO resumen_consejo_directivo (periodo, claustro, id_agrupacion_politica, consejeros)
+    SELECT periodo, claustro, id_agrupacion_politica, COUNT(*)
+    FROM consejero_directivo
+    GROUP BY periodo, claustro, id_agrupacion_politica;
@@ -0,0 +1,12 @@
+# coding: utf-8
+
+# Los profesores empadronados antes de que existiera la columna 'cargo' la tienen en NULL. Se completan
+# como profesores regulares (api.CARGO_PROFESOR_REGULAR), que es lo que registra la API.
+
+CARGO_PROFESOR_REGULAR = 0
+
+def migrar(conn):
+    pass
+
+def por_tramos(conn, tramos):
+    tramos.rellenar('profesor', 'cargo = %d' % CARGO_PROFESOR_REGULAR, 'cargo IS NULL')
@@ -0,0 +1,63 @@
+# coding: utf-8
+
+# Las bases creadas con el esquema original no tienen las claves primarias ni las claves foráneas de
+# empadronado, graduado, profesor y consejero_directivo, y consejero_superior no tiene la columna
+# 'claustro' (tiene 'tipo', que se deja como está: esquema.py la tolera). SQLite no permite agregar
+# restricciones a una tabla existente, así que esas tablas se reescriben con la definición de
+# facultad.sql; el claustro de los consejeros superiores se completa con el de su empadronamiento.
+
+TABLAS = {
+    'empadronado': '''CREATE TABLE `empadronado` (
+    `dni`                 INTEGER,
+    `nombre`              TEXT,
+    `fecha_de_nacimiento` INTEGER,
+    `id_facultad`         INTEGER,
+    `claustro`            INTEGER,
+    PRIMARY KEY(dni),
+    FOREIGN KEY(id_facultad) REFERENCES facultad(id)
+)''',
+    'graduado': '''CREATE TABLE `graduado` (
+    `dni`  INTEGER,
+    `universidad` INTEGER,
+    PRIMARY KEY(dni),
+    FOREIGN KEY(dni) REFERENCES empadronado(dni) ON DELETE CASCADE
+)''',
+    'profesor': '''CREATE TABLE `profesor` (
+    `dni`                      INTEGER,
+    `nacionalidad_universidad` TEXT,
+    `cargo`                    INTEGER,
+    PRIMARY KEY(dni),
+    FOREIGN KEY(dni) REFERENCES empadronado(dni) ON DELETE CASCADE
+)''',
+    'consejero_directivo': '''CREATE TABLE `consejero_directivo` (
+    `dni`                    INTEGER,
+    `periodo`                INTEGER,
+    `id_agrupacion_politica` INTEGER,
+    `claustro`               INTEGER,
+    PRIMARY KEY(dni, periodo),
+    FOREIGN KEY(dni) REFERENCES empadronado(dni),
+    FOREIGN KEY(id_agrupacion_politica) REFERENCES agrupacion_politica(id)
+)''',
+}
+
+# Orden en que se reescriben: las tablas referenciadas antes que las que las referencian
+ORDEN = ('empadronado', 'graduado', 'profesor', 'consejero_directivo')
+
+def sin_clave_primaria(conn, tabla):
+    return all(fila[5] == 0 for fila in conn.execute('PRAGMA table_info(%s)' % tabla))
+
+def columnas(conn, tabla):
+    return [fila[1] for fila in conn.execute('PRAGMA table_info(%s)' % tabla)]
+
+def migrar(conn):
+    if 'claustro' not in columnas(conn, 'consejero_superior'):
+        conn.execute('ALTER TABLE `consejero_superior` ADD COLUMN `claustro` INTEGER')
+
+def por_tramos(conn, tramos):
+    for tabla in ORDEN:
+        if sin_clave_primaria(conn, tabla):
+            tramos.reescribir(tabla, TABLAS[tabla])
+    tramos.rellenar('consejero_superior',
+                    'claustro = (SELECT e.claustro FROM empadronado e WHERE e.dni = consejero_superior.dni)',
+                    'claustro IS NULL')
+
@@ -0,0 +1,19 @@
+-- Afiliaciones a las agrupaciones (cada persona a lo sumo a una) y votos obtenidos por cada candidato a
+-- consejero directivo en cada período. Las dos se escriben con upserts: volver a enviar un dato lo reemplaza.
+CREATE TABLE IF NOT EXISTS `afiliado` (
+    `dni`                    INTEGER,
+    `id_agrupacion_politica` INTEGER,
+    PRIMARY KEY(dni),
+    FOREIGN KEY(dni) REFERENCES empadronado(dni),
+    FOREIGN KEY(id_agrupacion_politica) REFERENCES agrupacion_politica(id)
+);
+CREATE TABLE IF NOT EXISTS `candidato_a_consejero` (
+    `dni`     INTEGER,
+    `periodo` INTEGER,
+    `votos`   INTEGER,
+    PRIMARY KEY(dni, periodo),
+    FOREIGN KEY(dni) REFERENCES empadronado(dni),
+    FOREIGN KEY(periodo) REFERENCES calendario_electoral(periodo)
+);
+CREATE INDEX IF NOT EXISTS `idx_afiliado_id_agrupacion_politica` ON `afiliado` (id_agrupacion_politica, dni);
+CREATE INDEX IF NOT EXISTS `idx_candidato_a_consejero_periodo` ON `candidato_a_consejero` (periodo, votos);
@@ -0,0 +1,23 @@
+-- Índice de texto completo sobre los nombres del padrón, para buscar empadronados por parte del nombre.
+-- Es una tabla FTS5 de contenido externo: guarda sólo el índice y lee los nombres de 'empadronado'
+-- (rowid = dni). Los triggers la mantienen al día; unicode61 con remove_diacritics ignora los acentos
+-- (también los de la búsqueda) y 'prefix' agrega índices para los prefijos de 2 y 3 letras.
+CREATE VIRTUAL TABLE IF NOT EXISTS `empadronado_nombre` USING fts5(
+    nombre,
+    content = 'empadronado',
+    content_rowid = 'dni',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+CREATE TRIGGER IF NOT EXISTS `empadronado_nombre_insertar` AFTER INSERT ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre (rowid, nombre) VALUES (NEW.dni, NEW.nombre);
+END;
+CREATE TRIGGER IF NOT EXISTS `empadronado_nombre_borrar` AFTER DELETE ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre (empadronado_nombre, rowid, nombre) VALUES ('delete', OLD.dni, OLD.nombre);
+END;
+CREATE TRIGGER IF NOT EXISTS `empadronado_nombre_modificar` AFTER UPDATE OF dni, nombre ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre (empadronado_nombre, rowid, nombre) VALUES ('delete', OLD.dni, OLD.nombre);
+    INSERT INTO empadronado_nombre (rowid, nombre) VALUES (NEW.dni, NEW.nombre);
+END;
+-- Indexar los empadronados que ya estaban
+INSERT INTO empadronado_nombre (empadronado_nombre) VALUES ('rebuild');
@@ -0,0 +1,40 @@
+# coding: utf-8
+
+# Cada período del calendario electoral pasa a tener el intervalo de fechas [inicio, fin) en que duran
+# los cargos elegidos en él, como texto 'AAAA-MM-DD'. Por defecto es el año del período (el mismo criterio
+# de api.periodo_de_fecha). Los triggers completan el intervalo de los períodos nuevos y agregan al
+# calendario los períodos de los cargos, que no tienen clave foránea a calendario_electoral.
+
+CARGOS = ('consejero_directivo', 'decano', 'consejero_superior', 'rector')
+
+OBJETOS = [
+    'CREATE INDEX IF NOT EXISTS `idx_calendario_electoral_intervalo` ON `calendario_electoral` (inicio, fin, periodo)',
+    '''CREATE TRIGGER IF NOT EXISTS `calendario_electoral_intervalo` AFTER INSERT ON `calendario_electoral`
+WHEN NEW.inicio IS NULL BEGIN
+    UPDATE calendario_electoral SET inicio = printf('%04d-01-01', periodo), fin = printf('%04d-01-01', periodo + 1)
+    WHERE periodo = NEW.periodo;
+END''',
+] + ['''CREATE TRIGGER IF NOT EXISTS `calendario_electoral_%s` AFTER INSERT ON `%s` BEGIN
+    INSERT OR IGNORE INTO calendario_electoral (periodo) VALUES (NEW.periodo);
+END''' % (cargo, cargo) for cargo in CARGOS]
+
+def columnas(conn, tabla):
+    return [fila[1] for fila in conn.execute('PRAGMA table_info(%s)' % tabla)]
+
+# Las columnas nuevas se agregan con ALTER TABLE: no hace falta reescribir calendario_electoral, a la
+# que referencian las claves foráneas de otras tablas
+def migrar(conn):
+    existentes = columnas(conn, 'calendario_electoral')
+    for columna in ('inicio', 'fin'):
+        if columna not in existentes:
+            conn.execute('ALTER TABLE `calendario_electoral` ADD COLUMN `%s` TEXT' % columna)
+    for sql in OBJETOS:
+        conn.execute(sql)
+
+def por_tramos(conn, tramos):
+    with conn:
+        for cargo in CARGOS:
+            conn.execute('INSERT OR IGNORE INTO calendario_electoral (periodo) SELECT DISTINCT periodo FROM %s' % cargo)
+    tramos.rellenar('calendario_electoral',
+                    "inicio = printf('%04d-01-01', periodo), fin = printf('%04d-01-01', periodo + 1)",
+                    'inicio IS NULL')
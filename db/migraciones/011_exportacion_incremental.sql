@@ -0,0 +1,132 @@
+-- Registro de las filas insertadas o modificadas de las tablas de datos, para las exportaciones
+-- incrementales (ver src/exportar.py). Cada cambio agrega una entrada al final; después de cada exportación
+-- se borran las que ya exportaron todas las tablas, pero siempre queda la última, así que la secuencia
+-- crece con cada cambio. Una exportación sólo lee las entradas posteriores a su marca, que son un rango de
+-- la clave primaria (por eso no hace falta otro índice, que frenaría las cargas).
+-- No se usa el rowid para reconocer las filas nuevas: en las tablas cuya clave es el rowid (ej.: el dni
+-- de empadronado) una fila nueva puede tener una clave menor que las ya exportadas.
+CREATE TABLE IF NOT EXISTS `exportacion_modificadas` (
+    `secuencia` INTEGER PRIMARY KEY,
+    `tabla`     TEXT,
+    `fila`      INTEGER
+);
+CREATE TRIGGER IF NOT EXISTS `exportacion_facultad_insertar` AFTER INSERT ON `facultad` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('facultad', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_facultad_modificar` AFTER UPDATE ON `facultad` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('facultad', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_empadronado_insertar` AFTER INSERT ON `empadronado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('empadronado', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_empadronado_modificar` AFTER UPDATE ON `empadronado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('empadronado', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_estudiante_insertar` AFTER INSERT ON `estudiante` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('estudiante', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_estudiante_modificar` AFTER UPDATE ON `estudiante` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('estudiante', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_graduado_insertar` AFTER INSERT ON `graduado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('graduado', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_graduado_modificar` AFTER UPDATE ON `graduado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('graduado', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_graduado_otra_universidad_insertar` AFTER INSERT ON `graduado_otra_universidad` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('graduado_otra_universidad', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_graduado_otra_universidad_modificar` AFTER UPDATE ON `graduado_otra_universidad` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('graduado_otra_universidad', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_profesor_insertar` AFTER INSERT ON `profesor` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('profesor', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_profesor_modificar` AFTER UPDATE ON `profesor` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('profesor', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_calendario_electoral_insertar` AFTER INSERT ON `calendario_electoral` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('calendario_electoral', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_calendario_electoral_modificar` AFTER UPDATE ON `calendario_electoral` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('calendario_electoral', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_agrupacion_politica_insertar` AFTER INSERT ON `agrupacion_politica` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('agrupacion_politica', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_agrupacion_politica_modificar` AFTER UPDATE ON `agrupacion_politica` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('agrupacion_politica', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_agrupacion_politica_se_presenta_durante_calendario_electoral_insertar` AFTER INSERT ON `agrupacion_politica_se_presenta_durante_calendario_electoral` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('agrupacion_politica_se_presenta_durante_calendario_electoral', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_agrupacion_politica_se_presenta_durante_calendario_electoral_modificar` AFTER UPDATE ON `agrupacion_politica_se_presenta_durante_calendario_electoral` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('agrupacion_politica_se_presenta_durante_calendario_electoral', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_consejero_directivo_insertar` AFTER INSERT ON `consejero_directivo` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('consejero_directivo', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_consejero_directivo_modificar` AFTER UPDATE ON `consejero_directivo` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('consejero_directivo', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_decano_insertar` AFTER INSERT ON `decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('decano', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_decano_modificar` AFTER UPDATE ON `decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('decano', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_voto_a_decano_insertar` AFTER INSERT ON `voto_a_decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('voto_a_decano', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_voto_a_decano_modificar` AFTER UPDATE ON `voto_a_decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('voto_a_decano', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_consejero_superior_insertar` AFTER INSERT ON `consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_consejero_superior_modificar` AFTER UPDATE ON `consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_voto_a_consejero_superior_insertar` AFTER INSERT ON `voto_a_consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('voto_a_consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_voto_a_consejero_superior_modificar` AFTER UPDATE ON `voto_a_consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('voto_a_consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_rector_insertar` AFTER INSERT ON `rector` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_rector_modificar` AFTER UPDATE ON `rector` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_rector_fue_votado_por_consejero_directivo_insertar` AFTER INSERT ON `rector_fue_votado_por_consejero_directivo` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_consejero_directivo', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_rector_fue_votado_por_consejero_directivo_modificar` AFTER UPDATE ON `rector_fue_votado_por_consejero_directivo` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_consejero_directivo', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_rector_fue_votado_por_decano_insertar` AFTER INSERT ON `rector_fue_votado_por_decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_decano', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_rector_fue_votado_por_decano_modificar` AFTER UPDATE ON `rector_fue_votado_por_decano` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_decano', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_rector_fue_votado_por_consejero_superior_insertar` AFTER INSERT ON `rector_fue_votado_por_consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_rector_fue_votado_por_consejero_superior_modificar` AFTER UPDATE ON `rector_fue_votado_por_consejero_superior` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('rector_fue_votado_por_consejero_superior', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_afiliado_insertar` AFTER INSERT ON `afiliado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('afiliado', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_afiliado_modificar` AFTER UPDATE ON `afiliado` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('afiliado', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_candidato_a_consejero_insertar` AFTER INSERT ON `candidato_a_consejero` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('candidato_a_consejero', NEW.rowid);
+END;
+CREATE TRIGGER IF NOT EXISTS `exportacion_candidato_a_consejero_modificar` AFTER UPDATE ON `candidato_a_consejero` BEGIN
+    INSERT INTO exportacion_modificadas (tabla, fila) VALUES ('candidato_a_consejero', NEW.rowid);
+END;
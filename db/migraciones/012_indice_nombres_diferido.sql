@@ -0,0 +1,36 @@
+-- Los nombres nuevos o modificados pasan al índice de texto completo (ver 009) de a muchos. FTS5 guarda lo
+-- pendiente al terminar cada sentencia y eso cuesta casi lo mismo para un nombre que para mil, así que
+-- indexar cada empadronado en su propia sentencia duplicaba el costo de empadronar de a uno. Los triggers
+-- anotan los DNIs en empadronado_nombre_pendiente y cada 1000 los indexan todos juntos en una sola
+-- sentencia; model_test.buscar_empadronados indexa los que queden antes de buscar.
+CREATE TABLE IF NOT EXISTS `empadronado_nombre_pendiente` (
+    `secuencia` INTEGER PRIMARY KEY,
+    `dni`       INTEGER
+);
+DROP TRIGGER IF EXISTS `empadronado_nombre_insertar`;
+DROP TRIGGER IF EXISTS `empadronado_nombre_borrar`;
+DROP TRIGGER IF EXISTS `empadronado_nombre_modificar`;
+CREATE TRIGGER `empadronado_nombre_insertar` AFTER INSERT ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre_pendiente (dni) VALUES (NEW.dni);
+END;
+-- Un nombre que todavía no se indexó no está en el índice: alcanza con sacarlo de los pendientes
+CREATE TRIGGER `empadronado_nombre_borrar` AFTER DELETE ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre (empadronado_nombre, rowid, nombre)
+    SELECT 'delete', OLD.dni, OLD.nombre
+    WHERE NOT EXISTS (SELECT 1 FROM empadronado_nombre_pendiente WHERE dni = OLD.dni);
+    DELETE FROM empadronado_nombre_pendiente WHERE dni = OLD.dni;
+END;
+CREATE TRIGGER `empadronado_nombre_modificar` AFTER UPDATE OF dni, nombre ON `empadronado` BEGIN
+    INSERT INTO empadronado_nombre (empadronado_nombre, rowid, nombre)
+    SELECT 'delete', OLD.dni, OLD.nombre
+    WHERE NOT EXISTS (SELECT 1 FROM empadronado_nombre_pendiente WHERE dni = OLD.dni);
+    DELETE FROM empadronado_nombre_pendiente WHERE dni = OLD.dni;
+    INSERT INTO empadronado_nombre_pendiente (dni) VALUES (NEW.dni);
+END;
+-- La secuencia vuelve a empezar cada vez que se vacía la tabla, así que cuenta los pendientes
+CREATE TRIGGER IF NOT EXISTS `empadronado_nombre_indexar` AFTER INSERT ON `empadronado_nombre_pendiente`
+WHEN NEW.secuencia >= 1000 BEGIN
+    INSERT INTO empadronado_nombre (rowid, nombre)
+    SELECT e.dni, e.nombre FROM empadronado_nombre_pendiente p JOIN empadronado e ON e.dni = p.dni;
+    DELETE FROM empadronado_nombre_pendiente;
+END;
@@ -0,0 +1,526 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Benchmarks de la API sobre bases temporales en disco (para que cuenten los commits reales).
+# Uso: python benchmarks.py [opciones] [nombre ...]    (sin nombres corre todos)
+#   --json RUTA            guarda las mediciones en RUTA (JSON)
+#   --guardar-base RUTA    guarda las mediciones como línea de base
+#   --base RUTA            compara contra la línea de base y termina con error si alguna medición
+#                          empeoró más que la tolerancia (--tolerancia, por defecto 0.5). Avisa de las
+#                          mediciones que no están en la base; con --estricto también terminan con error.
+# Quien agrega o renombra una medición tiene que volver a generar la base (make bench-base).
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import datos_sinteticos
+import escrutinio
+import esquema
+import exportar
+import tp_api as api
+import tp_async
+import tp_shards
+import validacion
+
+BENCHMARKS = []
+
+# Mediciones de la corrida actual y benchmark que se está corriendo
+RESULTADOS = []
+BENCHMARK_ACTUAL = None
+
+# Semilla de datos_sinteticos (se puede cambiar con --semilla)
+SEMILLA = datos_sinteticos.SEMILLA
+
+# Fracción de filas/s que una medición puede perder respecto de la línea de base sin considerarse una regresión
+TOLERANCIA = 0.5
+
+# Registra una función como benchmark
+def benchmark(f):
+    BENCHMARKS.append(f)
+    return f
+
+# Crea una base nueva en 'directorio' con el esquema de facultad.sql y devuelve un modelo sobre ella
+def crear_modelo(directorio, nombre='facultad.db', perfil=api.PERFIL_ONLINE):
+    return api.model_test(esquema.crear_base(os.path.join(directorio, nombre), perfil))
+
+# Ejecuta f() y devuelve los segundos que tardó
+def cronometrar(f):
+    inicio = time.time()
+    f()
+    return time.time() - inicio
+
+def informar(nombre, cantidad, segundos):
+    RESULTADOS.append({'benchmark': BENCHMARK_ACTUAL, 'medicion': nombre, 'filas': cantidad, 'segundos': segundos})
+    print('  %-45s %8d filas %9.3f s %12.0f filas/s' % (nombre, cantidad, segundos, cantidad / segundos))
+
+################################################################################
+# Padrón electoral                                                             #
+################################################################################
+
+@benchmark
+def padron(n_por_fila=2000, n_masivo=100000):
+    directorio = tempfile.mkdtemp()
+    try:
+        model = crear_modelo(directorio, 'por_fila.db')
+        def por_fila():
+            for dni in range(n_por_fila):
+                model.empadronar_alumno(dni, 'Alumno %d' % dni)
+        informar('empadronar_alumno (por fila)', n_por_fila, cronometrar(por_fila))
+
+        model = crear_modelo(directorio, 'masivo_chico.db')
+        filas = [(dni, 'Alumno %d' % dni) for dni in range(n_por_fila)]
+        informar('empadronar_alumno_many', n_por_fila, cronometrar(lambda: model.empadronar_alumno_many(filas)))
+
+        model = crear_modelo(directorio, 'masivo.db')
+        filas = ((dni, 'Alumno %d' % dni) for dni in range(n_masivo))
+        informar('empadronar_alumno_many (masivo)', n_masivo, cronometrar(lambda: model.empadronar_alumno_many(filas)))
+
+        # Validar un archivo del mismo tamaño contra el padrón ya cargado, sin escribir nada
+        filas = [(dni, 'Alumno %d' % dni) for dni in range(n_masivo // 2, n_masivo // 2 + n_masivo)]
+        informar('validar padrón (masivo%s)' % ('' if validacion.np is None else ', numpy'), n_masivo,
+                 cronometrar(lambda: validacion.validador(model).padron(filas, api.CLAUSTRO_ESTUDIANTES)))
+    finally:
+        shutil.rmtree(directorio)
+
+# Latencia de la búsqueda por nombre (FTS5) en un padrón grande: palabras completas, prefijos cortos y
+# largos y nombre y apellido juntos, sin acentos; cada consulta trae la primera página y una posterior
+@benchmark
+def busqueda_por_nombre(votantes=500000, consultas=50):
+    datos = datos_sinteticos.generar(SEMILLA, votantes, periodos=0)
+    directorio = tempfile.mkdtemp()
+    try:
+        model = crear_modelo(directorio, perfil=api.PERFIL_CARGA_MASIVA)
+        informar('padrón con índice de nombres', votantes, cronometrar(lambda: model.empadronar_many(datos.padron)))
+        nombres = [n.lower().replace(u'á', 'a').replace(u'é', 'e').replace(u'í', 'i').replace(u'ó', 'o')
+                   .replace(u'ú', 'u').replace(u'ñ', 'n') for n in datos_sinteticos.NOMBRES + datos_sinteticos.APELLIDOS]
+        busquedas = (('palabra completa', lambda i: nombres[i % len(nombres)]),
+                     ('prefijo de 2 letras', lambda i: nombres[i % len(nombres)][:2]),
+                     ('prefijo de 4 letras', lambda i: nombres[i % len(nombres)][:4]),
+                     ('nombre y apellido', lambda i: '%s %s' % (nombres[i % len(datos_sinteticos.NOMBRES)],
+                                                              nombres[-1 - i % len(datos_sinteticos.APELLIDOS)][:3])))
+        for descripcion, texto in busquedas:
+            def buscar():
+                for i in range(consultas):
+                    model.buscar_empadronados(texto(i))
+                    model.buscar_empadronados(texto(i), pagina=10)
+            informar('buscar_empadronados (%s)' % descripcion, 2 * consultas, cronometrar(buscar))
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Transacciones                                                                #
+################################################################################
+
+@benchmark
+def transacciones(n=2000):
+    directorio = tempfile.mkdtemp()
+    try:
+        model = crear_modelo(directorio, 'fuera.db')
+        def fuera():
+            for dni in range(n):
+                model.empadronar_alumno(dni, 'Alumno %d' % dni)
+        informar('empadronar_alumno fuera de transaction()', n, cronometrar(fuera))
+
+        model = crear_modelo(directorio, 'dentro.db')
+        def dentro():
+            with model.connector.transaction():
+                for dni in range(n):
+                    model.empadronar_alumno(dni, 'Alumno %d' % dni)
+        informar('empadronar_alumno dentro de transaction()', n, cronometrar(dentro))
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Registro de sentencias y lotes                                               #
+################################################################################
+
+# Crea 'decanos' decanos y 'consejeros' consejeros directivos del período y devuelve la lista de votos
+# posibles (dni_decano, periodo, dni_consejero, periodo)
+def preparar_votos_a_decano(model, periodo, decanos, consejeros):
+    model.empadronar_profesor_many((dni, 'Profesor') for dni in range(1, decanos + 1))
+    model.empadronar_alumno_many((dni, 'Alumno') for dni in range(1000, 1000 + consejeros))
+    id_agrupacion_politica = model.crear_agrupacion_politica(u'Agrupación')
+    with model.connector.transaction():
+        for dni in range(1, decanos + 1):
+            model.crear_decano(dni, periodo)
+        for dni in range(1000, 1000 + consejeros):
+            model.crear_consejero_directivo(dni, periodo, id_agrupacion_politica)
+    return [(d, periodo, c, periodo) for c in range(1000, 1000 + consejeros) for d in range(1, decanos + 1)]
+
+@benchmark
+def votos_a_decano(decanos=5, consejeros=400):
+    directorio = tempfile.mkdtemp()
+    try:
+        for nombre, registrar in (
+                ('de a uno', lambda model, votos: [model.registrar_voto_a_decano(*v) for v in votos]),
+                ('en transaction()', registrar_en_transaccion),
+                ('en lote()', registrar_en_lote),
+                ('en escrutinio', lambda model, votos: registrar_en_escrutinio(model, votos, directorio))):
+            model = crear_modelo(directorio, 'votos_%d.db' % len(os.listdir(directorio)))
+            votos = preparar_votos_a_decano(model, 2014, decanos, consejeros)
+            informar('registrar_voto_a_decano ' + nombre, len(votos), cronometrar(lambda: registrar(model, votos)))
+    finally:
+        shutil.rmtree(directorio)
+
+def registrar_en_transaccion(model, votos):
+    with model.connector.transaction():
+        for v in votos:
+            model.registrar_voto_a_decano(*v)
+
+def registrar_en_lote(model, votos):
+    with model.lote():
+        for v in votos:
+            model.registrar_voto_a_decano(*v)
+
+def registrar_en_escrutinio(model, votos, directorio):
+    with escrutinio.model_escrutinio(model, os.path.join(directorio, 'escrutinio.journal')) as e:
+        for v in votos:
+            e.registrar_voto_a_decano(*v)
+
+# Planillas de votos de candidatos a consejero: la segunda vez se vuelven a enviar todas (upserts)
+@benchmark
+def candidatos_a_consejero(candidatos=20000, mesas=20):
+    directorio = tempfile.mkdtemp()
+    try:
+        for nombre, registrar in (
+                ('de a uno', lambda model, planilla: [model.set_cant_votos_cantidato_a_consejero(dni, votos, 2014)
+                                                      for dni, votos in planilla]),
+                ('por planilla', lambda model, planilla: model.set_cant_votos_cantidato_a_consejero_many(planilla, 2014))):
+            model = crear_modelo(directorio, 'candidatos_%d.db' % len(os.listdir(directorio)))
+            model.empadronar_alumno_many((dni, 'Candidato') for dni in range(candidatos))
+            planillas = [[(dni, dni % 97) for dni in range(mesa, candidatos, mesas)] for mesa in range(mesas)]
+            def enviar():
+                for _ in range(2):
+                    for planilla in planillas:
+                        registrar(model, planilla)
+            informar('set_cant_votos_cantidato_a_consejero ' + nombre, 2 * candidatos, cronometrar(enviar))
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Fachada asyncio                                                              #
+################################################################################
+
+@benchmark
+def votos_async(decanos=5, consejeros=400):
+    directorio = tempfile.mkdtemp()
+    try:
+        for productores in (1, 10, 100):
+            nombre = 'async_%d.db' % productores
+            model = crear_modelo(directorio, nombre)
+            votos = preparar_votos_a_decano(model, 2014, decanos, consejeros)
+            model.connector.cerrar()
+
+            def abrir():
+                connector = api.bd_connector()
+                connector.connect(bd=os.path.join(directorio, nombre))
+                return api.model_test(connector)
+            model = tp_async.model_async(abrir)
+
+            # Cada productor registra su parte de los votos esperando cada llamada
+            async def producir(votos):
+                for v in votos:
+                    await model.registrar_voto_a_decano(*v)
+            async def producir_todo():
+                await asyncio.gather(*[producir(votos[i::productores]) for i in range(productores)])
+
+            segundos = cronometrar(lambda: asyncio.run(producir_todo()))
+            model.cerrar()
+            informar('registrar_voto_a_decano, %d productores' % productores, len(votos), segundos)
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Facultad sintética                                                           #
+################################################################################
+
+# Escenario completo sobre los datos de datos_sinteticos: padrón masivo, elección del consejo directivo,
+# votos a decano, consejo superior y rector, y consultas de resultados de todos los períodos
+@benchmark
+def facultad_sintetica(votantes=100000, agrupaciones=30, periodos=8, escala_consejo=25, consultas=20):
+    datos = datos_sinteticos.generar(SEMILLA, votantes, agrupaciones, periodos, escala_consejo=escala_consejo)
+    directorio = tempfile.mkdtemp()
+    try:
+        model = crear_modelo(directorio)
+        informar('padrón (empadronar_many)', len(datos.padron),
+                 cronometrar(lambda: datos_sinteticos.cargar_padron(model, datos)))
+        datos_sinteticos.cargar_agrupaciones(model, datos)
+
+        def consejo_directivo():
+            for p in datos.periodos:
+                with model.connector.transaction():
+                    datos_sinteticos.cargar_consejo_directivo(model, p)
+        informar('consejo directivo (votos y consejeros)',
+                 sum(len(p.votos_agrupaciones) + len(p.consejeros_directivos) for p in datos.periodos),
+                 cronometrar(consejo_directivo))
+
+        def elecciones():
+            for p in datos.periodos:
+                with model.connector.transaction():
+                    datos_sinteticos.cargar_elecciones(model, p)
+        informar('decano, consejo superior y rector (votos)',
+                 sum(datos_sinteticos.cantidad_votos(p) for p in datos.periodos), cronometrar(elecciones))
+
+        def resultados():
+            for i in range(consultas):
+                for p in datos.periodos:
+                    model.composiciones.clear()
+                    model.composicion_consejo(p.periodo)
+                    model.resultado_decano(p.periodo)
+                    model.resultado_consejo_superior(p.periodo)
+                    model.resultado_rector(p.periodo)
+        informar('resultados (consultas)', 4 * consultas * len(datos.periodos), cronometrar(resultados))
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Perfiles de conexión                                                         #
+################################################################################
+
+# Carga la facultad sintética con cada perfil de escritura y consulta los resultados con cada perfil
+@benchmark
+def perfiles(votantes=100000, agrupaciones=30, periodos=8, escala_consejo=25, consultas=20):
+    datos = datos_sinteticos.generar(SEMILLA, votantes, agrupaciones, periodos, escala_consejo=escala_consejo)
+    directorio = tempfile.mkdtemp()
+    try:
+        for perfil in (api.PERFIL_CARGA_MASIVA, api.PERFIL_ONLINE):
+            model = crear_modelo(directorio, perfil + '.db', perfil)
+            informar('%s: padrón' % perfil, len(datos.padron),
+                     cronometrar(lambda: datos_sinteticos.cargar_padron(model, datos)))
+            datos_sinteticos.cargar_agrupaciones(model, datos)
+
+            # Cada voto en su propia transacción, como llegan en la API online
+            def votos():
+                for p in datos.periodos:
+                    datos_sinteticos.cargar_consejo_directivo(model, p)
+                    datos_sinteticos.cargar_elecciones(model, p)
+            informar('%s: votos (un commit por voto)' % perfil,
+                     sum(len(p.votos_agrupaciones) + len(p.consejeros_directivos) + datos_sinteticos.cantidad_votos(p)
+                         for p in datos.periodos),
+                     cronometrar(votos))
+            model.connector.cerrar()
+
+        for perfil in (api.PERFIL_ONLINE, api.PERFIL_ANALISIS):
+            connector = api.bd_connector()
+            connector.connect(bd=os.path.join(directorio, api.PERFIL_ONLINE + '.db'), perfil=perfil)
+            model = api.model_test(connector)
+            def resultados():
+                for i in range(consultas):
+                    for p in datos.periodos:
+                        model.resultado_decano(p.periodo)
+                        model.resultado_consejo_superior(p.periodo)
+                        model.resultado_rector(p.periodo)
+            informar('%s: resultados' % perfil, 3 * consultas * len(datos.periodos), cronometrar(resultados))
+            connector.cerrar()
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Resúmenes                                                                    #
+################################################################################
+
+# Latencia de las consultas de resultados y de resumen, calculadas a partir de los votos (antes) y leídas
+# de las tablas que mantienen los triggers (después)
+@benchmark
+def resumenes(votantes=100000, agrupaciones=30, periodos=8, escala_consejo=100, consultas=50):
+    datos = datos_sinteticos.generar(SEMILLA, votantes, agrupaciones, periodos, escala_consejo=escala_consejo)
+    directorio = tempfile.mkdtemp()
+    try:
+        model = crear_modelo(directorio)
+        datos_sinteticos.cargar(model, datos)
+
+        def resultados():
+            for i in range(consultas):
+                for p in datos.periodos:
+                    model.resultado_decano(p.periodo)
+                    model.resultado_consejo_superior(p.periodo)
+                    model.resultado_rector(p.periodo)
+        informar('resultados contando votos', 3 * consultas * len(datos.periodos), cronometrar(resultados))
+        model.usar_recuento_materializado()
+        informar('resultados de recuento_votos', 3 * consultas * len(datos.periodos), cronometrar(resultados))
+
+        def resumen_contando():
+            for i in range(consultas):
+                for p in datos.periodos:
+                    with model.connector as c:
+                        c.execute(CONSULTAS_SIN_RESUMEN['votos_periodo'], (p.periodo,))
+                        c.fetchall()
+                        c.execute(CONSULTAS_SIN_RESUMEN['consejeros_por_claustro'], (p.periodo,))
+                        c.fetchall()
+        def resumen_leyendo():
+            for i in range(consultas):
+                for p in datos.periodos:
+                    model.resumen_periodo(p.periodo)
+                    model.consejeros_por_claustro(p.periodo)
+        informar('resúmenes de período calculados', 2 * consultas * len(datos.periodos), cronometrar(resumen_contando))
+        informar('resúmenes de período leídos', 2 * consultas * len(datos.periodos), cronometrar(resumen_leyendo))
+    finally:
+        shutil.rmtree(directorio)
+
+# Las consultas que reemplazan resumen_periodo() y consejeros_por_claustro() sin las tablas de resumen
+CONSULTAS_SIN_RESUMEN = {
+    'votos_periodo': '''SELECT periodo, COUNT(*), SUM(votos_recibidos)
+                        FROM agrupacion_politica_se_presenta_durante_calendario_electoral
+                        WHERE periodo = ?''',
+    'consejeros_por_claustro': '''SELECT claustro, id_agrupacion_politica, COUNT(*) FROM consejero_directivo
+                                  WHERE periodo = ?
+                                  GROUP BY claustro, id_agrupacion_politica''',
+}
+
+################################################################################
+# Calendario electoral                                                         #
+################################################################################
+
+# Consultas temporales sobre décadas de períodos: quiénes estaban en funciones en una fecha, en ventanas
+# de diez años y el historial completo
+@benchmark
+def cargos_en_el_tiempo(votantes=20000, agrupaciones=10, periodos=60, consultas=500):
+    datos = datos_sinteticos.generar(SEMILLA, votantes, agrupaciones, periodos, primer_periodo=1980)
+    directorio = tempfile.mkdtemp()
+    try:
+        model = crear_modelo(directorio)
+        datos_sinteticos.cargar(model, datos)
+        anios = [p.periodo for p in datos.periodos]
+
+        def en_fecha():
+            for i in range(consultas):
+                model.en_funciones(datetime.date(anios[i % len(anios)], 1 + i % 12, 1))
+        informar('en_funciones (un día)', consultas, cronometrar(en_fecha))
+
+        def en_ventana():
+            for i in range(consultas):
+                model.en_funciones_entre(anios[i % len(anios)], anios[i % len(anios)] + 10, 'decano')
+        informar('en_funciones_entre (10 años, decano)', consultas, cronometrar(en_ventana))
+
+        informar('historial_cargos (completo)', sum(1 for _ in model.historial_cargos()),
+                 cronometrar(lambda: sum(1 for _ in model.historial_cargos())))
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Multi-facultad                                                               #
+################################################################################
+
+# Carga el padrón de 'facultades' facultades en una sola base y en un shard por facultad en paralelo
+@benchmark
+def shards(facultades=4, votantes=100000):
+    datos = datos_sinteticos.generar(SEMILLA, votantes, periodos=0)
+    por_facultad = dict((id_facultad, datos.padron[id_facultad - 1::facultades]) for id_facultad in range(1, facultades + 1))
+    directorio = tempfile.mkdtemp()
+    try:
+        model = crear_modelo(directorio)
+        informar('padrón en una sola base', votantes, cronometrar(lambda: model.empadronar_many(datos.padron)))
+
+        universidad = tp_shards.model_universidad(directorio, dict((id, 'Facultad %d' % id) for id in por_facultad),
+                                                  procesos=facultades)
+        operaciones = [(id_facultad, 'empadronar_many', (filas,)) for id_facultad, filas in por_facultad.items()]
+        informar('padrón en %d shards en paralelo' % facultades, votantes,
+                 cronometrar(lambda: universidad.aplicar(operaciones)))
+        universidad.cerrar()
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Exportación                                                                  #
+################################################################################
+
+# Exportación de todas las tablas a CSV comprimido, en un proceso y en 'procesos', y exportación
+# incremental después de modificar el 1% del padrón
+@benchmark
+def exportacion(votantes=100000, agrupaciones=30, periodos=8, escala_consejo=25, procesos=4):
+    datos = datos_sinteticos.generar(SEMILLA, votantes, agrupaciones, periodos, escala_consejo=escala_consejo)
+    directorio = tempfile.mkdtemp()
+    try:
+        model = crear_modelo(directorio)
+        datos_sinteticos.cargar(model, datos)
+        bd = os.path.join(directorio, 'facultad.db')
+        destino = os.path.join(directorio, 'exportacion')
+        os.mkdir(destino)
+        estado = os.path.join(directorio, 'estado.json')
+
+        exportadas = {}
+        def exportar_todo(medicion, procesos, estado=None):
+            exportadas[medicion] = sum(exportar.exportar(bd, destino, estado=estado, procesos=procesos).values())
+        # La primera exportación con estado es completa y deja las marcas para la incremental
+        mediciones = (('exportación completa (1 proceso)', 1, None),
+                      ('exportación completa (%d procesos)' % procesos, procesos, estado))
+        for medicion, n, estado_medicion in mediciones:
+            segundos = cronometrar(lambda: exportar_todo(medicion, n, estado_medicion))
+            informar(medicion, exportadas[medicion], segundos)
+
+        model.connector.query_without_result("UPDATE empadronado SET nombre = nombre || ' (modificado)' WHERE dni % 100 = 0")
+        medicion = 'exportación incremental (1% del padrón)'
+        segundos = cronometrar(lambda: exportar_todo(medicion, procesos, estado))
+        informar(medicion, exportadas[medicion], segundos)
+    finally:
+        shutil.rmtree(directorio)
+
+################################################################################
+# Línea de base                                                                #
+################################################################################
+
+def clave(resultado):
+    return '%s: %s' % (resultado['benchmark'], resultado['medicion'])
+
+# Devuelve la lista de mediciones que empeoraron más que 'tolerancia' respecto de 'base', como
+# tuplas (medición, filas/s de la base, filas/s actuales)
+def regresiones(resultados, base, tolerancia=TOLERANCIA):
+    anteriores = dict((clave(r), r['filas'] / r['segundos']) for r in base)
+    peores = []
+    for r in resultados:
+        anterior = anteriores.get(clave(r))
+        actual = r['filas'] / r['segundos']
+        if anterior is not None and actual < anterior * (1 - tolerancia):
+            peores.append((clave(r), anterior, actual))
+    return peores
+
+# Mediciones de 'resultados' que no figuran en 'base', y que por lo tanto no se comparan
+def sin_base(resultados, base):
+    anteriores = set(clave(r) for r in base)
+    return [clave(r) for r in resultados if clave(r) not in anteriores]
+
+def guardar_json(ruta, resultados):
+    with open(ruta, 'w') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks de la API.')
+    parser.add_argument('nombres', nargs='*')
+    parser.add_argument('--json')
+    parser.add_argument('--guardar-base')
+    parser.add_argument('--base')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    parser.add_argument('--estricto', action='store_true')
+    parser.add_argument('--semilla', type=int, default=datos_sinteticos.SEMILLA)
+    args = parser.parse_args()
+    SEMILLA = args.semilla
+
+    for f in BENCHMARKS:
+        if not args.nombres or f.__name__ in args.nombres:
+            print(f.__name__)
+            BENCHMARK_ACTUAL = f.__name__
+            f()
+
+    if args.json:
+        guardar_json(args.json, RESULTADOS)
+    if args.guardar_base:
+        guardar_json(args.guardar_base, RESULTADOS)
+    if args.base:
+        with open(args.base) as f:
+            base = json.load(f)
+        peores = regresiones(RESULTADOS, base, args.tolerancia)
+        faltantes = sin_base(RESULTADOS, base)
+        for nombre, anterior, actual in peores:
+            print('REGRESIÓN %s: %.0f filas/s (base: %.0f filas/s)' % (nombre, actual, anterior))
+        for nombre in faltantes:
+            print('SIN BASE %s: no se compara (hay que volver a generar %s)' % (nombre, args.base))
+        if peores or (faltantes and args.estricto):
+            sys.exit(1)
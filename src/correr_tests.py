@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Corre los tests de tests.py repartidos entre un pool de procesos. Cada proceso arma su propia plantilla
+# del esquema (esquema.plantilla) y las bases de cada test se clonan de ella; los tests de un proceso
+# usan además su propio directorio temporal. Las bases compartidas con datos sintéticos
+# (tests.FIXTURES) se arman una sola vez antes de empezar y los procesos sólo las leen.
+# Al final muestra los errores y el tiempo de los tests más lentos.
+# Uso: python correr_tests.py [opciones] [patrón ...]    (sin patrones corre todos; un test se corre si
+#                                                        su nombre completo contiene alguno)
+#   -j N           cantidad de procesos (por defecto, uno por CPU)
+#   --lentos N     cantidad de tests lentos que se muestran (por defecto 10)
+#   --json RUTA    guarda el tiempo de cada test en RUTA (JSON); si RUTA ya existe, sus tiempos se usan
+#                  para repartir primero los tests más lentos
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+import unittest
+
+import esquema
+import tests
+
+LENTOS = 10
+
+# Resultados posibles de un test
+OK       = 'ok'
+FALLA    = 'falla'
+ERROR    = 'error'
+SALTEADO = 'salteado'
+
+# Nombres completos (ej.: 'tests.TestModel.test_crear_decano') de los tests del módulo
+def listar_tests(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            for nombre in listar_tests(test):
+                yield nombre
+        else:
+            yield test.id()
+
+# Un test lento se reparte primero, para que no quede solo al final de la corrida. Sin datos de
+# corridas anteriores se mantiene el orden del módulo.
+def repartir(nombres, tiempos):
+    return sorted(nombres, key=lambda nombre: -tiempos.get(nombre, 0))
+
+def leer_tiempos(ruta):
+    if ruta is None or not os.path.exists(ruta):
+        return {}
+    with open(ruta) as f:
+        return dict((r['test'], r['segundos']) for r in json.load(f))
+
+################################################################################
+# Funciones que corren en los procesos del pool                                #
+################################################################################
+
+def iniciar_proceso(directorio):
+    tempfile.tempdir = tempfile.mkdtemp(prefix='proceso_%d_' % os.getpid(), dir=directorio)
+    esquema.plantilla()
+
+# Corre un test y devuelve (nombre, resultado, segundos, detalle del error)
+def correr_test(nombre):
+    test = unittest.defaultTestLoader.loadTestsFromName(nombre[len('tests.'):], tests)
+    resultado = unittest.TestResult()
+    inicio = time.perf_counter()
+    try:
+        test.run(resultado)
+    except Exception:
+        return nombre, ERROR, time.perf_counter() - inicio, traceback.format_exc()
+    segundos = time.perf_counter() - inicio
+    if resultado.errors:
+        return nombre, ERROR, segundos, resultado.errors[0][1]
+    if resultado.failures:
+        return nombre, FALLA, segundos, resultado.failures[0][1]
+    if resultado.skipped:
+        return nombre, SALTEADO, segundos, resultado.skipped[0][1]
+    return nombre, OK, segundos, None
+
+################################################################################
+# Informe                                                                      #
+################################################################################
+
+def informar(resultados, total, procesos, lentos):
+    for nombre, estado, _, detalle in resultados:
+        if estado in (FALLA, ERROR):
+            print('=' * 70)
+            print('%s: %s' % (estado.upper(), nombre))
+            print('-' * 70)
+            print(detalle)
+
+    print('Tests más lentos:')
+    for nombre, _, segundos, _ in sorted(resultados, key=lambda r: -r[2])[:lentos]:
+        print('  %8.3f s  %s' % (segundos, nombre))
+
+    cantidades = dict((estado, sum(1 for r in resultados if r[1] == estado)) for estado in (OK, FALLA, ERROR, SALTEADO))
+    print('%d tests en %.2f s con %d procesos (%.2f s sumando todos): %d ok, %d fallas, %d errores, %d salteados'
+          % (len(resultados), total, procesos, sum(r[2] for r in resultados),
+             cantidades[OK], cantidades[FALLA], cantidades[ERROR], cantidades[SALTEADO]))
+
+def guardar_json(ruta, resultados):
+    with open(ruta, 'w') as f:
+        json.dump([{'test': nombre, 'resultado': estado, 'segundos': segundos}
+                   for nombre, estado, segundos, _ in resultados], f, indent=2)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Corre los tests en paralelo.')
+    parser.add_argument('patrones', nargs='*')
+    parser.add_argument('-j', dest='procesos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--lentos', type=int, default=LENTOS)
+    parser.add_argument('--json')
+    args = parser.parse_args()
+
+    nombres = [nombre for nombre in listar_tests(unittest.defaultTestLoader.loadTestsFromModule(tests))
+               if not args.patrones or any(patron in nombre for patron in args.patrones)]
+    nombres = repartir(nombres, leer_tiempos(args.json))
+
+    directorio = tempfile.mkdtemp(prefix='tests_')
+    try:
+        inicio = time.perf_counter()
+        fixtures = os.path.join(directorio, 'fixtures')
+        os.mkdir(fixtures)
+        tests.preparar_fixtures(fixtures)
+        os.environ[tests.VARIABLE_FIXTURES] = fixtures
+
+        # Procesos nuevos (spawn) y no copias de éste: una conexión de SQLite abierta no se puede seguir
+        # usando del otro lado de un fork
+        pool = concurrent.futures.ProcessPoolExecutor(args.procesos, mp_context=multiprocessing.get_context('spawn'),
+                                                      initializer=iniciar_proceso, initargs=(directorio,))
+        with pool:
+            resultados = list(pool.map(correr_test, nombres))
+        total = time.perf_counter() - inicio
+    finally:
+        shutil.rmtree(directorio, True)
+
+    informar(resultados, total, args.procesos, args.lentos)
+    if args.json:
+        guardar_json(args.json, resultados)
+    sys.exit(0 if all(r[1] in (OK, SALTEADO) for r in resultados) else 1)
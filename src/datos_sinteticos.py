@@ -0,0 +1,190 @@
+# coding: utf-8
+
+# Generador de datos sintéticos para pruebas de carga. Con la misma semilla y los mismos parámetros
+# genera siempre exactamente los mismos datos, así las mediciones de distintas corridas son comparables.
+# Cubre todas las tablas de facultad.sql: padrón (alumnos, graduados de la UBA y de otras universidades,
+# profesores), agrupaciones, afiliados y sus votos por período, candidatos a consejero directivo y sus
+# votos, consejos directivos, decanos, consejo superior, rectores y todos los votos entre ellos.
+
+import random
+from collections import namedtuple
+
+import tp_api as api
+
+SEMILLA = 2014
+
+# Proporción de cada claustro en el padrón
+PROPORCION_CLAUSTROS = (
+    (api.CLAUSTRO_ESTUDIANTES, 0.80),
+    (api.CLAUSTRO_GRADUADOS,   0.15),
+    (api.CLAUSTRO_PROFESORES,  0.05),
+)
+
+# Proporción de los graduados que se recibieron en otra universidad
+PROPORCION_GRADUADOS_OTRA_UNIVERSIDAD = 0.1
+
+# Proporción del padrón afiliada a alguna agrupación
+PROPORCION_AFILIADOS = 0.05
+
+# Candidatos por período
+CANDIDATOS_DECANO           = 3
+CONSEJEROS_SUPERIORES       = 10
+CANDIDATOS_RECTOR           = 4
+
+NOMBRES = (u'María', u'José', u'Lucía', u'Martín', u'Sofía', u'Julián', u'Valentina', u'Tomás',
+           u'Camila', u'Agustín', u'Florencia', u'Nicolás', u'Inés', u'Joaquín', u'Ramón', u'Belén')
+APELLIDOS = (u'González', u'Rodríguez', u'Fernández', u'López', u'Martínez', u'Pérez', u'Gómez',
+             u'Díaz', u'Sánchez', u'Romero', u'Álvarez', u'Peña', u'Muñoz', u'Ibáñez', u'Suárez', u'Núñez')
+
+# Sentencias para las tablas que la API todavía no escribe
+SENTENCIAS = {
+    'marcar_graduado_otra_universidad': 'UPDATE graduado SET universidad = ? WHERE dni = ?',
+    'insertar_graduado_otra_universidad': '''INSERT INTO graduado_otra_universidad (dni, inicio_actividades)
+                                             VALUES (?, ?)''',
+}
+
+# Datos de un período electoral. Los votos de cada elección son listas de (dni_candidato, dni_votante),
+# salvo los de los candidatos a consejero directivo, que son (dni_candidato, cantidad de votos).
+periodo_sintetico = namedtuple('periodo_sintetico', [
+    'periodo', 'votos_agrupaciones', 'votos_candidatos_a_consejero', 'consejeros_directivos',
+    'decanos', 'votos_a_decano',
+    'consejeros_superiores', 'votos_a_consejero_superior',
+    'rectores', 'votos_de_consejero_directivo_a_rector',
+    'votos_de_consejero_superior_a_rector', 'votos_de_decano_a_rector',
+])
+
+# 'padron' tiene filas (dni, nombre, claustro), 'graduados_otra_universidad' filas (dni, inicio_actividades),
+# 'agrupaciones' los nombres de las agrupaciones (su posición + 1 es el id que les asigna la base nueva),
+# 'periodos' un periodo_sintetico por período y 'afiliados' filas (dni, id_agrupacion)
+datos_sinteticos = namedtuple('datos_sinteticos', ['padron', 'graduados_otra_universidad', 'agrupaciones', 'periodos',
+                                                   'afiliados'])
+
+# Genera una facultad con 'votantes' empadronados, 'agrupaciones' agrupaciones y 'periodos' períodos
+# consecutivos a partir de 'primer_periodo'. 'escala_consejo' multiplica las bancas de cada claustro,
+# para simular elecciones con más consejeros (y más votos) que las reales.
+def generar(semilla=SEMILLA, votantes=100000, agrupaciones=30, periodos=8, primer_periodo=2007, escala_consejo=1):
+    rnd = random.Random(semilla)
+
+    padron = []
+    por_claustro = dict((claustro, []) for claustro in api.CLAUSTROS)
+    dnis = rnd.sample(range(10000000, 45000000), votantes)
+    for dni in dnis:
+        claustro = elegir_claustro(rnd)
+        padron.append((dni, u'%s %s' % (rnd.choice(NOMBRES), rnd.choice(APELLIDOS)), claustro))
+        por_claustro[claustro].append(dni)
+    graduados_otra_universidad = [(dni, rnd.randint(1980, primer_periodo)) for dni in por_claustro[api.CLAUSTRO_GRADUADOS]
+                                  if rnd.random() < PROPORCION_GRADUADOS_OTRA_UNIVERSIDAD]
+
+    nombres_agrupaciones = [u'Agrupación %d' % (i + 1) for i in range(agrupaciones)]
+    datos_periodos = [generar_periodo(rnd, periodo, por_claustro, agrupaciones, escala_consejo)
+                      for periodo in range(primer_periodo, primer_periodo + periodos)]
+    afiliados = [(dni, rnd.randint(1, agrupaciones)) for dni, _, _ in padron if rnd.random() < PROPORCION_AFILIADOS]
+    return datos_sinteticos(padron, graduados_otra_universidad, nombres_agrupaciones, datos_periodos, afiliados)
+
+def elegir_claustro(rnd):
+    x = rnd.random()
+    for claustro, proporcion in PROPORCION_CLAUSTROS:
+        if x < proporcion:
+            return claustro
+        x -= proporcion
+    return PROPORCION_CLAUSTROS[-1][0]
+
+def generar_periodo(rnd, periodo, por_claustro, agrupaciones, escala_consejo):
+    # Votos de cada agrupación (ids 1..agrupaciones), con algunas agrupaciones mucho más votadas que otras
+    votos_agrupaciones = [(id, int(rnd.paretovariate(1.2) * 100)) for id in range(1, agrupaciones + 1)]
+
+    # Cada agrupación presenta candidatos en cada claustro; cuantos más votos, más candidatos
+    consejeros_directivos = []
+    for claustro, bancas in sorted(api.BANCAS_CONSEJO_DIRECTIVO.items()):
+        candidatos = rnd.sample(por_claustro[claustro], bancas * escala_consejo)
+        for dni in candidatos:
+            id_agrupacion = rnd.choices(votos_agrupaciones, weights=[v for _, v in votos_agrupaciones])[0][0]
+            consejeros_directivos.append((dni, id_agrupacion))
+    votantes_directivos = [dni for dni, _ in consejeros_directivos]
+
+    decanos = rnd.sample(por_claustro[api.CLAUSTRO_PROFESORES], CANDIDATOS_DECANO)
+    votos_a_decano = [(rnd.choice(decanos), dni) for dni in votantes_directivos]
+
+    consejeros_superiores = rnd.sample(padron_completo(por_claustro), CONSEJEROS_SUPERIORES)
+    votos_a_consejero_superior = [(rnd.choice(consejeros_superiores), dni) for dni in votantes_directivos]
+
+    rectores = rnd.sample(por_claustro[api.CLAUSTRO_PROFESORES], CANDIDATOS_RECTOR)
+    votos_de_consejero_directivo_a_rector = [(rnd.choice(rectores), dni) for dni in votantes_directivos]
+    votos_de_consejero_superior_a_rector = [(rnd.choice(rectores), dni) for dni in consejeros_superiores]
+    votos_de_decano_a_rector = [(rnd.choice(rectores), dni) for dni in decanos]
+
+    # Los candidatos a consejero son los que resultaron electos y otros tantos que no
+    candidatos = votantes_directivos + rnd.sample(padron_completo(por_claustro), len(votantes_directivos))
+    votos_candidatos_a_consejero = dict((dni, rnd.randint(0, 500)) for dni in candidatos)
+
+    return periodo_sintetico(periodo, votos_agrupaciones, sorted(votos_candidatos_a_consejero.items()),
+                             consejeros_directivos,
+                             decanos, votos_a_decano,
+                             consejeros_superiores, votos_a_consejero_superior,
+                             rectores, votos_de_consejero_directivo_a_rector,
+                             votos_de_consejero_superior_a_rector, votos_de_decano_a_rector)
+
+def padron_completo(por_claustro):
+    return [dni for claustro in api.CLAUSTROS for dni in por_claustro[claustro]]
+
+################################################################################
+# Carga de los datos en una base                                               #
+################################################################################
+
+# Carga el padrón con la carga masiva de la API. Los graduados de otras universidades no tienen
+# todavía un método en la API, así que se completan directamente en la base.
+def cargar_padron(model, datos):
+    resultado = model.empadronar_many(datos.padron)
+    with model.connector.transaction():
+        with model.connector as c:
+            c.executemany(SENTENCIAS['marcar_graduado_otra_universidad'],
+                          ((api.OTRA_UNIVERSIDAD, dni) for dni, _ in datos.graduados_otra_universidad))
+            c.executemany(SENTENCIAS['insertar_graduado_otra_universidad'], datos.graduados_otra_universidad)
+    return resultado
+
+def cargar_agrupaciones(model, datos):
+    with model.connector.transaction():
+        for nombre in datos.agrupaciones:
+            model.crear_agrupacion_politica(nombre)
+    model.afiliar_a_agrupacion_many(datos.afiliados)
+
+# Registra los votos de las agrupaciones y de los candidatos y crea los consejeros directivos del período
+def cargar_consejo_directivo(model, p):
+    for id_agrupacion, votos in p.votos_agrupaciones:
+        model.registrar_votos_eleccion_consejo_directivo(id_agrupacion, p.periodo, votos)
+    model.set_cant_votos_cantidato_a_consejero_many(p.votos_candidatos_a_consejero, p.periodo)
+    for dni, id_agrupacion in p.consejeros_directivos:
+        model.crear_consejero_directivo(dni, p.periodo, id_agrupacion)
+
+# Crea los candidatos del período y registra todos sus votos
+def cargar_elecciones(model, p):
+    for dni in p.decanos:
+        model.crear_decano(dni, p.periodo)
+    for dni_decano, dni_votante in p.votos_a_decano:
+        model.registrar_voto_a_decano(dni_decano, p.periodo, dni_votante, p.periodo)
+    for dni in p.consejeros_superiores:
+        model.crear_consejero_superior(dni, p.periodo)
+    for dni_consejero_superior, dni_votante in p.votos_a_consejero_superior:
+        model.registrar_voto_a_consejero_superior(dni_consejero_superior, p.periodo, dni_votante, p.periodo)
+    for dni in p.rectores:
+        model.crear_rector(dni, p.periodo)
+    for dni_rector, dni_votante in p.votos_de_consejero_directivo_a_rector:
+        model.registrar_voto_de_consejero_directivo_a_rector(dni_rector, p.periodo, dni_votante, p.periodo)
+    for dni_rector, dni_votante in p.votos_de_consejero_superior_a_rector:
+        model.registrar_voto_de_consejero_superior_a_rector(dni_rector, p.periodo, dni_votante, p.periodo)
+    for dni_rector, dni_votante in p.votos_de_decano_a_rector:
+        model.registrar_voto_de_decano_a_rector(dni_rector, p.periodo, dni_votante, p.periodo)
+
+# Cantidad de votos que cargar_elecciones registra en el período
+def cantidad_votos(p):
+    return (len(p.votos_a_decano) + len(p.votos_a_consejero_superior) + len(p.votos_de_consejero_directivo_a_rector)
+            + len(p.votos_de_consejero_superior_a_rector) + len(p.votos_de_decano_a_rector))
+
+# Carga todos los datos generados
+def cargar(model, datos):
+    cargar_padron(model, datos)
+    cargar_agrupaciones(model, datos)
+    for p in datos.periodos:
+        with model.connector.transaction():
+            cargar_consejo_directivo(model, p)
+            cargar_elecciones(model, p)
@@ -0,0 +1,269 @@
+# coding: utf-8
+
+# Conjunto de trabajo para la noche del escrutinio. Los candidatos y votos se validan en memoria contra
+# las claves de la base (cargadas al empezar) y se acumulan en arrays de enteros; se escriben en la base
+# de a muchos, en una sola transacción, cuando se junta 'tamano' pendientes, cuando pasaron 'intervalo'
+# segundos desde el último envío o cuando se llama a enviar(). Así cada voto no cuesta un commit.
+#
+# El envío por tiempo no tiene un temporizador propio, porque la conexión de SQLite sólo se puede usar
+# desde su hilo: lo hace registrar() y lo hace enviar_si_corresponde(), que quien usa el conjunto tiene que
+# llamar a más tardar a los proximo_envio() segundos si deja de registrar operaciones (ej.: usándolo como
+# timeout al esperar la próxima). Si no, lo pendiente queda en memoria y en el journal hasta entonces.
+#
+# Cada operación aceptada se agrega antes a un journal (un archivo de texto, una línea por operación) que
+# se vacía después de cada envío. Cada línea se escribe en el archivo antes de volver de registrar, así
+# que una caída del proceso no pierde nada, pero se baja al disco (fsync) de a 'sincronizar' líneas: un
+# corte de luz puede perder las últimas 'sincronizar' - 1 operaciones aceptadas que todavía no se
+# enviaron (nunca más que las de 'intervalo' segundos, si se respeta lo anterior). Al crear de nuevo el
+# conjunto sobre el mismo journal se vuelven a aplicar las operaciones que no se habían enviado.
+#
+# Mientras se usa, nadie más debería escribir candidatos ni votos en la base: las validaciones sólo
+# conocen las claves cargadas al empezar y las que pasaron por el conjunto. Los resultados de model_test
+# sólo incluyen lo que ya se envió.
+
+import os
+import time
+from array import array
+from bisect import bisect_left
+from sqlite3 import IntegrityError
+
+import tp_api as api
+
+# Operaciones pendientes y segundos que se acumulan como máximo antes de enviarlas a la base
+TAMANO_ESCRUTINIO    = 10000
+INTERVALO_ESCRUTINIO = 5.0
+
+# Líneas del journal que se escriben entre un fsync y el siguiente
+SINCRONIZAR_JOURNAL = 100
+
+# Rangos de las claves: [0, máximo). Son los mismos de validacion.dni y validacion.periodo.
+DNI_MAXIMO        = 2 ** 32
+PERIODO_MAXIMO    = 2 ** 16
+CANDIDATOS_MAXIMO = 2 ** 15
+
+# Claves (dni, periodo) codificadas en un único entero: los períodos entran en 16 bits y los DNIs en 32.
+# Fuera de esos rangos dos claves distintas darían el mismo entero, así que se rechazan.
+def clave(dni, periodo):
+    if not 0 <= dni < DNI_MAXIMO:
+        raise ValueError('DNI fuera de rango: %d' % dni)
+    if not 0 <= periodo < PERIODO_MAXIMO:
+        raise ValueError('Período fuera de rango: %d' % periodo)
+    return (dni << 16) | periodo
+
+# Los votos se codifican con el número de orden del candidato (se numeran a medida que se conocen; los
+# candidatos de una noche son pocos, a lo sumo CANDIDATOS_MAXIMO) y la clave del votante, para que también
+# entren en 64 bits
+def clave_voto(orden_candidato, clave_votante):
+    return (orden_candidato << 48) | clave_votante
+
+# Conjunto de enteros: las claves cargadas de la base se guardan ordenadas en un array (8 bytes por clave)
+# y las que se agregan después en un set
+class conjunto_claves():
+
+    def __init__(self, claves=()):
+        self.base = array('q', sorted(claves))
+        self.agregadas = set()
+
+    def __contains__(self, x):
+        if x in self.agregadas:
+            return True
+        i = bisect_left(self.base, x)
+        return i < len(self.base) and self.base[i] == x
+
+    def agregar(self, x):
+        self.agregadas.add(x)
+
+    def __len__(self):
+        return len(self.base) + len(self.agregadas)
+
+# Operaciones que acepta el conjunto y los nombres de las claves contra las que se validan:
+# - candidatos: (sentencia de api.SENTENCIAS, personas que se pueden postular, candidatos)
+# - votos: (sentencia de api.SENTENCIAS, candidatos, votantes, votos)
+OPERACIONES = {
+    'crear_decano': ('insertar_decano', 'profesores', 'decanos'),
+    'crear_consejero_superior': ('insertar_consejero_superior', 'empadronados', 'consejeros_superiores'),
+    'crear_rector': ('insertar_rector', 'profesores', 'rectores'),
+    'registrar_voto_a_decano': ('insertar_voto_a_decano', 'decanos', 'consejeros_directivos', 'votos_a_decano'),
+    'registrar_voto_a_consejero_superior': ('insertar_voto_a_consejero_superior', 'consejeros_superiores',
+                                            'consejeros_directivos', 'votos_a_consejero_superior'),
+    'registrar_voto_de_consejero_directivo_a_rector': ('insertar_voto_de_consejero_directivo_a_rector', 'rectores',
+                                                       'consejeros_directivos', 'votos_de_consejero_directivo_a_rector'),
+    'registrar_voto_de_consejero_superior_a_rector': ('insertar_voto_de_consejero_superior_a_rector', 'rectores',
+                                                      'consejeros_superiores', 'votos_de_consejero_superior_a_rector'),
+    'registrar_voto_de_decano_a_rector': ('insertar_voto_de_decano_a_rector', 'rectores',
+                                          'decanos', 'votos_de_decano_a_rector'),
+}
+
+# Orden en que se envían: los candidatos antes que sus votos
+ORDEN_ENVIO = ('crear_decano', 'crear_consejero_superior', 'crear_rector',
+               'registrar_voto_a_decano', 'registrar_voto_a_consejero_superior',
+               'registrar_voto_de_consejero_directivo_a_rector', 'registrar_voto_de_consejero_superior_a_rector',
+               'registrar_voto_de_decano_a_rector')
+
+# Consultas que cargan las claves de la base: devuelven (dni, periodo) o (dni, periodo, dni, periodo)
+CLAVES = {
+    'empadronados': 'SELECT dni, 0 FROM empadronado',
+    'profesores': 'SELECT dni, 0 FROM profesor',
+    'consejeros_directivos': 'SELECT dni, periodo FROM consejero_directivo',
+    'decanos': 'SELECT dni, periodo FROM decano',
+    'consejeros_superiores': 'SELECT dni, periodo FROM consejero_superior',
+    'rectores': 'SELECT dni, periodo FROM rector',
+    'votos_a_decano': '''SELECT dni_decano, periodo_decano, dni_consejero_directivo, periodo_consejero_directivo
+                         FROM voto_a_decano''',
+    'votos_a_consejero_superior': '''SELECT dni_consejero_superior, periodo_consejero_superior,
+                                            dni_consejero_directivo, periodo_consejero_directivo
+                                     FROM voto_a_consejero_superior''',
+    'votos_de_consejero_directivo_a_rector': '''SELECT dni_rector, periodo_rector, dni_consejero_directivo, periodo_consejero_directivo
+                                                FROM rector_fue_votado_por_consejero_directivo''',
+    'votos_de_consejero_superior_a_rector': '''SELECT dni_rector, periodo_rector, dni_consejero_superior, periodo_consejero_superior
+                                               FROM rector_fue_votado_por_consejero_superior''',
+    'votos_de_decano_a_rector': '''SELECT dni_rector, periodo_rector, dni_decano, periodo_decano
+                                   FROM rector_fue_votado_por_decano''',
+}
+
+class model_escrutinio():
+
+    def __init__(self, model, ruta_journal, tamano=TAMANO_ESCRUTINIO, intervalo=INTERVALO_ESCRUTINIO,
+                 sincronizar=SINCRONIZAR_JOURNAL):
+        self.model = model
+        self.ruta_journal = ruta_journal
+        self.tamano = tamano
+        self.intervalo = intervalo
+        self.sincronizar = sincronizar
+        self.sin_sincronizar = 0
+        self.cargar_claves()
+        self.pendientes = dict((operacion, array('q')) for operacion in OPERACIONES)
+        self.cantidad_pendientes = 0
+        self.ultimo_envio = time.time()
+
+        # Volver a aplicar lo que quedó en el journal sin enviar. Lo que ya está en la base (porque el
+        # proceso se cayó después de enviarlo) se saltea; una última línea incompleta se descarta.
+        if os.path.exists(ruta_journal):
+            with open(ruta_journal) as f:
+                for linea in f:
+                    if not linea.endswith('\n'):
+                        break
+                    campos = linea.split()
+                    try:
+                        self.aceptar(campos[0], [int(c) for c in campos[1:]])
+                    except IntegrityError:
+                        pass
+        self.journal = open(ruta_journal, 'a')
+
+    def cargar_claves(self):
+        self.claves = {}
+        self.orden_candidatos = {}
+        for nombre, consulta in CLAVES.items():
+            filas = self.model.connector.iterar(consulta)
+            if nombre.startswith('votos_'):
+                self.claves[nombre] = conjunto_claves(clave_voto(self.orden(clave(f[0], f[1])), clave(f[2], f[3]))
+                                                      for f in filas)
+            else:
+                self.claves[nombre] = conjunto_claves(clave(f[0], f[1]) for f in filas)
+
+    # Número de orden del candidato con esa clave
+    def orden(self, clave_candidato):
+        if clave_candidato not in self.orden_candidatos and len(self.orden_candidatos) >= CANDIDATOS_MAXIMO:
+            raise ValueError('Demasiados candidatos: el máximo es %d' % CANDIDATOS_MAXIMO)
+        return self.orden_candidatos.setdefault(clave_candidato, len(self.orden_candidatos))
+
+    # Valida la operación contra las claves y la agrega a los pendientes
+    def aceptar(self, operacion, args):
+        if operacion not in OPERACIONES:
+            raise ValueError('Operación desconocida: %s' % operacion)
+        tipo = OPERACIONES[operacion]
+        if len(tipo) == 3:
+            # Candidato: (dni, periodo)
+            _, personas, candidatos = tipo
+            dni, periodo = args
+            if clave(dni, 0) not in self.claves[personas]:
+                raise IntegrityError('FOREIGN KEY constraint failed: %s (%d)' % (operacion, dni))
+            if clave(dni, periodo) in self.claves[candidatos]:
+                raise IntegrityError('UNIQUE constraint failed: %s (%d, %d)' % (operacion, dni, periodo))
+            self.claves[candidatos].agregar(clave(dni, periodo))
+        else:
+            # Voto: (dni_candidato, periodo_candidato, dni_votante, periodo_votante)
+            _, candidatos, votantes, votos = tipo
+            candidato = clave(args[0], args[1])
+            votante = clave(args[2], args[3])
+            if candidato not in self.claves[candidatos] or votante not in self.claves[votantes]:
+                raise IntegrityError('FOREIGN KEY constraint failed: %s %s' % (operacion, tuple(args)))
+            voto = clave_voto(self.orden(candidato), votante)
+            if voto in self.claves[votos]:
+                raise IntegrityError('UNIQUE constraint failed: %s %s' % (operacion, tuple(args)))
+            self.claves[votos].agregar(voto)
+        self.pendientes[operacion].extend(args)
+        self.cantidad_pendientes += 1
+
+    def registrar(self, operacion, *args):
+        self.aceptar(operacion, args)
+        self.journal.write('%s %s\n' % (operacion, ' '.join(str(a) for a in args)))
+        self.journal.flush()
+        self.sin_sincronizar += 1
+        if self.sin_sincronizar >= self.sincronizar:
+            self.sincronizar_journal()
+        self.enviar_si_corresponde()
+
+    def sincronizar_journal(self):
+        os.fsync(self.journal.fileno())
+        self.sin_sincronizar = 0
+
+    # Envía lo pendiente si se juntaron 'tamano' operaciones o pasaron 'intervalo' segundos desde el último
+    # envío. La llama registrar(); si las operaciones dejan de llegar, hay que llamarla (ver proximo_envio).
+    def enviar_si_corresponde(self):
+        if self.cantidad_pendientes >= self.tamano or time.time() - self.ultimo_envio >= self.intervalo:
+            self.enviar()
+
+    # Segundos que faltan para que venza el envío por tiempo de lo pendiente (0 si ya venció), o None si no
+    # hay nada pendiente: el plazo máximo para la próxima llamada a registrar() o enviar_si_corresponde()
+    def proximo_envio(self):
+        if self.cantidad_pendientes == 0:
+            return None
+        return max(0.0, self.ultimo_envio + self.intervalo - time.time())
+
+    # Escribe todos los pendientes en la base en una sola transacción y vacía el journal. Si falla, los
+    # pendientes y el journal quedan como estaban.
+    def enviar(self):
+        if self.cantidad_pendientes > 0:
+            with self.model.connector.transaction():
+                with self.model.connector as c:
+                    for operacion in ORDEN_ENVIO:
+                        valores = self.pendientes[operacion]
+                        if not valores:
+                            continue
+                        if operacion == 'crear_consejero_superior':
+                            filas = [(dni, periodo, self.model.obtener_claustro(dni))
+                                     for dni, periodo in zip(valores[0::2], valores[1::2])]
+                        elif len(OPERACIONES[operacion]) == 3:
+                            filas = zip(valores[0::2], valores[1::2])
+                        else:
+                            filas = zip(valores[0::4], valores[1::4], valores[2::4], valores[3::4])
+                        c.executemany(api.SENTENCIAS[OPERACIONES[operacion][0]], filas)
+            for valores in self.pendientes.values():
+                del valores[:]
+            self.cantidad_pendientes = 0
+            self.journal.truncate(0)
+            self.sin_sincronizar = 0
+        self.ultimo_envio = time.time()
+
+    # Envía lo pendiente y cierra el journal. Si el envío falla, el journal queda en el disco.
+    def cerrar(self):
+        if self.sin_sincronizar > 0:
+            self.sincronizar_journal()
+        self.enviar()
+        self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cerrar()
+
+def crear_metodo(nombre):
+    def metodo(self, *args):
+        self.registrar(nombre, *args)
+    metodo.__name__ = nombre
+    return metodo
+
+for nombre in OPERACIONES:
+    setattr(model_escrutinio, nombre, crear_metodo(nombre))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Creación de bases con el esquema de facultad.sql. El script se ejecuta una sola vez por proceso sobre
+# una base plantilla en memoria; las bases nuevas (en memoria o en disco) se crean copiando sus páginas
+# con la API de backup de SQLite, que es mucho más rápido que volver a interpretar el script.
+#
+# También detecta si una base existente quedó desactualizada respecto de facultad.sql: compara su
+# 'PRAGMA user_version' y sus tablas, índices y triggers con los de la plantilla.
+# Uso: python esquema.py [--crear] [ruta a la base]    (por defecto ../db/facultad.db)
+#   --crear    crea la base desde la plantilla (reemplazándola si ya existía)
+#   sin opciones muestra las diferencias con facultad.sql y termina con error si hay alguna
+
+import os
+import sqlite3
+import sys
+import threading
+
+import tp_api as api
+
+DIRECTORIO_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'db')
+ESQUEMA = os.path.join(DIRECTORIO_DB, 'facultad.sql')
+
+SENTENCIAS = {
+    'listar_objetos_esquema': '''SELECT type, name, sql FROM sqlite_master
+                                 WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ''',
+}
+
+# Restos del esquema original que las migraciones dejan a propósito en las bases viejas, como quedaron
+# (ya normalizados): la columna 'tipo' de consejero_superior (ver 007) y la tabla graduado_uba, que
+# facultad.sql ya no tiene pero puede tener datos. No cuentan como diferencias.
+TOLERADOS = {
+    ('table', 'consejero_superior'): 'CREATE TABLE consejero_superior ( dni INTEGER, periodo INTEGER, tipo INTEGER, '
+                                     'claustro INTEGER, PRIMARY KEY(dni, periodo), '
+                                     'FOREIGN KEY(dni) REFERENCES empadronado(dni) )',
+    ('table', 'graduado_uba'): 'CREATE TABLE graduado_uba ( dni INTEGER, PRIMARY KEY(dni), '
+                               'FOREIGN KEY(dni) REFERENCES graduado(dni) ON DELETE CASCADE )',
+}
+
+PLANTILLA = None
+LOCK_PLANTILLA = threading.Lock()
+
+# Conexión a la base plantilla, que se crea la primera vez que se pide. Las copias se hacen con el lock
+# tomado, así que se puede usar desde varios hilos.
+def plantilla():
+    global PLANTILLA
+    with LOCK_PLANTILLA:
+        if PLANTILLA is None:
+            conn = sqlite3.connect(':memory:', check_same_thread=False)
+            with open(ESQUEMA) as f:
+                conn.executescript(f.read())
+            PLANTILLA = conn
+        return PLANTILLA
+
+# Copia la plantilla en la base de 'conn', reemplazando todo su contenido
+def clonar(conn):
+    base = plantilla()
+    with LOCK_PLANTILLA:
+        base.backup(conn)
+
+# Crea una base nueva con el esquema y devuelve un bd_connector conectado a ella. Si 'bd' es un archivo
+# que ya existía, su contenido se reemplaza.
+def crear_base(bd=':memory:', perfil=api.PERFIL_ONLINE):
+    connector = api.bd_connector()
+    connector.connect(bd=bd, perfil=perfil)
+    clonar(connector.conn)
+    return connector
+
+def version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+# SQL de cada tabla, índice y trigger, sin espacios de más ni comillas en los nombres (SQLite reescribe
+# las comillas al renombrar una tabla)
+def objetos(conn):
+    return dict(((tipo, nombre), ' '.join(sql.replace('`', '').replace('"', '').split())) for tipo, nombre, sql
+                in conn.execute(SENTENCIAS['listar_objetos_esquema']))
+
+# Diferencias entre el esquema de la base y el de facultad.sql, como tuplas (objeto, en la base, en
+# facultad.sql); uno de los lados es None si el objeto falta de ese lado. La versión figura como el
+# objeto ('version', 'user_version'). Los objetos de TOLERADOS no se informan.
+def diferencias(conn):
+    base = plantilla()
+    with LOCK_PLANTILLA:
+        esperados = objetos(base)
+        version_esperada = version(base)
+    encontrados = objetos(conn)
+    resultado = []
+    if version(conn) != version_esperada:
+        resultado.append((('version', 'user_version'), version(conn), version_esperada))
+    for objeto in sorted(set(encontrados) | set(esperados)):
+        encontrado = encontrados.get(objeto)
+        if encontrado != esperados.get(objeto) and (encontrado is None or encontrado != TOLERADOS.get(objeto)):
+            resultado.append((objeto, encontrado, esperados.get(objeto)))
+    return resultado
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    crear = '--crear' in argumentos
+    argumentos = [a for a in argumentos if a != '--crear']
+    bd = argumentos[0] if argumentos else os.path.join(DIRECTORIO_DB, 'facultad.db')
+    if crear:
+        crear_base(bd).cerrar()
+        print('%s creada en la versión %d' % (bd, version(plantilla())))
+        sys.exit(0)
+    conn = sqlite3.connect(bd)
+    resultado = diferencias(conn)
+    for (tipo, nombre), encontrado, esperado in resultado:
+        print('%s %s:\n  en la base:     %s\n  en facultad.sql: %s' % (tipo, nombre, encontrado, esperado))
+    if not resultado:
+        print('%s coincide con facultad.sql' % bd)
+    conn.close()
+    sys.exit(1 if resultado else 0)
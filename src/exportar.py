@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Exportación de las tablas de la base para los reportes. Cada tabla se lee de a bloques con un
+# bd_connector_lectura (una instantánea de la base que no frena a los escritores) y cada bloque se escribe
+# apenas se lee, así que la memoria usada no depende del tamaño de la tabla. Las tablas se exportan en
+# paralelo, cada una en un proceso del pool y con su propia instantánea.
+#
+# Formatos: CSV comprimido con gzip ('csv.gz') y, si PyArrow está instalado, Arrow IPC ('arrow') y
+# Parquet ('parquet'), con un record batch por bloque.
+#
+# Exportación incremental: con un archivo de estado, de las tablas de datos (TABLAS) sólo se exportan
+# las filas insertadas o modificadas desde la corrida anterior, que los triggers de cada tabla registran
+# en exportacion_modificadas con una secuencia creciente; el estado guarda la última secuencia exportada
+# de cada tabla. Los cambios van a un archivo aparte, <tabla>.<secuencia>.<formato>, para no pisar la
+# exportación completa ni los cambios anteriores. Las tablas de resumen (resumenes.RESUMENES) son chicas
+# y se exportan siempre completas. Después de guardar el estado se borran del registro las entradas que
+# ya exportaron todas sus tablas, así que cada base admite un solo archivo de estado. Las filas borradas
+# no se informan, y después de una migración que reescriba una tabla (sus filas cambian de rowid) hay
+# que volver a exportarla completa.
+# Uso: python exportar.py [opciones] directorio [tabla ...]    (sin tablas exporta todas)
+#   --bd RUTA        base a exportar, en modo WAL (por defecto ../db/facultad.db)
+#   --formato F      csv.gz, arrow o parquet; se puede repetir (por defecto csv.gz)
+#   --estado RUTA    exporta sólo lo que cambió desde el estado guardado en RUTA (JSON) y lo actualiza
+#   -j N             cantidad de procesos (por defecto, uno por CPU)
+
+import argparse
+import concurrent.futures
+import csv
+import gzip
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+import resumenes
+import tp_api as api
+
+DIRECTORIO_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'db')
+
+# Filas que se leen y se escriben por vez
+TAMANO_BLOQUE_EXPORTACION = 10000
+
+FORMATO_CSV     = 'csv.gz'
+FORMATO_ARROW   = 'arrow'
+FORMATO_PARQUET = 'parquet'
+FORMATOS = (FORMATO_CSV, FORMATO_ARROW, FORMATO_PARQUET)
+
+# Tablas de datos; todas tienen los triggers que registran sus filas insertadas y modificadas
+TABLAS = (
+    'facultad', 'empadronado', 'estudiante', 'graduado', 'graduado_otra_universidad', 'profesor',
+    'calendario_electoral', 'agrupacion_politica', 'agrupacion_politica_se_presenta_durante_calendario_electoral',
+    'consejero_directivo', 'decano', 'voto_a_decano', 'consejero_superior', 'voto_a_consejero_superior', 'rector',
+    'rector_fue_votado_por_consejero_directivo', 'rector_fue_votado_por_decano',
+    'rector_fue_votado_por_consejero_superior', 'afiliado', 'candidato_a_consejero',
+)
+EXPORTABLES = TABLAS + tuple(sorted(resumenes.RESUMENES))
+
+SENTENCIAS = {
+    'columnas_tabla': 'PRAGMA table_info(%s)',
+    'ultima_modificacion': 'SELECT MAX(secuencia) FROM exportacion_modificadas',
+    'podar_modificadas': '''DELETE FROM exportacion_modificadas
+                            WHERE secuencia IN (SELECT secuencia FROM exportacion_modificadas
+                                                WHERE secuencia < ? ORDER BY secuencia LIMIT ?)''',
+    'exportar_tabla': 'SELECT %s FROM %s ORDER BY rowid',
+    'exportar_filas_modificadas': '''SELECT %s FROM %s
+                                     WHERE rowid IN (SELECT fila FROM exportacion_modificadas
+                                                     WHERE tabla = ? AND secuencia > ?)
+                                     ORDER BY rowid''',
+}
+
+# Tipos de Arrow de cada tipo de columna de SQLite; las columnas de otros tipos se exportan como texto
+TIPOS_ARROW = {
+    'INTEGER': 'int64',
+    'REAL': 'float64',
+    'TEXT': 'string',
+    'BLOB': 'binary',
+}
+
+def formatos_disponibles():
+    return FORMATOS if pa is not None else (FORMATO_CSV,)
+
+################################################################################
+# Escritores                                                                   #
+################################################################################
+
+# Cada escritor recibe la ruta y las columnas (nombre, tipo de SQLite) y después los bloques de filas
+
+class escritor_csv():
+
+    def __init__(self, ruta, columnas):
+        self.archivo = gzip.open(ruta, 'wt', newline='', encoding='utf-8')
+        self.escritor = csv.writer(self.archivo)
+        self.escritor.writerow([nombre for nombre, _ in columnas])
+
+    def escribir(self, filas):
+        self.escritor.writerows(filas)
+
+    def cerrar(self):
+        self.archivo.close()
+
+def esquema_arrow(columnas):
+    return pa.schema([(nombre, getattr(pa, TIPOS_ARROW.get(tipo.upper(), 'string'))()) for nombre, tipo in columnas])
+
+def bloque_arrow(esquema, filas):
+    valores = list(zip(*filas))
+    return pa.RecordBatch.from_arrays([pa.array(valores[i], type=campo.type) for i, campo in enumerate(esquema)],
+                                      schema=esquema)
+
+class escritor_arrow():
+
+    def __init__(self, ruta, columnas):
+        self.esquema = esquema_arrow(columnas)
+        self.escritor = pa.ipc.new_file(ruta, self.esquema)
+
+    def escribir(self, filas):
+        self.escritor.write_batch(bloque_arrow(self.esquema, filas))
+
+    def cerrar(self):
+        self.escritor.close()
+
+class escritor_parquet():
+
+    def __init__(self, ruta, columnas):
+        self.esquema = esquema_arrow(columnas)
+        self.escritor = pq.ParquetWriter(ruta, self.esquema)
+
+    def escribir(self, filas):
+        self.escritor.write_table(pa.Table.from_batches([bloque_arrow(self.esquema, filas)]))
+
+    def cerrar(self):
+        self.escritor.close()
+
+ESCRITORES = {
+    FORMATO_CSV: escritor_csv,
+    FORMATO_ARROW: escritor_arrow,
+    FORMATO_PARQUET: escritor_parquet,
+}
+
+# Ruta de la exportación completa de la tabla o, con 'secuencia', la de sus cambios hasta esa secuencia
+def ruta_exportacion(directorio, tabla, formato, secuencia=None):
+    if secuencia is not None:
+        return os.path.join(directorio, '%s.%d.%s' % (tabla, secuencia, formato))
+    return os.path.join(directorio, '%s.%s' % (tabla, formato))
+
+################################################################################
+# Exportación                                                                  #
+################################################################################
+
+def validar(tablas, formatos):
+    for tabla in tablas:
+        if tabla not in EXPORTABLES:
+            raise ValueError('Tabla desconocida: %s' % tabla)
+    for formato in formatos:
+        if formato not in formatos_disponibles():
+            raise ValueError('Formato no disponible: %s (arrow y parquet necesitan pyarrow)' % formato)
+
+# Exporta las tablas (por defecto, todas) a 'directorio' en cada uno de los formatos, en un pool de
+# 'procesos' procesos. Con 'estado' la exportación es incremental respecto de la anterior que usó el
+# mismo archivo (la primera es completa). Devuelve un dict tabla -> filas exportadas.
+def exportar(bd, directorio, tablas=None, formatos=(FORMATO_CSV,), estado=None, procesos=None,
+             tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    tablas = list(tablas or EXPORTABLES)
+    validar(tablas, formatos)
+    marcas = leer_estado(estado)
+    with concurrent.futures.ProcessPoolExecutor(procesos) as pool:
+        futuros = dict((tabla, pool.submit(exportar_tabla, bd, tabla, directorio, formatos, marcas.get(tabla),
+                                           tamano_bloque))
+                       for tabla in tablas)
+        resultados = dict((tabla, futuro.result()) for tabla, futuro in futuros.items())
+    if estado is not None:
+        for tabla, (_, marca) in resultados.items():
+            if marca is not None:
+                marcas[tabla] = marca
+        guardar_estado(estado, marcas)
+        podar_registro(bd, marcas, tamano_bloque)
+    return dict((tabla, filas) for tabla, (filas, _) in resultados.items())
+
+# El estado guarda, por tabla, la marca de su última exportación: la última secuencia de
+# exportacion_modificadas que incluyó
+def leer_estado(ruta):
+    if ruta is None or not os.path.exists(ruta):
+        return {}
+    with open(ruta) as f:
+        return json.load(f)
+
+def guardar_estado(ruta, marcas):
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w') as f:
+        json.dump(marcas, f, indent=2, sort_keys=True)
+    os.replace(temporal, ruta)
+
+# Borra del registro de cambios las entradas anteriores a la marca más vieja del estado, que ya no le
+# sirven a ninguna exportación incremental, de a 'tamano_bloque' por transacción para no frenar a los
+# que escriben. Ninguna marca supera la última secuencia, así que la última entrada nunca se borra y la
+# secuencia no vuelve a empezar. Las tablas sin marca se exportan completas la próxima vez: no cuentan.
+def podar_registro(bd, marcas, tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    exportadas = [marcas[tabla] for tabla in TABLAS if tabla in marcas]
+    if not exportadas:
+        return
+    connector = api.bd_connector()
+    connector.connect(bd=bd)
+    try:
+        borradas = tamano_bloque
+        while borradas == tamano_bloque:
+            with connector as c:
+                c.execute(SENTENCIAS['podar_modificadas'], (min(exportadas), tamano_bloque))
+                borradas = c.rowcount
+    finally:
+        connector.cerrar()
+
+################################################################################
+# Funciones que corren en los procesos del pool                                #
+################################################################################
+
+# Exporta una tabla en cada formato y devuelve (filas exportadas, marca). Con la 'marca' de la exportación
+# anterior (sólo para las tablas de datos) exporta sólo las filas insertadas o modificadas después, en los
+# archivos de la nueva marca. Los archivos se escriben con otro nombre y se renombran al final, así nunca
+# queda uno a medio escribir.
+def exportar_tabla(bd, tabla, directorio, formatos=(FORMATO_CSV,), marca=None, tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    connector = api.bd_connector_lectura()
+    connector.connect(bd=bd)
+    try:
+        with connector.transaction():
+            with connector as c:
+                c.execute(SENTENCIAS['columnas_tabla'] % tabla)
+                columnas = [(fila[1], fila[2]) for fila in c.fetchall()]
+            lista = ', '.join(nombre for nombre, _ in columnas)
+
+            nueva_marca = secuencia = None
+            consulta, parametros = SENTENCIAS['exportar_tabla'] % (lista, tabla), ()
+            if tabla in TABLAS:
+                nueva_marca = leer_marca(connector)
+                if marca is not None:
+                    consulta, parametros = SENTENCIAS['exportar_filas_modificadas'] % (lista, tabla), (tabla, marca)
+                    secuencia = nueva_marca
+
+            rutas = [ruta_exportacion(directorio, tabla, formato, secuencia) for formato in formatos]
+            escritores = [ESCRITORES[formato](ruta + '.tmp', columnas) for formato, ruta in zip(formatos, rutas)]
+            filas = 0
+            try:
+                bloque = []
+                for fila in connector.iterar(consulta, parametros, tamano_bloque):
+                    bloque.append(fila)
+                    if len(bloque) >= tamano_bloque:
+                        filas += escribir(escritores, bloque)
+                        bloque = []
+                if bloque:
+                    filas += escribir(escritores, bloque)
+            finally:
+                for escritor in escritores:
+                    escritor.cerrar()
+            for ruta in rutas:
+                os.replace(ruta + '.tmp', ruta)
+    finally:
+        connector.cerrar()
+    return filas, nueva_marca
+
+def escribir(escritores, bloque):
+    for escritor in escritores:
+        escritor.escribir(bloque)
+    return len(bloque)
+
+# Marca de la instantánea actual: la última secuencia registrada
+def leer_marca(connector):
+    with connector as c:
+        c.execute(SENTENCIAS['ultima_modificacion'])
+        secuencia = c.fetchone()[0]
+    return secuencia if secuencia is not None else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exporta las tablas de la base.')
+    parser.add_argument('directorio')
+    parser.add_argument('tablas', nargs='*')
+    parser.add_argument('--bd', default=os.path.join(DIRECTORIO_DB, 'facultad.db'))
+    parser.add_argument('--formato', action='append', dest='formatos')
+    parser.add_argument('--estado')
+    parser.add_argument('-j', dest='procesos', type=int)
+    args = parser.parse_args()
+    if not os.path.exists(args.bd):
+        parser.error('No existe la base %s' % args.bd)
+
+    # Abrir la base con un perfil la deja en modo WAL, que necesita bd_connector_lectura
+    connector = api.bd_connector()
+    connector.connect(bd=args.bd)
+    connector.cerrar()
+    os.makedirs(args.directorio, exist_ok=True)
+    resultado = exportar(args.bd, args.directorio, args.tablas, args.formatos or (FORMATO_CSV,), args.estado,
+                         args.procesos)
+    for tabla in sorted(resultado):
+        print('%s: %d filas' % (tabla, resultado[tabla]))
@@ -0,0 +1,204 @@
+# coding: utf-8
+
+# Instrumentación opcional de bd_connector. Se habilita con connector.instrumentar(instrumentacion(...));
+# mientras no se habilite el conector sólo paga una comparación por bloque y por commit.
+#
+# Por cada sentencia se guarda cuántas veces se ejecutó, cuántas filas afectó o devolvió y un histograma
+# de latencias. También se miden los commits. Las sentencias que tardan más que 'umbral_lento' se informan
+# junto con su EXPLAIN QUERY PLAN. Cada medición se envía además como evento (un dict) a los sumideros.
+
+import json
+import logging
+import math
+import threading
+import time
+
+import tp_api as api
+
+# Segundos a partir de los cuales una sentencia se considera lenta
+UMBRAL_LENTO = 0.1
+
+# Cantidad de baldes del histograma: el balde i cuenta las latencias menores a 2^i microsegundos
+BALDES_HISTOGRAMA = 24
+
+# Nombre con que figura cada sentencia del registro en las estadísticas
+NOMBRES_SENTENCIAS = dict((query, nombre) for nombre, query in api.SENTENCIAS.items())
+
+def nombre_sentencia(query):
+    return NOMBRES_SENTENCIAS.get(query, ' '.join(query.split()))
+
+# Estadísticas acumuladas de una sentencia
+class estadistica():
+
+    def __init__(self):
+        self.cantidad = 0
+        self.filas = 0
+        self.segundos = 0.0
+        self.histograma = [0] * BALDES_HISTOGRAMA
+
+    def registrar(self, segundos, filas):
+        self.cantidad += 1
+        self.filas += max(filas, 0)
+        self.segundos += segundos
+        balde = int(math.log(segundos * 1e6, 2)) + 1 if segundos * 1e6 >= 1 else 0
+        self.histograma[min(balde, BALDES_HISTOGRAMA - 1)] += 1
+
+    # Latencia (en segundos) por debajo de la cual está la fracción 'p' de las ejecuciones
+    def percentil(self, p):
+        acumulado = 0
+        for balde, cantidad in enumerate(self.histograma):
+            acumulado += cantidad
+            if acumulado >= p * self.cantidad:
+                return 2 ** balde / 1e6
+        return float('inf')
+
+class instrumentacion():
+
+    def __init__(self, sumideros=(), umbral_lento=UMBRAL_LENTO):
+        self.sumideros = list(sumideros)
+        self.umbral_lento = umbral_lento
+        self.lock = threading.Lock()
+        self.sentencias = {}
+        self.commits = estadistica()
+
+    def consulta(self, conn, query, parameters, segundos, filas):
+        nombre = nombre_sentencia(query)
+        with self.lock:
+            self.sentencias.setdefault(nombre, estadistica()).registrar(segundos, filas)
+        self.emitir({'tipo': 'consulta', 'sentencia': nombre, 'segundos': segundos, 'filas': filas})
+        if segundos >= self.umbral_lento:
+            self.emitir({'tipo': 'consulta_lenta', 'sentencia': nombre, 'segundos': segundos,
+                         'plan': plan_de_ejecucion(conn, query, parameters)})
+
+    def commit(self, segundos):
+        with self.lock:
+            self.commits.registrar(segundos, 0)
+        self.emitir({'tipo': 'commit', 'segundos': segundos})
+
+    # Devuelve un cursor que mide lo que ejecuta 'cursor'
+    def envolver(self, cursor, conn):
+        return cursor_instrumentado(cursor, self, conn)
+
+    # Filas leídas con fetch* después de ejecutar la sentencia ('query' es None si no se ejecutó ninguna)
+    def filas_leidas(self, query, filas):
+        if query is None:
+            return
+        with self.lock:
+            self.sentencias[nombre_sentencia(query)].filas += filas
+
+    def emitir(self, evento):
+        for sumidero in self.sumideros:
+            sumidero.registrar(evento)
+
+    # Resumen de las estadísticas por sentencia, de la más costosa a la más barata
+    def resumen(self):
+        with self.lock:
+            filas = [(nombre, e.cantidad, e.filas, e.segundos, e.percentil(0.5), e.percentil(0.99))
+                     for nombre, e in self.sentencias.items()]
+        return sorted(filas, key=lambda f: -f[3])
+
+def plan_de_ejecucion(conn, query, parameters):
+    try:
+        return [fila[-1] for fila in conn.execute('EXPLAIN QUERY PLAN ' + query, parameters)]
+    except Exception as e:
+        return ['(no se pudo obtener el plan: %s)' % e]
+
+# Cursor que mide lo que ejecuta. Delega todo lo demás en el cursor de SQLite.
+class cursor_instrumentado():
+
+    def __init__(self, cursor, instrumentacion, conn):
+        self.cursor = cursor
+        self.instrumentacion = instrumentacion
+        self.conn = conn
+        self.query = None
+
+    def execute(self, query, parameters=()):
+        inicio = time.perf_counter()
+        self.cursor.execute(query, parameters)
+        self.query = query
+        self.instrumentacion.consulta(self.conn, query, parameters, time.perf_counter() - inicio,
+                                      self.cursor.rowcount)
+        return self
+
+    # Los parámetros se pasan a SQLite a medida que se generan, sin juntarlos en una lista; se cuentan y se
+    # guardan los primeros para el plan de ejecución
+    def executemany(self, query, seq_of_parameters):
+        primeros = []
+        cantidad = [0]
+        def recorrer():
+            for parametros in seq_of_parameters:
+                if not primeros:
+                    primeros.append(parametros)
+                cantidad[0] += 1
+                yield parametros
+        inicio = time.perf_counter()
+        self.cursor.executemany(query, recorrer())
+        self.query = query
+        filas = self.cursor.rowcount if self.cursor.rowcount >= 0 else cantidad[0]
+        self.instrumentacion.consulta(self.conn, query, primeros[0] if primeros else (),
+                                      time.perf_counter() - inicio, filas)
+        return self
+
+    def fetchone(self):
+        fila = self.cursor.fetchone()
+        if fila is not None:
+            self.instrumentacion.filas_leidas(self.query, 1)
+        return fila
+
+    def fetchmany(self, size=None):
+        filas = self.cursor.fetchmany(self.cursor.arraysize if size is None else size)
+        self.instrumentacion.filas_leidas(self.query, len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = self.cursor.fetchall()
+        self.instrumentacion.filas_leidas(self.query, len(filas))
+        return filas
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, nombre):
+        return getattr(self.cursor, nombre)
+
+################################################################################
+# Sumideros                                                                    #
+################################################################################
+
+# Guarda los eventos en una lista
+class sumidero_memoria():
+
+    def __init__(self):
+        self.eventos = []
+
+    def registrar(self, evento):
+        self.eventos.append(evento)
+
+# Envía los eventos al logger 'tp_api'; las consultas lentas como WARNING y el resto como DEBUG
+class sumidero_log():
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger('tp_api')
+
+    def registrar(self, evento):
+        if evento['tipo'] == 'consulta_lenta':
+            self.logger.warning('Consulta lenta (%.3f s): %s\n  %s', evento['segundos'], evento['sentencia'],
+                                '\n  '.join(evento['plan']))
+        else:
+            self.logger.debug('%s', evento)
+
+# Agrega cada evento como una línea JSON al final de un archivo
+class sumidero_jsonl():
+
+    def __init__(self, ruta):
+        self.archivo = open(ruta, 'a')
+        self.lock = threading.Lock()
+
+    def registrar(self, evento):
+        linea = json.dumps(evento)
+        with self.lock:
+            self.archivo.write(linea + '\n')
+            self.archivo.flush()
+
+    def cerrar(self):
+        self.archivo.close()
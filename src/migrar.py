@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Aplica a una base existente las migraciones de db/migraciones que todavía no tenga. La versión de
+# cada base se guarda en 'PRAGMA user_version'; facultad.sql deja las bases nuevas en la última versión.
+# Cada migración es un script NNN_descripcion.sql o un módulo NNN_descripcion.py con una función
+# migrar(conn), para los cambios que dependen del estado de la base.
+#
+# Los módulos pueden definir además por_tramos(conn, tramos) para los cambios que recorren tablas enteras
+# (rellenar una columna nueva, reescribir una tabla): se ejecuta después de migrar(conn) y antes de
+# actualizar la versión, de a TAMANO_TRAMO filas por transacción, así la API puede seguir escribiendo
+# entre tramo y tramo y nunca hay una transacción larga. Si se interrumpe, la migración vuelve a
+# ejecutarse entera la próxima vez, así que migrar(conn) y por_tramos(conn, tramos) tienen que poder
+# repetirse: los métodos de 'tramos' retoman donde quedaron.
+# Uso: python migrar.py [ruta a la base]    (por defecto ../db/facultad.db)
+
+import importlib.util
+import os
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+from sqlite3 import IntegrityError
+
+DIRECTORIO_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'db')
+DIRECTORIO_MIGRACIONES = os.path.join(DIRECTORIO_DB, 'migraciones')
+
+# Filas que se rellenan o se pasan a la tabla nueva en cada transacción de por_tramos
+TAMANO_TRAMO = 10000
+
+# Menor rowid posible en SQLite
+ROWID_MINIMO = -2 ** 63
+
+SENTENCIAS = {
+    'existe_tabla': "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+    'listar_objetos_tabla': '''SELECT type, name, sql FROM sqlite_master
+                               WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL''',
+    # Índices y triggers de las tablas que se están reescribiendo, por si la reescritura se interrumpe
+    'crear_objetos_reescritura': '''CREATE TABLE IF NOT EXISTS migracion_objetos_reescritura (
+                                        tabla TEXT, tipo TEXT, sql TEXT)''',
+    'guardar_objeto_reescritura': 'INSERT INTO migracion_objetos_reescritura (tabla, tipo, sql) VALUES (?, ?, ?)',
+    'listar_triggers_reescritura': '''SELECT sql FROM migracion_objetos_reescritura
+                                      WHERE tabla = ? AND tipo = 'trigger' ORDER BY rowid''',
+    'borrar_objetos_reescritura': 'DELETE FROM migracion_objetos_reescritura WHERE tabla = ?',
+    'contar_objetos_reescritura': 'SELECT COUNT(*) FROM migracion_objetos_reescritura',
+}
+
+# Devuelve la lista ordenada de pares (version, ruta) de los archivos de migración
+def migraciones_disponibles():
+    migraciones = []
+    for archivo in os.listdir(DIRECTORIO_MIGRACIONES):
+        m = re.match(r'^(\d+)_.*\.(sql|py)$', archivo)
+        if m:
+            migraciones.append((int(m.group(1)), os.path.join(DIRECTORIO_MIGRACIONES, archivo)))
+    return sorted(migraciones)
+
+def version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+# Aplica las migraciones pendientes, cada una en su propia transacción, y devuelve las versiones aplicadas.
+# 'progreso', si se indica, se llama después de cada tramo con (descripción, filas hechas, total).
+def migrar(conn, tamano_tramo=TAMANO_TRAMO, progreso=None):
+    aplicadas = []
+    for numero, ruta in migraciones_disponibles():
+        if numero <= version(conn):
+            continue
+        try:
+            if ruta.endswith('.sql'):
+                with open(ruta) as f:
+                    script = f.read()
+                conn.executescript('BEGIN;\n%s\nPRAGMA user_version = %d;\nCOMMIT;' % (script, numero))
+            else:
+                modulo = cargar_modulo(ruta)
+                conn.execute('BEGIN')
+                modulo.migrar(conn)
+                if hasattr(modulo, 'por_tramos'):
+                    conn.commit()
+                    modulo.por_tramos(conn, tramos(conn, numero, tamano_tramo, progreso))
+                    conn.execute('BEGIN')
+                conn.execute('PRAGMA user_version = %d' % numero)
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        aplicadas.append(numero)
+    return aplicadas
+
+# Cada tramo toma el lock de escritura al empezar, así lo que lee no cambia antes de que escriba
+@contextmanager
+def transaccion(conn):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+# Operaciones sobre tablas enteras que se hacen de a 'tamano' filas por transacción
+class tramos():
+
+    def __init__(self, conn, numero, tamano=TAMANO_TRAMO, progreso=None):
+        self.conn = conn
+        self.numero = numero
+        self.tamano = tamano
+        self.progreso = progreso
+
+    def informar(self, descripcion, hechas, total):
+        if self.progreso is not None:
+            self.progreso('%03d %s' % (self.numero, descripcion), hechas, total)
+
+    # UPDATE tabla SET asignaciones WHERE condicion, recorriendo la tabla en orden de rowid. Los
+    # 'parametros' son los de la condición. Devuelve la cantidad de filas actualizadas.
+    def rellenar(self, tabla, asignaciones, condicion='1', parametros=()):
+        conn = self.conn
+        total = conn.execute('SELECT COUNT(*) FROM %s WHERE %s' % (tabla, condicion), parametros).fetchone()[0]
+        hechas = 0
+        ultimo = ROWID_MINIMO
+        while True:
+            with transaccion(conn):
+                hasta = conn.execute('SELECT MAX(rowid) FROM (SELECT rowid FROM %s WHERE rowid > ? AND (%s) '
+                                     'ORDER BY rowid LIMIT ?)' % (tabla, condicion),
+                                     (ultimo,) + tuple(parametros) + (self.tamano,)).fetchone()[0]
+                if hasta is None:
+                    break
+                hechas += conn.execute('UPDATE %s SET %s WHERE rowid > ? AND rowid <= ? AND (%s)'
+                                       % (tabla, asignaciones, condicion),
+                                       (ultimo, hasta) + tuple(parametros)).rowcount
+            ultimo = hasta
+            self.informar('%s: %s' % (tabla, asignaciones), hechas, total)
+        return hechas
+
+    # Reemplaza la tabla por una nueva creada con 'sql' (un CREATE TABLE con el mismo nombre), copiando las
+    # columnas que tienen en común. Mientras dura, la tabla vieja sigue completa y con sus triggers, así
+    # la API puede leerla y escribirla; unos triggers de la migración repiten en la tabla nueva cada
+    # cambio que se hace en la vieja (buscando las filas por la clave primaria de la nueva, que tiene que
+    # tenerla), y las filas se copian de a tramos salteando las que ya están. Una inserción que repite la
+    # clave de una fila ya copiada falla en el momento, no al copiarla. Al final, en una sola transacción,
+    # se borra la tabla vieja, se renombra la nueva y se vuelven a crear los triggers. El archivo tiene
+    # las dos copias de la tabla mientras dura. Los índices se pasan a la tabla nueva desde el principio,
+    # para no tener que crearlos con el lock tomado al final.
+    def reescribir(self, tabla, sql):
+        conn = self.conn
+        nueva = tabla + '_nueva'
+        claves_foraneas = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+        conn.execute('PRAGMA foreign_keys = OFF')
+        try:
+            if not existe(conn, nueva):
+                with transaccion(conn):
+                    conn.execute(SENTENCIAS['crear_objetos_reescritura'])
+                    conn.execute(renombrar_tabla(sql, 'CREATE TABLE', tabla, nueva))
+                    for tipo, nombre, sql_objeto in conn.execute(SENTENCIAS['listar_objetos_tabla'], (tabla,)).fetchall():
+                        conn.execute(SENTENCIAS['guardar_objeto_reescritura'], (tabla, tipo, sql_objeto))
+                        if tipo == 'index':
+                            conn.execute('DROP INDEX %s' % nombre)
+                            conn.execute(renombrar_tabla(sql_objeto, 'ON', tabla, nueva))
+                    for sql_trigger in triggers_sincronizacion(conn, tabla, nueva):
+                        conn.execute(sql_trigger)
+
+            columnas = [c for c in columnas_tabla(conn, tabla) if c in columnas_tabla(conn, nueva)]
+            total = conn.execute('SELECT COUNT(*) FROM %s' % tabla).fetchone()[0]
+            hechas = conn.execute('SELECT COUNT(*) FROM %s' % nueva).fetchone()[0]
+            ultimo = ROWID_MINIMO
+            while True:
+                with transaccion(conn):
+                    hasta = conn.execute('SELECT MAX(rowid) FROM (SELECT rowid FROM %s WHERE rowid > ? '
+                                         'ORDER BY rowid LIMIT ?)' % tabla, (ultimo, self.tamano)).fetchone()[0]
+                    if hasta is None:
+                        break
+                    hechas += conn.execute('INSERT INTO %s (%s) SELECT %s FROM %s WHERE rowid > ? AND rowid <= ? '
+                                           'AND NOT EXISTS (SELECT 1 FROM %s WHERE %s) ORDER BY rowid'
+                                           % (nueva, ', '.join(columnas),
+                                              ', '.join('%s.%s' % (tabla, c) for c in columnas), tabla, nueva,
+                                              misma_clave(conn, nueva, nueva, tabla)),
+                                           (ultimo, hasta)).rowcount
+                ultimo = hasta
+                self.informar('%s: reescritura' % tabla, hechas, total)
+
+            with transaccion(conn):
+                if conn.execute('PRAGMA foreign_key_check(%s)' % nueva).fetchone() is not None:
+                    raise IntegrityError('FOREIGN KEY constraint failed: %s' % tabla)
+                conn.execute('DROP TABLE %s' % tabla)
+                conn.execute('PRAGMA legacy_alter_table = ON')
+                conn.execute('ALTER TABLE %s RENAME TO %s' % (nueva, tabla))
+                conn.execute('PRAGMA legacy_alter_table = OFF')
+                for (sql_objeto,) in conn.execute(SENTENCIAS['listar_triggers_reescritura'], (tabla,)).fetchall():
+                    conn.execute(sql_objeto)
+                conn.execute(SENTENCIAS['borrar_objetos_reescritura'], (tabla,))
+                if conn.execute(SENTENCIAS['contar_objetos_reescritura']).fetchone()[0] == 0:
+                    conn.execute('DROP TABLE migracion_objetos_reescritura')
+        finally:
+            conn.execute('PRAGMA foreign_keys = %d' % claves_foraneas)
+
+# Triggers que repiten en 'nueva' las inserciones, modificaciones y borrados de 'tabla' mientras se
+# reescribe. Se borran solos con la tabla vieja.
+def triggers_sincronizacion(conn, tabla, nueva):
+    columnas = [c for c in columnas_tabla(conn, tabla) if c in columnas_tabla(conn, nueva)]
+    insertar = 'INSERT INTO %s (%s) VALUES (%s);' % (nueva, ', '.join(columnas), ', '.join('NEW.' + c for c in columnas))
+    borrar = 'DELETE FROM %s WHERE %s;' % (nueva, misma_clave(conn, nueva, nueva, 'OLD'))
+    return ['CREATE TRIGGER migracion_%s_insertar AFTER INSERT ON %s BEGIN %s END' % (tabla, tabla, insertar),
+            'CREATE TRIGGER migracion_%s_modificar AFTER UPDATE ON %s BEGIN %s %s END' % (tabla, tabla, borrar, insertar),
+            'CREATE TRIGGER migracion_%s_borrar AFTER DELETE ON %s BEGIN %s END' % (tabla, tabla, borrar)]
+
+# Condición que compara la clave primaria de 'nueva' entre las filas 'a' y 'b' (nombres de tabla o OLD/NEW)
+def misma_clave(conn, nueva, a, b):
+    clave = [fila[1] for fila in sorted(conn.execute('PRAGMA table_info(%s)' % nueva), key=lambda f: f[5]) if fila[5] > 0]
+    if not clave:
+        raise ValueError('La tabla %s no tiene clave primaria' % nueva)
+    return ' AND '.join('%s.%s = %s.%s' % (a, c, b, c) for c in clave)
+
+def existe(conn, tabla):
+    return conn.execute(SENTENCIAS['existe_tabla'], (tabla,)).fetchone() is not None
+
+def columnas_tabla(conn, tabla):
+    return [fila[1] for fila in conn.execute('PRAGMA table_info(%s)' % tabla)]
+
+# Reemplaza en un CREATE el nombre de la tabla que sigue a 'antes' (ej.: 'CREATE TABLE' u 'ON')
+def renombrar_tabla(sql, antes, tabla, nueva):
+    return re.sub(r'(%s\s+)[`"]?%s[`"]?' % (antes, tabla), r'\g<1>`%s`' % nueva, sql, count=1, flags=re.IGNORECASE)
+
+def cargar_modulo(ruta):
+    spec = importlib.util.spec_from_file_location('migracion_' + os.path.basename(ruta)[:-3], ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+if __name__ == '__main__':
+    bd = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DIRECTORIO_DB, 'facultad.db')
+    conn = sqlite3.connect(bd)
+    def progreso(descripcion, hechas, total):
+        print('  %s: %d/%d filas' % (descripcion, hechas, total))
+    for numero in migrar(conn, progreso=progreso):
+        print('Aplicada la migración %03d' % numero)
+    print('%s está en la versión %d' % (bd, version(conn)))
+    conn.close()
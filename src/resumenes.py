@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Verifica las tablas de resumen que mantienen los triggers de facultad.sql (recuento_votos,
+# resumen_periodo y resumen_consejo_directivo): las recalcula desde cero a partir de las tablas de
+# datos y muestra las diferencias con lo guardado. Con --reparar reemplaza el contenido de las que
+# no coincidan por el recalculado.
+# Uso: python resumenes.py [--reparar] [ruta a la base]    (por defecto ../db/facultad.db)
+
+import os
+import sqlite3
+import sys
+
+DIRECTORIO_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'db')
+
+# Para cada tabla de resumen: columnas (las primeras 'claves' forman la clave primaria) y la consulta que
+# la recalcula desde cero
+RESUMENES = {
+    'recuento_votos': (('eleccion', 'periodo', 'dni', 'votos'), 3, '''
+        SELECT 0, d.periodo, d.dni,
+               (SELECT COUNT(*) FROM voto_a_decano v WHERE v.dni_decano = d.dni AND v.periodo_decano = d.periodo)
+        FROM decano d
+        UNION ALL
+        SELECT 1, cs.periodo, cs.dni,
+               (SELECT COUNT(*) FROM voto_a_consejero_superior v
+                WHERE v.dni_consejero_superior = cs.dni AND v.periodo_consejero_superior = cs.periodo)
+        FROM consejero_superior cs
+        UNION ALL
+        SELECT 2, r.periodo, r.dni,
+               (SELECT COUNT(*) FROM rector_fue_votado_por_consejero_directivo v WHERE v.dni_rector = r.dni AND v.periodo_rector = r.periodo)
+             + (SELECT COUNT(*) FROM rector_fue_votado_por_consejero_superior v WHERE v.dni_rector = r.dni AND v.periodo_rector = r.periodo)
+             + (SELECT COUNT(*) FROM rector_fue_votado_por_decano v WHERE v.dni_rector = r.dni AND v.periodo_rector = r.periodo)
+        FROM rector r'''),
+    'resumen_periodo': (('periodo', 'agrupaciones', 'votos_recibidos'), 1, '''
+        SELECT periodo, COUNT(*), IFNULL(SUM(votos_recibidos), 0)
+        FROM agrupacion_politica_se_presenta_durante_calendario_electoral
+        GROUP BY periodo'''),
+    'resumen_consejo_directivo': (('periodo', 'claustro', 'id_agrupacion_politica', 'consejeros'), 3, '''
+        SELECT periodo, claustro, id_agrupacion_politica, COUNT(*)
+        FROM consejero_directivo
+        GROUP BY periodo, claustro, id_agrupacion_politica'''),
+}
+
+# Devuelve la lista de diferencias de la tabla como tuplas (clave, guardado, recalculado); guardado o
+# recalculado es None si la fila falta de ese lado
+def diferencias(conn, tabla):
+    columnas, claves, consulta = RESUMENES[tabla]
+    guardado = dict((fila[:claves], fila) for fila in conn.execute('SELECT %s FROM %s' % (', '.join(columnas), tabla)))
+    recalculado = dict((fila[:claves], fila) for fila in conn.execute(consulta))
+    return [(clave, guardado.get(clave), recalculado.get(clave))
+            for clave in sorted(set(guardado) | set(recalculado), key=repr)
+            if guardado.get(clave) != recalculado.get(clave)]
+
+# Diferencias de todas las tablas de resumen: dict tabla -> diferencias (sólo las que tienen alguna)
+def verificar(conn):
+    resultado = {}
+    for tabla in sorted(RESUMENES):
+        filas = diferencias(conn, tabla)
+        if filas:
+            resultado[tabla] = filas
+    return resultado
+
+# Reemplaza el contenido de las tablas por el recalculado, en una transacción
+def reparar(conn, tablas):
+    with conn:
+        for tabla in tablas:
+            columnas, claves, consulta = RESUMENES[tabla]
+            conn.execute('DELETE FROM %s' % tabla)
+            conn.execute('INSERT INTO %s (%s) %s' % (tabla, ', '.join(columnas), consulta))
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    corregir = '--reparar' in argumentos
+    argumentos = [a for a in argumentos if a != '--reparar']
+    bd = argumentos[0] if argumentos else os.path.join(DIRECTORIO_DB, 'facultad.db')
+    conn = sqlite3.connect(bd)
+    resultado = verificar(conn)
+    for tabla, filas in sorted(resultado.items()):
+        print('%s: %d diferencias' % (tabla, len(filas)))
+        for clave, guardado, recalculado in filas:
+            print('  %s: guardado %s, recalculado %s' % (clave, guardado, recalculado))
+    if resultado and corregir:
+        reparar(conn, resultado)
+        print('Tablas reparadas: %s' % ', '.join(sorted(resultado)))
+    elif not resultado:
+        print('Los resúmenes coinciden con los datos.')
+    conn.close()
+    sys.exit(1 if resultado and not corregir else 0)
@@ -1,22 +1,104 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 # coding: utf-8
 
+import asyncio
+import atexit
+import benchmarks
+import csv
+import datetime
+import datos_sinteticos
+import escrutinio
+import esquema
+import exportar
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import tracemalloc
 import unittest
-from sqlite3 import IntegrityError
+from sqlite3 import IntegrityError, OperationalError
+import instrumentacion
+import migrar
+import resumenes
+import tp_async
+import tp_shards
+import validacion
 import tp_api as api
 
+################################################################################
+# Bases compartidas entre tests                                                #
+################################################################################
+
+# Bases con datos sintéticos que usan varios tests: cada una se arma una sola vez y los tests la abren
+# sólo para leer (o trabajan sobre una copia en memoria). correr_tests.py las arma antes de repartir los
+# tests entre sus procesos y les pasa el directorio en esta variable de entorno; si no está definida
+# (ej.: con unittest o pytest) se arman en un directorio temporal la primera vez que se piden.
+VARIABLE_FIXTURES = 'TESTS_FIXTURES'
+DIRECTORIO_FIXTURES = None
+
+# Parámetros de datos_sinteticos.generar de cada base
+FIXTURES = {
+    'padron_sintetico': dict(semilla=1, votantes=50000, agrupaciones=5, periodos=2),
+}
+
+def preparar_fixture(directorio, nombre):
+    ruta = os.path.join(directorio, nombre + '.db')
+    if not os.path.exists(ruta):
+        # Se arma con otro nombre y se renombra al final, para no dejar nunca una base a medio cargar
+        temporal = os.path.join(directorio, nombre + '.tmp')
+        connector = esquema.crear_base(temporal, perfil=api.PERFIL_CARGA_MASIVA)
+        datos_sinteticos.cargar(api.model_test(connector), datos_sinteticos.generar(**FIXTURES[nombre]))
+        connector.cerrar()
+        os.replace(temporal, ruta)
+    return ruta
+
+def preparar_fixtures(directorio):
+    for nombre in sorted(FIXTURES):
+        preparar_fixture(directorio, nombre)
+
+def ruta_fixture(nombre):
+    global DIRECTORIO_FIXTURES
+    if DIRECTORIO_FIXTURES is None:
+        DIRECTORIO_FIXTURES = os.environ.get(VARIABLE_FIXTURES)
+        if DIRECTORIO_FIXTURES is None:
+            DIRECTORIO_FIXTURES = tempfile.mkdtemp()
+            atexit.register(shutil.rmtree, DIRECTORIO_FIXTURES, True)
+    return preparar_fixture(DIRECTORIO_FIXTURES, nombre)
+
+# Conexión de sólo lectura a la base compartida
+def leer_fixture(nombre):
+    connector = api.bd_connector_lectura()
+    connector.connect(bd=ruta_fixture(nombre))
+    return connector
+
+# Copia en memoria de la base compartida, para los tests que necesitan escribir
+def copiar_fixture(nombre):
+    lector = leer_fixture(nombre)
+    connector = api.bd_connector()
+    connector.connect(bd=':memory:')
+    lector.conn.backup(connector.conn)
+    lector.cerrar()
+    return connector
+
 class TestModel(unittest.TestCase):
 
     def setUp(self):
         # Crear una base en memoria y crear las tablas
-        self.connector = api.bd_connector()
-        self.connector.connect(bd=':memory:')
-        f = open('../db/facultad.sql', 'r')
-        self.connector.conn.executescript(f.read())
+        self.connector = self.crear_base()
 
         # El modelo ahora usa la base en memoria en lugar del archivo facultad.db
         self.model = api.model_test(self.connector)
 
+    def crear_base(self):
+        connector = api.bd_connector()
+        connector.connect(bd=':memory:')
+        esquema.clonar(connector.conn)
+        return connector
+
     ################################################################################
     # Padrón electoral                                                             #
     ################################################################################
@@ -84,6 +166,132 @@ class TestModel(unittest.TestCase):
                                 (api.NACIONALIDAD_UNIVERSIDAD_PROFESOR, api.CARGO_PROFESOR_REGULAR))
 
 
+    def test_empadronar_alumno_many(self):
+        self.model.empadronar_alumno(1, 'Alumno')
+
+        # Un lote chico obliga a repartir la carga en varias transacciones
+        filas = [(2, 'Alumno'), (3, 'Alumno'), (1, 'Repetido en la base'), (3, 'Repetido en el lote'),
+                 ('x', 'DNI inválido'), (4, 'Alumno')]
+        resultado = self.model.empadronar_alumno_many(filas, tamano_lote=2)
+
+        # Verificar que los rechazos no aborten la carga
+        self.assertEqual(resultado.insertados, 3)
+        self.assertEqual(sorted(resultado.rechazados, key=str),
+                         sorted([(1, api.RECHAZO_DNI_DUPLICADO), (3, api.RECHAZO_DNI_DUPLICADO),
+                                 ('x', api.RECHAZO_DNI_INVALIDO)], key=str))
+
+        # Verificar que se hayan creado las entradas en las tablas empadronado y estudiante
+        self.assertSelectEquals('SELECT COUNT(*) FROM empadronado WHERE claustro = ?', (api.CLAUSTRO_ESTUDIANTES,), (4,))
+        self.assertSelectEquals('SELECT COUNT(*) FROM estudiante', (), (4,))
+        self.assertSelectEquals('SELECT COUNT(*) FROM facultad', (), (1,))
+
+    def test_empadronar_many_claustro_invalido(self):
+        resultado = self.model.empadronar_many([(1, 'Alumno', api.CLAUSTRO_ESTUDIANTES),
+                                                (2, 'Graduado', str(api.CLAUSTRO_GRADUADOS)),
+                                                (3, 'Nadie', 99)])
+
+        self.assertEqual(resultado, api.resultado_empadronamiento(2, [(3, api.RECHAZO_CLAUSTRO_INVALIDO)]))
+        self.assertSelectEquals('SELECT universidad FROM graduado WHERE dni = ?', (2,), (api.UBA,))
+
+    def test_empadronar_graduado_many_desde_csv(self):
+        f = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        f.write('dni,nombre\n10,Graduado\n11,Graduado\n')
+        f.close()
+        try:
+            resultado = self.model.empadronar_graduado_many(api.leer_padron_csv(f.name))
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(resultado, api.resultado_empadronamiento(2, []))
+        self.assertSelectEquals('SELECT COUNT(*) FROM graduado', (), (2,))
+
+    def test_empadronar_many_filas_incompletas(self):
+        f = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        f.write('dni,nombre\n10,Profesor\n11\n12,Profesor\n')
+        f.close()
+        try:
+            resultado = self.model.empadronar_profesor_many(api.leer_padron_csv(f.name))
+        finally:
+            os.remove(f.name)
+
+        # La fila sin nombre se rechaza sin abortar la carga del resto
+        self.assertEqual(resultado, api.resultado_empadronamiento(2, [('11', api.RECHAZO_FILA_INCOMPLETA)]))
+        self.assertSelectEquals('SELECT COUNT(*) FROM profesor', (), (2,))
+
+        resultado = self.model.empadronar_many([(13, 'Alumno'), (), (14, 'Alumno', api.CLAUSTRO_ESTUDIANTES)])
+        self.assertEqual(resultado, api.resultado_empadronamiento(1, [(13, api.RECHAZO_FILA_INCOMPLETA),
+                                                                      (None, api.RECHAZO_FILA_INCOMPLETA)]))
+
+    # Las funciones de validacion usan NumPy si está instalado y bisect si no: cada test de validación se
+    # corre con las dos, forzando la que corresponda durante el test
+    def usar_numpy_en_validacion(self, np):
+        self.addCleanup(setattr, validacion, 'np', validacion.np)
+        validacion.np = np
+
+    def comprobar_arrays_ordenados_de_claves(self):
+        ordenadas = validacion.ordenar(iter([5, 1, 5, 3, -2]))
+        self.assertEqual([int(x) for x in ordenadas], [-2, 1, 3, 5])
+        self.assertEqual([int(x) for x in validacion.posiciones(ordenadas, [3, 4, -2, 6, 5])], [2, -1, 0, -1, 3])
+        self.assertEqual([int(x) for x in validacion.posiciones(validacion.ordenar(iter([])), [1, 2])], [-1, -1])
+        self.assertEqual([bool(x) for x in validacion.repetidas([2, 1, 2, 2, 3])], [False, False, True, True, False])
+        self.assertEqual(len(validacion.repetidas([])), 0)
+
+    def test_arrays_ordenados_de_claves(self):
+        self.usar_numpy_en_validacion(None)
+        self.comprobar_arrays_ordenados_de_claves()
+
+    @unittest.skipIf(validacion.np is None, 'numpy no está instalado')
+    def test_arrays_ordenados_de_claves_con_numpy(self):
+        self.comprobar_arrays_ordenados_de_claves()
+
+    def test_validar_antes_de_cargar(self):
+        self.usar_numpy_en_validacion(None)
+        self.comprobar_validacion_antes_de_cargar()
+
+    @unittest.skipIf(validacion.np is None, 'numpy no está instalado')
+    def test_validar_antes_de_cargar_con_numpy(self):
+        self.comprobar_validacion_antes_de_cargar()
+
+    def comprobar_validacion_antes_de_cargar(self):
+        self.model.empadronar_alumno(1, 'Alumno')
+        self.model.empadronar_profesor(2, 'Profesor')
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        self.model.crear_consejero_directivo(1, 2014, id_agrupacion_politica)
+        self.model.crear_decano(2, 2014)
+        self.model.registrar_voto_a_decano(2, 2014, 1, 2014)
+        v = validacion.validador(self.model)
+
+        errores = v.padron([('3', 'Alumno'), (1, 'Repetido en la base'), (3, 'Repetido en el archivo'),
+                            ('x', 'DNI inválido'), (4, 'Nadie', 99)], api.CLAUSTRO_ESTUDIANTES)
+        self.assertEqual([(e.fila, e.motivo) for e in errores],
+                         [(1, api.RECHAZO_DNI_DUPLICADO), (2, api.RECHAZO_DNI_DUPLICADO),
+                          (3, api.RECHAZO_DNI_INVALIDO), (4, api.RECHAZO_CLAUSTRO_INVALIDO)])
+        self.assertEqual(errores[2].valores, ('x', 'DNI inválido'))
+
+        # Las filas que la carga rechazaría por incompletas
+        errores = v.padron([(5,), (), (6, 'Alumno')], api.CLAUSTRO_ESTUDIANTES)
+        self.assertEqual([(e.fila, e.motivo) for e in errores],
+                         [(0, api.RECHAZO_FILA_INCOMPLETA), (1, api.RECHAZO_FILA_INCOMPLETA)])
+        errores = v.padron([(5, 'Sin claustro'), (6, 'Alumno', api.CLAUSTRO_ESTUDIANTES)])
+        self.assertEqual([(e.fila, e.motivo) for e in errores], [(0, api.RECHAZO_FILA_INCOMPLETA)])
+
+        errores = v.consejeros_directivos([(2, 2014, id_agrupacion_politica), (1, 2014, id_agrupacion_politica),
+                                           (9, 2014, id_agrupacion_politica + 1), (2, 2014, id_agrupacion_politica),
+                                           (2, 1 << 20, id_agrupacion_politica)])
+        self.assertEqual([(e.fila, e.motivo) for e in errores],
+                         [(1, validacion.RECHAZO_CONSEJERO_DUPLICADO), (2, validacion.RECHAZO_DNI_NO_EMPADRONADO),
+                          (2, validacion.RECHAZO_AGRUPACION_INEXISTENTE), (3, validacion.RECHAZO_CONSEJERO_DUPLICADO),
+                          (4, validacion.RECHAZO_PERIODO_INVALIDO)])
+
+        errores = v.votos('registrar_voto_a_decano', [(2, 2014, 1, 2014), (2, 2015, 1, 2014), (2, 2014, 5, 2014)])
+        self.assertEqual([(e.fila, e.motivo) for e in errores],
+                         [(0, validacion.RECHAZO_VOTO_DUPLICADO), (1, validacion.RECHAZO_CANDIDATO_INEXISTENTE),
+                          (2, validacion.RECHAZO_VOTANTE_INEXISTENTE)])
+
+        # Nada se escribió en la base
+        self.assertSelectEquals('SELECT COUNT(*) FROM empadronado', (), (2,))
+        self.assertSelectEquals('SELECT COUNT(*) FROM consejero_directivo', (), (1,))
+
     ################################################################################
     # Consejo directivo                                                            #
     ################################################################################
@@ -164,6 +372,116 @@ class TestModel(unittest.TestCase):
                                    WHERE dni = ? AND periodo = ?''', (dni, periodo),
                                 (id_agrupacion_politica, claustro))
 
+    def test_repartir_bancas_dhondt(self):
+        # Ejemplo clásico: 8 bancas entre cuatro listas
+        asignadas = api.repartir_bancas_dhondt({1: 100000, 2: 80000, 3: 30000, 4: 20000}, 8)
+        self.assertEqual([asignadas.count(id) for id in (1, 2, 3, 4)], [4, 3, 1, 0])
+
+        # Una agrupación no puede obtener más bancas que candidatos presentados
+        asignadas = api.repartir_bancas_dhondt({1: 100, 2: 40}, 4, {1: 2, 2: 3})
+        self.assertEqual(asignadas, [1, 1, 2, 2])
+
+    def test_composicion_consejo(self):
+        periodo = 2014
+        id_a = self.model.crear_agrupacion_politica(u'Agrupación A')
+        id_b = self.model.crear_agrupacion_politica(u'Agrupación B')
+        self.model.registrar_votos_eleccion_consejo_directivo(id_a, periodo, 100)
+        self.model.registrar_votos_eleccion_consejo_directivo(id_b, periodo, 40)
+        self.model.empadronar_alumno_many([(dni, 'Alumno') for dni in range(1, 7)])
+        self.model.empadronar_graduado(10, 'Graduado')
+        for dni in (1, 2, 3):
+            self.model.crear_consejero_directivo(dni, periodo, id_a)
+        for dni in (4, 5, 6):
+            self.model.crear_consejero_directivo(dni, periodo, id_b)
+        self.model.crear_consejero_directivo(10, periodo, id_b)
+
+        composicion = self.model.composicion_consejo(datetime.date(2014, 11, 1))
+
+        # Estudiantes: cocientes 100, 50, 40, 33 -> tres bancas para A y una para B
+        self.assertEqual(composicion.periodo, periodo)
+        self.assertEqual([c.dni for c in composicion.consejeros[api.CLAUSTRO_ESTUDIANTES]], [1, 2, 4, 3])
+        self.assertEqual(composicion.bancas_por_agrupacion[api.CLAUSTRO_ESTUDIANTES], {id_a: 3, id_b: 1})
+
+        # Graduados: B es la única agrupación con candidatos y sólo presentó uno
+        self.assertEqual(composicion.consejeros[api.CLAUSTRO_GRADUADOS],
+                         [api.consejero(10, id_b, api.CLAUSTRO_GRADUADOS)])
+        self.assertEqual(composicion.consejeros[api.CLAUSTRO_PROFESORES], [])
+
+    def test_composicion_consejo_se_invalida_al_registrar(self):
+        periodo = 2014
+        id_a = self.model.crear_agrupacion_politica(u'Agrupación A')
+        self.model.registrar_votos_eleccion_consejo_directivo(id_a, periodo, 100)
+        self.model.empadronar_alumno_many([(1, 'Alumno'), (2, 'Alumno')])
+        self.model.crear_consejero_directivo(1, periodo, id_a)
+
+        self.assertEqual(len(self.model.composicion_consejo(periodo).consejeros[api.CLAUSTRO_ESTUDIANTES]), 1)
+        self.assertIs(self.model.composicion_consejo(periodo), self.model.composicion_consejo(periodo))
+
+        # Crear un consejero del período descarta la composición calculada
+        self.model.crear_consejero_directivo(2, periodo, id_a)
+        self.assertEqual(len(self.model.composicion_consejo(periodo).consejeros[api.CLAUSTRO_ESTUDIANTES]), 2)
+
+        # Lo mismo al registrar los votos de otra agrupación
+        id_b = self.model.crear_agrupacion_politica(u'Agrupación B')
+        self.model.empadronar_alumno(3, 'Alumno')
+        self.model.crear_consejero_directivo(3, periodo, id_b)
+        self.assertEqual(self.model.composicion_consejo(periodo).bancas_por_agrupacion[api.CLAUSTRO_ESTUDIANTES],
+                         {id_a: 2})
+        self.model.registrar_votos_eleccion_consejo_directivo(id_b, periodo, 90)
+        self.assertEqual(self.model.composicion_consejo(periodo).bancas_por_agrupacion[api.CLAUSTRO_ESTUDIANTES],
+                         {id_a: 2, id_b: 1})
+
+    def test_composicion_consejo_dentro_de_un_lote(self):
+        periodo = 2014
+        id_a = self.model.crear_agrupacion_politica(u'Agrupación A')
+        id_b = self.model.crear_agrupacion_politica(u'Agrupación B')
+        self.model.empadronar_alumno_many([(1, 'Alumno'), (2, 'Alumno')])
+        self.model.crear_consejero_directivo(1, periodo, id_a)
+        self.model.crear_consejero_directivo(2, periodo, id_b)
+        self.model.registrar_votos_eleccion_consejo_directivo(id_a, periodo, 100)
+
+        # Calculada con los votos de B todavía encolados, no puede quedar guardada para después del envío
+        with self.model.lote():
+            self.model.registrar_votos_eleccion_consejo_directivo(id_b, periodo, 90)
+            self.assertEqual(self.model.composicion_consejo(periodo).bancas_por_agrupacion[api.CLAUSTRO_ESTUDIANTES],
+                             {id_a: 1})
+        self.assertEqual(self.model.composicion_consejo(periodo).bancas_por_agrupacion[api.CLAUSTRO_ESTUDIANTES],
+                         {id_a: 1, id_b: 1})
+
+    def test_afiliar_a_agrupacion(self):
+        self.model.empadronar_alumno_many([(dni, 'Alumno') for dni in range(1, 5)])
+        id_agrupacion_1 = self.model.crear_agrupacion_politica(u'Agrupación 1')
+        id_agrupacion_2 = self.model.crear_agrupacion_politica(u'Agrupación 2')
+
+        self.model.afiliar_a_agrupacion(1, id_agrupacion_1)
+        self.model.afiliar_a_agrupacion(1, id_agrupacion_1)
+        self.model.afiliar_a_agrupacion_many([(2, id_agrupacion_1), (3, id_agrupacion_2), (1, id_agrupacion_2)])
+        self.assertSelectEquals('SELECT COUNT(*) FROM afiliado WHERE id_agrupacion_politica = ?', (id_agrupacion_2,), (2,))
+        self.assertSelectEquals('SELECT id_agrupacion_politica FROM afiliado WHERE dni = ?', (1,), (id_agrupacion_2,))
+
+        # Una planilla con un error no guarda ninguna de sus filas
+        self.assertRaises(IntegrityError, self.model.afiliar_a_agrupacion_many, [(4, id_agrupacion_1), (99, id_agrupacion_1)])
+        self.assertSelectEquals('SELECT COUNT(*) FROM afiliado', (), (3,))
+
+    def test_set_cant_votos_cantidato_a_consejero(self):
+        self.model.empadronar_alumno_many([(dni, 'Alumno') for dni in range(1, 5)])
+        fecha = datetime.date(2014, 10, 1)
+
+        self.model.set_cant_votos_cantidato_a_consejero(1, 10, fecha)
+        self.model.set_cant_votos_cantidato_a_consejero_many([(2, 30), (3, 20)], fecha)
+        # Volver a enviar la planilla de un candidato reemplaza su cantidad
+        self.model.set_cant_votos_cantidato_a_consejero_many([(1, 40), (3, 5)], fecha)
+        self.assertEqual(self.model.resultado_candidatos_a_consejero(2014), [(1, 40), (2, 30), (3, 5)])
+
+        self.assertRaises(IntegrityError, self.model.set_cant_votos_cantidato_a_consejero_many, [(4, 1), (99, 1)], fecha)
+        self.assertEqual(self.model.resultado_candidatos_a_consejero(fecha), [(1, 40), (2, 30), (3, 5)])
+
+        # Dentro de lote() la planilla se encola entera
+        with self.model.lote():
+            self.model.set_cant_votos_cantidato_a_consejero_many([(4, 7)], fecha)
+            self.assertEqual(len(self.model.resultado_candidatos_a_consejero(fecha)), 3)
+        self.assertEqual(self.model.resultado_candidatos_a_consejero(fecha), [(1, 40), (2, 30), (4, 7), (3, 5)])
+
     ################################################################################
     # Decano                                                                       #
     ################################################################################
@@ -471,6 +789,804 @@ class TestModel(unittest.TestCase):
                                        dni_decano = ? AND periodo_decano = ?''',
                                     (dni_rector, periodo_rector, dni_decano, periodo_decano))
 
+    ################################################################################
+    # Calendario electoral                                                         #
+    ################################################################################
+
+    def test_en_funciones_en_una_fecha(self):
+        self.model.empadronar_profesor(1, 'Profesor')
+        self.model.empadronar_alumno(2, 'Alumno')
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        self.model.crear_decano(1, 2010)
+        self.model.crear_consejero_directivo(2, 2012, id_agrupacion_politica)
+        self.model.crear_rector(1, 2012)
+        self.model.fijar_intervalo_periodo(2012, datetime.date(2012, 3, 1), '2014-03-01')
+
+        # Los períodos de los cargos se agregan al calendario; por defecto duran su año
+        self.assertEqual(self.model.en_funciones(datetime.date(2010, 12, 31)),
+                         [api.cargo_en_funciones('decano', 1, 2010, '2010-01-01', '2011-01-01')])
+        self.assertEqual(self.model.en_funciones(datetime.date(2011, 1, 1)), [])
+        self.assertEqual([(c.cargo, c.dni) for c in self.model.en_funciones(datetime.date(2014, 2, 28))],
+                         [('consejero_directivo', 2), ('rector', 1)])
+        self.assertEqual(self.model.en_funciones(datetime.date(2014, 3, 1)), [])
+        self.assertEqual([c.dni for c in self.model.en_funciones(datetime.date(2013, 1, 1), 'rector')], [1])
+        self.assertRaises(ValueError, self.model.en_funciones, 2013, 'bedel')
+
+        self.assertEqual(self.model.periodo_en_fecha(datetime.datetime(2013, 6, 1, 12, 0)), 2012)
+        self.assertEqual(self.model.periodo_en_fecha(datetime.date(2012, 2, 1)), None)
+
+    def test_consultas_por_fecha_usan_el_calendario(self):
+        self.model.empadronar_alumno_many([(1, 'Alumno'), (2, 'Alumno')])
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        self.model.crear_consejero_directivo(1, 2014, id_agrupacion_politica)
+        self.model.crear_consejero_directivo(2, 2016, id_agrupacion_politica)
+        self.model.registrar_votos_eleccion_consejo_directivo(id_agrupacion_politica, 2014, 100)
+        self.model.fijar_intervalo_periodo(2014, '2014-03-01', '2016-03-01')
+
+        # Una fecha de 2015 está dentro del período 2014, que cruza el cambio de año
+        fecha = datetime.date(2015, 6, 1)
+        self.assertEqual(self.model.periodo_en_fecha(fecha), 2014)
+        self.assertEqual([c.dni for c in self.model.en_funciones(fecha)], [1])
+        composicion = self.model.composicion_consejo(fecha)
+        self.assertEqual(composicion.periodo, 2014)
+        self.assertEqual([c.dni for c in composicion.consejeros[api.CLAUSTRO_ESTUDIANTES]], [1])
+        self.assertEqual([c.dni for c in self.model.consejeros_directivos(fecha)], [1])
+        self.assertEqual(self.model.resumen_periodo(fecha).periodo, 2014)
+        self.model.set_cant_votos_cantidato_a_consejero(1, 30, fecha)
+        self.assertEqual(self.model.resultado_candidatos_a_consejero('2014-03-01'), [api.resultado(1, 30)])
+
+        # Si se superponen dos períodos, el que empezó último (2016 dura su año por defecto)
+        self.assertEqual([c.dni for c in self.model.consejeros_directivos(datetime.date(2016, 1, 15))], [2])
+
+        # Sin un intervalo que la contenga se usa el año de la fecha, y un entero es el período
+        self.assertEqual(self.model.composicion_consejo(2015).periodo, 2015)
+        self.assertEqual(self.model.periodo_en_fecha(datetime.date(2013, 6, 1)), None)
+        self.assertEqual(self.model.composicion_consejo(datetime.date(2013, 6, 1)).periodo, 2013)
+
+    def test_en_funciones_entre_fechas_e_historial(self):
+        self.model.empadronar_profesor_many([(dni, 'Profesor') for dni in (1, 2)])
+        for periodo in range(1990, 2030, 4):
+            self.model.crear_decano(1 if periodo < 2010 else 2, periodo)
+            self.model.fijar_intervalo_periodo(periodo, '%d-03-01' % periodo, '%d-03-01' % (periodo + 4))
+
+        self.assertEqual([c.periodo for c in self.model.en_funciones_entre(2000, 2010)], [1998, 2002, 2006])
+        self.assertEqual([c.periodo for c in self.model.en_funciones_entre('2002-03-01', '2002-03-01', 'decano')], [2002])
+        self.assertEqual(self.model.en_funciones_entre(1980, 1990), [])
+
+        self.assertEqual([c.periodo for c in self.model.historial_cargos(tamano_bloque=3)], list(range(1990, 2030, 4)))
+        self.assertEqual([c.periodo for c in self.model.historial_cargos(2)], list(range(2010, 2030, 4)))
+        self.assertEqual(list(self.model.historial_cargos(2, 'rector')), [])
+
+        # Las consultas de cada cargo se arman sin dejar variables sueltas en el módulo
+        self.assertIn('historial_cargos_todos', api.SENTENCIAS)
+        for nombre in ('nombre', 'condicion', 'cargo'):
+            self.assertFalse(hasattr(api, nombre))
+
+    ################################################################################
+    # Resultados                                                                   #
+    ################################################################################
+
+    def test_resultado_decano(self):
+        periodo = 2014
+        self.crear_consejeros_directivos(periodo, [1, 2, 3])
+        self.model.empadronar_profesor_many([(10, 'Profesor'), (11, 'Profesor'), (12, 'Profesor')])
+        for dni in (10, 11, 12):
+            self.model.crear_decano(dni, periodo)
+        self.model.registrar_voto_a_decano(11, periodo, 1, periodo)
+        self.model.registrar_voto_a_decano(11, periodo, 2, periodo)
+        self.model.registrar_voto_a_decano(10, periodo, 3, periodo)
+
+        # Los candidatos sin votos también aparecen en el resultado
+        self.assertEqual(self.model.resultado_decano(periodo),
+                         [api.resultado(11, 2), api.resultado(10, 1), api.resultado(12, 0)])
+        self.assertEqual(self.model.resultado_decano(periodo + 1), [])
+
+    def test_resultado_consejo_superior(self):
+        periodo = 2014
+        self.crear_consejeros_directivos(periodo, [1, 2])
+        self.model.empadronar_graduado(10, 'Graduado')
+        self.model.crear_consejero_superior(10, periodo)
+        self.model.registrar_voto_a_consejero_superior(10, periodo, 1, periodo)
+        self.model.registrar_voto_a_consejero_superior(10, periodo, 2, periodo)
+
+        self.assertEqual(self.model.resultado_consejo_superior(periodo), [api.resultado(10, 2)])
+
+    def test_resultado_rector(self):
+        periodo = 2014
+        self.crear_consejeros_directivos(periodo, [1])
+        self.model.empadronar_graduado(2, 'Graduado')
+        self.model.crear_consejero_superior(2, periodo)
+        self.model.empadronar_profesor_many([(3, 'Decano'), (10, 'Profesor'), (11, 'Profesor')])
+        self.model.crear_decano(3, periodo)
+        self.model.crear_rector(10, periodo)
+        self.model.crear_rector(11, periodo)
+
+        # Se suman los votos de los tres tipos de votantes
+        self.model.registrar_voto_de_consejero_directivo_a_rector(11, periodo, 1, periodo)
+        self.model.registrar_voto_de_consejero_superior_a_rector(11, periodo, 2, periodo)
+        self.model.registrar_voto_de_decano_a_rector(10, periodo, 3, periodo)
+
+        self.assertEqual(self.model.resultado_rector(periodo), [api.resultado(11, 2), api.resultado(10, 1)])
+
+    def test_recuento_materializado(self):
+        periodo = 2014
+        self.crear_consejeros_directivos(periodo, [1, 2, 3])
+        self.model.empadronar_profesor_many([(10, 'Profesor'), (11, 'Profesor')])
+        self.model.crear_decano(10, periodo)
+        self.model.crear_rector(11, periodo)
+        self.model.registrar_voto_a_decano(10, periodo, 1, periodo)
+
+        # Los triggers ya contaron los votos registrados antes de habilitarlo: sólo cambia de dónde se
+        # leen los resultados
+        self.model.usar_recuento_materializado()
+        self.assertEqual(self.model.resultado_decano(periodo), [api.resultado(10, 1)])
+        self.assertEqual(self.model.resultado_rector(periodo), [api.resultado(11, 0)])
+
+        self.model.registrar_voto_a_decano(10, periodo, 2, periodo)
+        self.model.registrar_voto_de_consejero_directivo_a_rector(11, periodo, 3, periodo)
+        self.model.crear_decano(11, periodo)
+
+        # Un voto rechazado no debe sumarse: lo que hizo el trigger se deshace junto con el INSERT
+        with self.assertRaises(IntegrityError):
+            self.model.registrar_voto_a_decano(10, periodo, 2, periodo)
+
+        # Verificar que el recuento coincida con el que cuenta los votos en cada consulta
+        sin_materializar = api.model_test(self.connector)
+        for resultado in ('resultado_decano', 'resultado_consejo_superior', 'resultado_rector'):
+            self.assertEqual(getattr(self.model, resultado)(periodo), getattr(sin_materializar, resultado)(periodo))
+        self.assertEqual(self.model.resultado_decano(periodo), [api.resultado(10, 2), api.resultado(11, 0)])
+
+    def test_resumenes_mantenidos_por_triggers(self):
+        self.ejercitar_api()
+        periodo = 2014
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Otra agrupación')
+        self.model.registrar_votos_eleccion_consejo_directivo(id_agrupacion_politica, periodo, 5)
+        self.model.crear_consejero_directivo(4, periodo, id_agrupacion_politica)
+        self.assertEqual(resumenes.verificar(self.connector.conn), {})
+
+        self.assertEqual(self.model.resumen_periodo(datetime.date(2014, 3, 1)), api.votos_periodo(periodo, 2, 15))
+        self.assertEqual(self.model.resumen_periodo(2015), api.votos_periodo(2015, 0, 0))
+        consejeros = self.model.consejeros_por_claustro(periodo)
+        self.assertEqual(consejeros[api.CLAUSTRO_ESTUDIANTES], {1: 1, id_agrupacion_politica: 1})
+        self.assertEqual(consejeros[api.CLAUSTRO_PROFESORES], {1: 1})
+        self.assertEqual(consejeros[api.CLAUSTRO_GRADUADOS], {})
+
+        # Los triggers también descuentan lo que se borra
+        with self.connector as c:
+            c.execute('DELETE FROM voto_a_decano')
+            c.execute('DELETE FROM consejero_directivo WHERE dni = 4')
+            c.execute('DELETE FROM agrupacion_politica_se_presenta_durante_calendario_electoral WHERE id_agrupacion_politica = ?',
+                      (id_agrupacion_politica,))
+        self.assertEqual(resumenes.verificar(self.connector.conn), {})
+        self.model.usar_recuento_materializado()
+        self.assertEqual(self.model.resultado_decano(periodo), [api.resultado(3, 0)])
+        self.assertEqual(self.model.resumen_periodo(periodo), api.votos_periodo(periodo, 1, 10))
+        self.assertEqual(self.model.consejeros_por_claustro(periodo)[api.CLAUSTRO_ESTUDIANTES], {1: 1})
+
+        # La verificación detecta los resúmenes modificados por fuera de los triggers y los repara
+        with self.connector as c:
+            c.execute('UPDATE recuento_votos SET votos = 7 WHERE eleccion = ?', (api.ELECCION_RECTOR,))
+            c.execute('DELETE FROM resumen_periodo')
+        diferencias = resumenes.verificar(self.connector.conn)
+        self.assertEqual(sorted(diferencias), ['recuento_votos', 'resumen_periodo'])
+        self.assertEqual(diferencias['recuento_votos'],
+                         [((api.ELECCION_RECTOR, periodo, 5), (api.ELECCION_RECTOR, periodo, 5, 7),
+                           (api.ELECCION_RECTOR, periodo, 5, 3))])
+        resumenes.reparar(self.connector.conn, diferencias)
+        self.assertEqual(resumenes.verificar(self.connector.conn), {})
+
+    ################################################################################
+    # Transacciones                                                                #
+    ################################################################################
+
+    def test_transaction_deshace_todo_ante_un_error(self):
+        with self.assertRaises(IntegrityError):
+            with self.connector.transaction():
+                self.model.empadronar_alumno(123, 'Alumno')
+                self.model.empadronar_graduado(456, 'Graduado')
+                self.model.empadronar_alumno(123, 'Alumno')
+
+        # Verificar que no haya quedado nada de lo hecho dentro de la transacción
+        self.assertSelectEquals('SELECT COUNT(*) FROM empadronado', (), (0,))
+        self.assertSelectEquals('SELECT COUNT(*) FROM estudiante', (), (0,))
+
+    def test_transaction_anidada(self):
+        with self.connector.transaction():
+            self.model.empadronar_alumno(123, 'Alumno')
+
+            # Un error dentro del bloque anidado sólo deshace lo hecho en ese bloque
+            with self.assertRaises(IntegrityError):
+                with self.connector.transaction():
+                    self.model.empadronar_graduado(456, 'Graduado')
+                    self.model.empadronar_alumno(123, 'Alumno')
+
+            self.model.empadronar_alumno(789, 'Alumno')
+
+        self.assertSelectEquals('SELECT COUNT(*) FROM empadronado', (), (2,))
+        self.assertSelectEquals('SELECT COUNT(*) FROM graduado', (), (0,))
+
+    def test_registrar_votos_eleccion_consejo_directivo_es_atomico(self):
+        # Si falla el registro de los votos tampoco debe quedar creado el período
+        with self.assertRaises(IntegrityError):
+            self.model.registrar_votos_eleccion_consejo_directivo(0, 2014, 10)
+
+        self.assertSelectEquals('SELECT COUNT(*) FROM calendario_electoral', (), (0,))
+
+    ################################################################################
+    # Registro de sentencias y lotes                                               #
+    ################################################################################
+
+    def test_sentencias_registradas_son_validas(self):
+        # Cada sentencia del registro debe poder prepararse contra el esquema de facultad.sql
+        with self.connector as c:
+            c.execute(api.SENTENCIAS['crear_lote_empadronados'])
+            for nombre, query in api.SENTENCIAS.items():
+                if nombre == 'empadronados_existentes':
+                    query = query % '?'
+                c.execute('EXPLAIN ' + query, (None,) * query.count('?'))
+
+    def test_lote_de_votos(self):
+        periodo = 2014
+        self.crear_consejeros_directivos(periodo, [1, 2, 3, 4, 5])
+        self.model.empadronar_profesor(10, 'Profesor')
+        self.model.crear_decano(10, periodo)
+
+        with self.model.lote(tamano=2):
+            self.model.registrar_voto_a_decano(10, periodo, 1, periodo)
+            self.assertSelectEquals('SELECT COUNT(*) FROM voto_a_decano', (), (0,))
+
+            # Al juntar 'tamano' filas se envían
+            self.model.registrar_voto_a_decano(10, periodo, 2, periodo)
+            self.assertSelectEquals('SELECT COUNT(*) FROM voto_a_decano', (), (2,))
+            self.model.registrar_voto_a_decano(10, periodo, 3, periodo)
+
+        # Al cerrar el bloque se envía lo que quedaba pendiente
+        self.assertSelectEquals('SELECT COUNT(*) FROM voto_a_decano', (), (3,))
+
+        # Si el bloque termina con una excepción lo pendiente se descarta
+        with self.assertRaises(ValueError):
+            with self.model.lote():
+                self.model.registrar_voto_a_decano(10, periodo, 4, periodo)
+                raise ValueError()
+        self.assertSelectEquals('SELECT COUNT(*) FROM voto_a_decano', (), (3,))
+
+        # Un voto inválido hace fallar el envío completo
+        with self.assertRaises(IntegrityError):
+            with self.model.lote():
+                self.model.registrar_voto_a_decano(10, periodo, 5, periodo)
+                self.model.registrar_voto_a_decano(10, periodo, 1, periodo)
+        self.assertSelectEquals('SELECT COUNT(*) FROM voto_a_decano', (), (3,))
+
+    def test_lote_respeta_el_orden_de_las_sentencias(self):
+        # Las filas de 'estudiante' referencian a 'empadronado', que se inserta antes
+        with self.model.lote():
+            for dni in range(1, 4):
+                self.model.empadronar_alumno(dni, 'Alumno')
+        self.assertSelectEquals('SELECT COUNT(*) FROM estudiante', (), (3,))
+
+    ################################################################################
+    # Caches                                                                       #
+    ################################################################################
+
+    def test_cache_de_facultad_y_claustro(self):
+        periodo = 2014
+        self.model.empadronar_alumno_many([(1, 'Alumno'), (2, 'Alumno')])
+        self.model.empadronar_alumno(3, 'Alumno')
+        self.model.empadronar_graduado(4, 'Graduado')
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        self.model.crear_consejero_directivo(1, periodo, id_agrupacion_politica)
+        self.model.crear_consejero_directivo(1, periodo + 1, id_agrupacion_politica)
+        self.model.crear_consejero_superior(1, periodo)
+
+        # La facultad se busca una única vez y el claustro de cada DNI también
+        self.assertEqual(self.model.estadisticas_cache(), {'facultad': (2, 1), 'claustro': (2, 1)})
+
+    def test_cache_se_vacia_al_deshacer_una_transaccion(self):
+        # La facultad creada dentro de la transacción deja de existir al deshacerla
+        with self.assertRaises(IntegrityError):
+            with self.connector.transaction():
+                self.model.empadronar_alumno(1, 'Alumno')
+                self.model.obtener_claustro(1)
+                self.model.empadronar_alumno(1, 'Alumno')
+
+        # Verificar que el cache no devuelva el id de la facultad ni el claustro deshechos
+        self.model.empadronar_graduado(2, 'Graduado')
+        self.assertSelectEquals('SELECT id_facultad FROM empadronado WHERE dni = ?', (2,), (1,))
+        with self.assertRaises(AssertionError):
+            self.model.obtener_claustro(1)
+
+    def test_cache_lru_acotado(self):
+        cache = api.cache_lru(2)
+        for clave in (1, 2, 1, 3, 2):
+            cache.obtener(clave, lambda clave: clave * 10)
+
+        # Al agregar el 3 se descarta el 2, que era el menos usado
+        self.assertEqual((cache.aciertos, cache.fallos), (1, 4))
+        self.assertEqual(list(cache.datos.items()), [(3, 30), (2, 20)])
+
+    ################################################################################
+    # Índices y migraciones                                                        #
+    ################################################################################
+
+    def test_ninguna_consulta_de_la_api_recorre_una_tabla_entera(self):
+        consultas = []
+        self.connector.conn.set_trace_callback(consultas.append)
+        self.ejercitar_api()
+
+        # Con el recuento materializado los resultados se leen de recuento_votos, que mantienen los triggers
+        self.model.usar_recuento_materializado()
+        self.model.registrar_voto_a_decano(3, 2014, 5, 2014)
+        self.model.resultado_decano(2014)
+        self.model.resultado_rector(2014)
+        self.connector.conn.set_trace_callback(None)
+
+        # Verificar con EXPLAIN QUERY PLAN que cada consulta use una clave primaria o un índice
+        with self.connector as c:
+            for consulta in set(consultas):
+                if consulta.split()[0].upper() in ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA'):
+                    continue
+                # Las consultas internas de FTS5 a sus propias tablas ('main'.'empadronado_nombre_config', ...)
+                if "'main'." in consulta:
+                    continue
+                c.execute('EXPLAIN QUERY PLAN ' + consulta)
+                for fila in c.fetchall():
+                    detalle = fila[-1]
+                    # En una tabla FTS5, 'M' indica que se usa el índice de texto completo (MATCH)
+                    if detalle.startswith('SCAN') and 'VIRTUAL TABLE INDEX' in detalle and ':M' in detalle:
+                        continue
+                    # Se recorren enteras a propósito: una página de resultados, el lote que se está insertando
+                    # y los nombres que esperan para pasar al índice (como mucho 1000)
+                    if detalle in ('SCAN CONSTANT ROW', 'SCAN pagina', 'SCAN empadronado_lote',
+                                   'SCAN empadronado_nombre_pendiente'):
+                        continue
+                    if detalle.startswith('SCAN'):
+                        self.fail('%s\n  -> %s' % (consulta, detalle))
+
+    def test_deriva_del_esquema(self):
+        self.assertEqual(esquema.diferencias(self.connector.conn), [])
+
+        with self.connector as c:
+            c.execute('DROP INDEX idx_empadronado_claustro')
+            c.execute('CREATE TABLE sobrante (a INTEGER)')
+            c.execute('CREATE TABLE graduado_uba ( dni INTEGER, PRIMARY KEY(dni), '
+                      'FOREIGN KEY(dni) REFERENCES graduado(dni) ON DELETE CASCADE )')
+            c.execute('PRAGMA user_version = 4')
+        self.assertEqual([objeto for objeto, _, _ in esquema.diferencias(self.connector.conn)],
+                         [('version', 'user_version'), ('index', 'idx_empadronado_claustro'), ('table', 'sobrante')])
+
+    def test_migrar_base_existente(self):
+        # Simular una base creada con el esquema anterior a la primera migración
+        with self.connector as c:
+            c.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+            indices = sorted(fila[0] for fila in c.fetchall())
+            for indice in indices:
+                c.execute('DROP INDEX %s' % indice)
+            c.execute('ALTER TABLE profesor DROP COLUMN cargo')
+            c.execute('PRAGMA user_version = 0')
+
+        self.assertEqual(migrar.migrar(self.connector.conn), [numero for numero, _ in migrar.migraciones_disponibles()])
+        self.assertEqual(migrar.migrar(self.connector.conn), [])
+
+        # Verificar que la base migrada tenga la columna, los índices y la versión de facultad.sql
+        self.model.empadronar_profesor(123, 'Profesor')
+        with self.connector as c:
+            c.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+            self.assertEqual(sorted(fila[0] for fila in c.fetchall()), indices)
+            c.execute('PRAGMA user_version')
+            self.assertEqual(c.fetchone(), (migrar.migraciones_disponibles()[-1][0],))
+
+    def test_migracion_por_tramos(self):
+        self.crear_consejeros_directivos(2014, range(1, 8))
+        self.model.empadronar_profesor_many([(dni, 'Profesor') for dni in range(10, 15)])
+        # Simular una base anterior a las migraciones 006 y 007: tablas sin claves primarias y cargos sin completar
+        for tabla in ('profesor', 'consejero_directivo'):
+            self.quitar_claves(tabla)
+        with self.connector as c:
+            c.execute('UPDATE profesor SET cargo = NULL WHERE dni < 12')
+            c.execute('PRAGMA user_version = 5')
+
+        # Interrumpir la migración en medio de la reescritura de consejero_directivo
+        avances = []
+        interrumpir = [True]
+        def progreso(descripcion, hechas, total):
+            avances.append((descripcion, hechas, total))
+            if descripcion == '007 consejero_directivo: reescritura' and interrumpir[0]:
+                interrumpir[0] = False
+                raise RuntimeError('Interrumpida')
+        self.assertRaises(RuntimeError, migrar.migrar, self.connector.conn, 3, progreso)
+        self.assertEqual(migrar.version(self.connector.conn), 6)
+        self.assertEqual(avances[:3], [('006 profesor: cargo = 0', 2, 2), ('007 profesor: reescritura', 3, 5),
+                                       ('007 profesor: reescritura', 5, 5)])
+
+        # Al volver a ejecutarla retoma donde quedó
+        del avances[:]
+        self.assertEqual(migrar.migrar(self.connector.conn, 3, progreso), [7, 8, 9, 10, 11, 12])
+        self.assertEqual(avances, [('007 consejero_directivo: reescritura', 3, 7),
+                                   ('007 consejero_directivo: reescritura', 6, 7),
+                                   ('007 consejero_directivo: reescritura', 7, 7)])
+        self.assertEqual(esquema.diferencias(self.connector.conn), [])
+
+        # Los datos, los triggers y las claves primarias quedaron como en facultad.sql
+        self.assertSelectEquals('SELECT COUNT(*), COUNT(cargo) FROM profesor', (), (5, 5))
+        self.assertEqual(len(list(self.model.consejeros_directivos(2014))), 7)
+        self.assertEqual(self.contar_consejeros(2014), 7)
+        self.assertRaises(IntegrityError, self.model.crear_consejero_directivo, 1, 2014, 1)
+        self.model.crear_consejero_directivo(10, 2014, 1)
+        self.assertEqual(self.contar_consejeros(2014), 8)
+
+    def test_reescritura_con_escrituras_concurrentes(self):
+        self.crear_consejeros_directivos(2014, range(1, 8))
+        self.model.empadronar_profesor(10, 'Profesor')
+        conn = self.connector.conn
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'consejero_directivo'").fetchone()[0]
+
+        # Interrumpir la reescritura después del primer tramo, con las filas 1 a 3 ya copiadas
+        def progreso(descripcion, hechas, total):
+            raise RuntimeError('Interrumpida')
+        self.assertRaises(RuntimeError, migrar.tramos(conn, 99, 3, progreso).reescribir, 'consejero_directivo', sql)
+
+        # Mientras tanto la API sigue escribiendo la tabla vieja, con sus triggers
+        self.model.crear_consejero_directivo(10, 2014, 1)
+        self.assertRaises(IntegrityError, self.model.crear_consejero_directivo, 1, 2014, 1)
+        with self.connector as c:
+            c.execute('DELETE FROM consejero_directivo WHERE dni IN (2, 6)')
+        self.assertEqual(self.contar_consejeros(2014), 6)
+        with self.connector as c:
+            c.execute('UPDATE consejero_directivo SET periodo = 2015 WHERE dni IN (3, 5)')
+
+        migrar.tramos(conn, 99, 3).reescribir('consejero_directivo', sql)
+        self.assertEqual(esquema.diferencias(conn), [])
+        self.assertEqual(conn.execute('SELECT dni, periodo FROM consejero_directivo ORDER BY dni').fetchall(),
+                         [(1, 2014), (3, 2015), (4, 2014), (5, 2015), (7, 2014), (10, 2014)])
+        self.assertRaises(IntegrityError, self.model.crear_consejero_directivo, 10, 2014, 1)
+        self.model.crear_consejero_directivo(2, 2014, 1)
+        self.assertEqual(self.contar_consejeros(2014), 7)
+
+    def contar_consejeros(self, periodo):
+        return sum(sum(agrupaciones.values()) for agrupaciones in self.model.consejeros_por_claustro(periodo).values())
+
+    # Reemplaza la tabla por una con las mismas columnas, índices, triggers y filas pero sin restricciones
+    def quitar_claves(self, tabla):
+        conn = self.connector.conn
+        columnas = ', '.join(fila[1] for fila in conn.execute('PRAGMA table_info(%s)' % tabla))
+        objetos = [fila[0] for fila in conn.execute("SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type != 'table' "
+                                                    "AND sql IS NOT NULL", (tabla,))]
+        conn.execute('PRAGMA foreign_keys = OFF')
+        conn.executescript('''CREATE TABLE vieja AS SELECT * FROM %s; DROP TABLE %s;
+                              ALTER TABLE vieja RENAME TO %s;''' % (tabla, tabla, tabla))
+        for sql in objetos:
+            conn.execute(sql)
+        conn.commit()
+        conn.execute('PRAGMA foreign_keys = ON')
+
+    ################################################################################
+    # Instrumentación                                                              #
+    ################################################################################
+
+    def test_instrumentacion_mide_todos_los_metodos(self):
+        sumidero = instrumentacion.sumidero_memoria()
+        medicion = instrumentacion.instrumentacion([sumidero])
+        self.connector.instrumentar(medicion)
+
+        # Anotar cuántos eventos generó cada llamada a un método de la API
+        eventos_por_metodo = {}
+        def registrar_eventos(nombre, metodo):
+            def envoltorio(*args, **kwargs):
+                antes = len(sumidero.eventos)
+                resultado = metodo(*args, **kwargs)
+                eventos_por_metodo[nombre] = eventos_por_metodo.get(nombre, 0) + len(sumidero.eventos) - antes
+                return resultado
+            return envoltorio
+        for nombre in tp_async.METODOS:
+            setattr(self.model, nombre, registrar_eventos(nombre, getattr(self.model, nombre)))
+        self.ejercitar_api()
+
+        self.assertEqual(sorted(eventos_por_metodo), sorted(tp_async.METODOS))
+        for nombre, eventos in eventos_por_metodo.items():
+            self.assertGreater(eventos, 0, nombre)
+
+        # Las estadísticas usan los nombres del registro de sentencias y cuentan filas y commits
+        estadisticas = medicion.sentencias
+        self.assertEqual(estadisticas['insertar_voto_a_decano'].cantidad, 1)
+        self.assertEqual(estadisticas['insertar_voto_a_decano'].filas, 1)
+        self.assertEqual(estadisticas['resultado_decano'].filas, 1)
+        self.assertEqual(sum(estadisticas['insertar_empadronado'].histograma),
+                         estadisticas['insertar_empadronado'].cantidad)
+        self.assertGreater(medicion.commits.cantidad, 0)
+        self.assertEqual(medicion.commits.cantidad, len([e for e in sumidero.eventos if e['tipo'] == 'commit']))
+
+    def test_instrumentacion_informa_consultas_lentas(self):
+        sumidero = instrumentacion.sumidero_memoria()
+        self.connector.instrumentar(instrumentacion.instrumentacion([sumidero], umbral_lento=0))
+        self.model.empadronar_alumno(1, 'Alumno')
+        self.model.resultado_decano(2014)
+
+        lentas = dict((e['sentencia'], e['plan']) for e in sumidero.eventos if e['tipo'] == 'consulta_lenta')
+        self.assertIn('insertar_empadronado', lentas)
+        self.assertTrue(lentas['resultado_decano'])
+
+        # Deshabilitada, no se registra nada más
+        self.connector.instrumentar(None)
+        cantidad = len(sumidero.eventos)
+        self.model.empadronar_alumno(2, 'Alumno')
+        self.assertEqual(len(sumidero.eventos), cantidad)
+
+    def test_instrumentacion_executemany_sin_lista(self):
+        # Cursor que sólo recorre los parámetros que recibe, sin informar las filas
+        class cursor_recorre():
+            rowcount = -1
+            def executemany(self, query, seq_of_parameters):
+                self.recibidos = seq_of_parameters
+                self.cantidad = sum(1 for _ in seq_of_parameters)
+
+        medicion = instrumentacion.instrumentacion()
+        cursor = cursor_recorre()
+        instrumentado = medicion.envolver(cursor, None)
+        instrumentado.executemany(api.SENTENCIAS['insertar_empadronado'],
+                                  ((dni, 'Alumno', 1, api.CLAUSTRO_ESTUDIANTES) for dni in range(5)))
+        self.assertNotIsInstance(cursor.recibidos, list)
+        self.assertEqual(cursor.cantidad, 5)
+        self.assertEqual(medicion.sentencias['insertar_empadronado'].filas, 5)
+
+        # Leer antes de ejecutar algo no falla ni cuenta filas
+        instrumentado = medicion.envolver(self.connector.conn.cursor(), self.connector.conn)
+        self.assertIsNone(instrumentado.fetchone())
+        self.assertEqual(instrumentado.fetchall(), [])
+
+    def test_sumidero_jsonl(self):
+        directorio = tempfile.mkdtemp()
+        try:
+            ruta = os.path.join(directorio, 'eventos.jsonl')
+            sumidero = instrumentacion.sumidero_jsonl(ruta)
+            self.connector.instrumentar(instrumentacion.instrumentacion([sumidero]))
+            self.model.empadronar_alumno(1, 'Alumno')
+            sumidero.cerrar()
+            with open(ruta) as f:
+                eventos = [json.loads(linea) for linea in f]
+            self.assertIn('insertar_empadronado', [e.get('sentencia') for e in eventos])
+            self.assertEqual(eventos[-1]['tipo'], 'commit')
+        finally:
+            shutil.rmtree(directorio)
+
+    ################################################################################
+    # Listados                                                                     #
+    ################################################################################
+
+    def test_iterar_de_a_bloques(self):
+        self.model.empadronar_alumno_many([(dni, 'Alumno %d' % dni) for dni in range(1, 11)])
+        self.model.empadronar_profesor(11, 'Profesor')
+
+        filas = self.model.padron(tamano_bloque=3)
+        self.assertEqual(next(filas), api.empadronado(1, 'Alumno 1', api.CLAUSTRO_ESTUDIANTES))
+        self.assertEqual([f.dni for f in filas], list(range(2, 12)))
+        self.assertEqual(list(self.model.padron(api.CLAUSTRO_PROFESORES)),
+                         [api.empadronado(11, 'Profesor', api.CLAUSTRO_PROFESORES)])
+
+        # Abandonar un listado a la mitad no deshace nada ni vacía los caches
+        self.model.obtener_claustro(11)
+        with self.connector.transaction():
+            self.model.empadronar_alumno(12, 'Alumno')
+            filas = self.connector.iterar('SELECT dni FROM empadronado', tamano_bloque=2)
+            next(filas)
+            filas.close()
+        filas = self.connector.iterar('SELECT dni FROM empadronado', tamano_bloque=2)
+        next(filas)
+        filas.close()
+        self.assertSelectEquals('SELECT dni FROM empadronado WHERE dni = ?', (12,), (12,))
+        self.assertEqual(self.model.estadisticas_cache()['claustro'], (0, 1))
+        self.model.obtener_claustro(11)
+        self.assertEqual(self.model.estadisticas_cache()['claustro'], (1, 1))
+
+    def test_consejeros_directivos(self):
+        self.crear_consejeros_directivos(2014, [3, 1, 2])
+        self.assertEqual([c.dni for c in self.model.consejeros_directivos(datetime.date(2014, 5, 1))], [1, 2, 3])
+        self.assertEqual(list(self.model.consejeros_directivos(2015)), [])
+
+    def test_buscar_empadronados_por_nombre(self):
+        self.model.empadronar_many([(1, u'María González', api.CLAUSTRO_ESTUDIANTES),
+                                    (2, u'Mario Gonzalo', api.CLAUSTRO_GRADUADOS),
+                                    (3, u'José Pérez', api.CLAUSTRO_PROFESORES),
+                                    (4, u'Gonzalo Gonzalo', api.CLAUSTRO_ESTUDIANTES)])
+        def dnis(*args):
+            return [e.dni for e in self.model.buscar_empadronados(*args)]
+
+        # Prefijos de cualquier palabra, sin distinguir acentos ni mayúsculas
+        self.assertEqual(self.model.buscar_empadronados(u'PEREZ'), [api.empadronado(3, u'José Pérez', api.CLAUSTRO_PROFESORES)])
+        self.assertEqual(dnis(u'gonz mar'), [1, 2])
+        self.assertEqual(dnis(u'jos'), [3])
+        self.assertEqual(dnis(u'  '), [])
+
+        # Los caracteres especiales de FTS5 se toman como texto
+        self.assertEqual(dnis(u'josé "pérez'), [3])
+        self.assertEqual(dnis(u'NOT gonz*'), [])
+
+        # El nombre con más coincidencias primero; los empates por DNI, de a una página
+        self.assertEqual(dnis(u'gonzalo'), [4, 2])
+        self.assertEqual(dnis(u'gonz', 0, 2), [4, 1])
+        self.assertEqual(dnis(u'gonz', 1, 2), [2])
+        self.assertEqual(dnis(u'gonz', 2, 2), [])
+
+        # Los triggers mantienen el índice al modificar o borrar empadronados
+        with self.connector as c:
+            c.execute("UPDATE empadronado SET nombre = 'Mario Suárez' WHERE dni = 2")
+            c.execute('DELETE FROM empadronado WHERE dni = 4')
+        self.assertEqual(dnis(u'gonzalo'), [])
+        self.assertEqual(dnis(u'suarez'), [2])
+        with self.connector as c:
+            c.execute("INSERT INTO empadronado_nombre (empadronado_nombre) VALUES ('integrity-check')")
+
+    def test_indice_de_nombres_diferido(self):
+        with self.connector.transaction():
+            for dni in range(1, 1002):
+                self.model.empadronar_alumno(dni, 'Alumno %d' % dni)
+
+        # Los triggers indexan los nombres de a 1000: el último todavía espera
+        self.assertSelectEquals('SELECT dni FROM empadronado_nombre_pendiente', (), (1001,))
+
+        # Modificar o borrar un nombre pendiente o uno ya indexado
+        with self.connector as c:
+            c.execute("UPDATE empadronado SET nombre = 'Zoe Pendiente' WHERE dni = 1001")
+            c.execute("UPDATE empadronado SET nombre = 'Zoe Indexada' WHERE dni = 6")
+            c.execute('DELETE FROM empadronado WHERE dni IN (5, 1001)')
+            c.execute("INSERT INTO empadronado (dni, nombre, claustro) VALUES (1002, 'Zoe Nueva', ?)",
+                      (api.CLAUSTRO_ESTUDIANTES,))
+
+        # La búsqueda indexa antes los pendientes
+        self.assertEqual([e.dni for e in self.model.buscar_empadronados('zoe')], [6, 1002])
+        self.assertNotIn(5, [e.dni for e in self.model.buscar_empadronados('alumno 5', por_pagina=200)])
+        self.assertSelectEquals('SELECT COUNT(*) FROM empadronado_nombre_pendiente', (), (0,))
+        with self.connector as c:
+            c.execute("INSERT INTO empadronado_nombre (empadronado_nombre) VALUES ('integrity-check')")
+
+    def test_exportar_padron_en_memoria_constante(self):
+        n = 20000
+        self.model.empadronar_many((dni, u'Empadronado Ñandú %d' % dni, dni % 3) for dni in range(1, n + 1))
+        directorio = tempfile.mkdtemp()
+        try:
+            ruta = os.path.join(directorio, 'padron.csv')
+            tracemalloc.start()
+            try:
+                self.assertEqual(self.model.exportar_padron_csv(ruta), n)
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            # Con fetchall() sólo las filas ocuparían varios MB
+            self.assertLess(pico, 1024 * 1024)
+
+            # El archivo exportado se puede volver a cargar
+            copia = api.model_test(self.crear_base())
+            self.assertEqual(copia.empadronar_many(api.leer_padron_csv(ruta)).insertados, n)
+            self.assertEqual(list(copia.padron(api.CLAUSTRO_GRADUADOS)), list(self.model.padron(api.CLAUSTRO_GRADUADOS)))
+        finally:
+            shutil.rmtree(directorio)
+
+    ################################################################################
+    # Datos sintéticos y benchmarks                                                #
+    ################################################################################
+
+    def test_datos_sinteticos_reproducibles_y_completos(self):
+        datos = datos_sinteticos.generar(semilla=1, votantes=3000, agrupaciones=5, periodos=2)
+        self.assertEqual(datos, datos_sinteticos.generar(semilla=1, votantes=3000, agrupaciones=5, periodos=2))
+        self.assertNotEqual(datos, datos_sinteticos.generar(semilla=2, votantes=3000, agrupaciones=5, periodos=2))
+
+        # La carga completa es la de la base compartida
+        datos = datos_sinteticos.generar(**FIXTURES['padron_sintetico'])
+        lector = leer_fixture('padron_sintetico')
+        model = api.model_test(lector)
+        try:
+            with lector as c:
+                # Salvo los nombres que esperan para pasar al índice, que se vacía cada 1000
+                c.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'empadronado_nombre_pendiente'")
+                for (tabla,) in c.fetchall():
+                    c.execute('SELECT COUNT(*) FROM %s' % tabla)
+                    self.assertGreater(c.fetchone()[0], 0, tabla)
+            self.assertEqual(sum(r.votos for r in model.resultado_rector(datos.periodos[0].periodo)),
+                             len(datos.periodos[0].consejeros_directivos) + datos_sinteticos.CONSEJEROS_SUPERIORES
+                             + datos_sinteticos.CANDIDATOS_DECANO)
+        finally:
+            lector.cerrar()
+
+    def test_resumenes_y_esquema_de_datos_sinteticos(self):
+        lector = leer_fixture('padron_sintetico')
+        try:
+            self.assertEqual(resumenes.verificar(lector.conn), {})
+            self.assertEqual(esquema.diferencias(lector.conn), [])
+        finally:
+            lector.cerrar()
+
+    def test_validar_padron_sintetico_ya_cargado(self):
+        self.usar_numpy_en_validacion(None)
+        self.comprobar_padron_sintetico_ya_cargado()
+
+    @unittest.skipIf(validacion.np is None, 'numpy no está instalado')
+    def test_validar_padron_sintetico_ya_cargado_con_numpy(self):
+        self.comprobar_padron_sintetico_ya_cargado()
+
+    def comprobar_padron_sintetico_ya_cargado(self):
+        self.connector = copiar_fixture('padron_sintetico')
+        self.model = api.model_test(self.connector)
+        filas = datos_sinteticos.generar(**FIXTURES['padron_sintetico']).padron
+        errores = validacion.validador(self.model).padron(filas)
+        self.assertEqual(len(errores), len(filas))
+        self.assertEqual(set(e.motivo for e in errores), set([api.RECHAZO_DNI_DUPLICADO]))
+
+        # La copia se puede modificar sin tocar la base compartida
+        self.model.empadronar_alumno(10 ** 9, 'Nuevo')
+        lector = leer_fixture('padron_sintetico')
+        try:
+            self.assertEqual(lector.conn.execute(api.SENTENCIAS['buscar_claustro'], (10 ** 9,)).fetchall(), [])
+        finally:
+            lector.cerrar()
+
+    def test_regresiones_de_benchmarks(self):
+        base = [{'benchmark': 'b', 'medicion': 'rapida', 'filas': 1000, 'segundos': 1.0},
+                {'benchmark': 'b', 'medicion': 'lenta', 'filas': 1000, 'segundos': 1.0}]
+        actual = [{'benchmark': 'b', 'medicion': 'rapida', 'filas': 1000, 'segundos': 1.2},
+                  {'benchmark': 'b', 'medicion': 'lenta', 'filas': 1000, 'segundos': 4.0},
+                  {'benchmark': 'b', 'medicion': 'nueva', 'filas': 1000, 'segundos': 9.0}]
+        self.assertEqual(benchmarks.regresiones(actual, base, 0.5), [('b: lenta', 1000.0, 250.0)])
+        # La medición nueva no se compara, pero se informa
+        self.assertEqual(benchmarks.sin_base(actual, base), ['b: nueva'])
+
+    ################################################################################
+    # Funciones auxiliares                                                         #
+    ################################################################################
+
+    # Usa todas las funciones de la API al menos una vez sobre un conjunto chico de datos
+    def ejercitar_api(self):
+        periodo = 2014
+        self.model.empadronar_alumno(1, 'Alumno')
+        self.model.empadronar_graduado(2, 'Graduado')
+        self.model.empadronar_profesor(3, 'Profesor')
+        self.model.empadronar_many([(4, 'Alumno', api.CLAUSTRO_ESTUDIANTES), (5, 'Profesor', api.CLAUSTRO_PROFESORES),
+                                    (6, 'Graduado', api.CLAUSTRO_GRADUADOS), (1, 'Repetido', api.CLAUSTRO_ESTUDIANTES)])
+        self.model.empadronar_alumno_many([(7, 'Alumno')])
+        self.model.empadronar_graduado_many([(8, 'Graduado')])
+        self.model.empadronar_profesor_many([(9, 'Profesor')])
+
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        self.model.registrar_votos_eleccion_consejo_directivo(id_agrupacion_politica, periodo, 10)
+        self.model.crear_consejero_directivo(1, periodo, id_agrupacion_politica)
+        self.model.crear_consejero_directivo(5, periodo, id_agrupacion_politica)
+        self.model.composicion_consejo(periodo)
+        self.model.afiliar_a_agrupacion(1, id_agrupacion_politica)
+        self.model.afiliar_a_agrupacion_many([(2, id_agrupacion_politica), (4, id_agrupacion_politica)])
+        self.model.set_cant_votos_cantidato_a_consejero(4, 3, periodo)
+        self.model.set_cant_votos_cantidato_a_consejero_many([(6, 2), (7, 1)], periodo)
+        self.model.resultado_candidatos_a_consejero(periodo)
+
+        self.model.crear_decano(3, periodo)
+        self.model.registrar_voto_a_decano(3, periodo, 1, periodo)
+
+        self.model.crear_consejero_superior(2, periodo)
+        self.model.registrar_voto_a_consejero_superior(2, periodo, 1, periodo)
+
+        self.model.crear_rector(5, periodo)
+        self.model.registrar_voto_de_consejero_directivo_a_rector(5, periodo, 1, periodo)
+        self.model.registrar_voto_de_consejero_superior_a_rector(5, periodo, 2, periodo)
+        self.model.registrar_voto_de_decano_a_rector(5, periodo, 3, periodo)
+
+        self.model.resultado_decano(periodo)
+        self.model.resultado_consejo_superior(periodo)
+        self.model.resultado_rector(periodo)
+
+        self.model.fijar_intervalo_periodo(periodo, '2014-03-01', '2016-03-01')
+        self.model.periodo_en_fecha(datetime.date(2015, 1, 1))
+        self.model.en_funciones(datetime.date(2015, 1, 1))
+        self.model.en_funciones_entre(datetime.date(2015, 1, 1), datetime.date(2016, 1, 1), 'decano')
+        list(self.model.historial_cargos(3))
+
+        list(self.model.padron(api.CLAUSTRO_PROFESORES))
+        self.model.buscar_empadronados(u'alum')
+        list(self.model.consejeros_directivos(periodo))
+
+    # Empadrona a los DNIs como alumnos y los hace consejeros directivos de una misma agrupación
+    def crear_consejeros_directivos(self, periodo, dnis):
+        self.model.empadronar_alumno_many([(dni, 'Consejero') for dni in dnis])
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        for dni in dnis:
+            self.model.crear_consejero_directivo(dni, periodo, id_agrupacion_politica)
+
     ################################################################################
     # Aserciones auxiliares                                                        #
     ################################################################################
@@ -490,6 +1606,577 @@ class TestModel(unittest.TestCase):
             self.assertIsNotNone(row)
             self.assertEquals(row, expected_row)
 
+class TestEscrutinio(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.bd = os.path.join(self.directorio, 'facultad.db')
+        self.journal = os.path.join(self.directorio, 'escrutinio.journal')
+        connector = api.bd_connector()
+        connector.connect(bd=self.bd)
+        esquema.clonar(connector.conn)
+        self.model = api.model_test(connector)
+
+        self.periodo = 2014
+        self.model.empadronar_profesor(1, 'Profesor')
+        self.model.empadronar_alumno_many([(dni, 'Consejero') for dni in range(10, 15)])
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        for dni in range(10, 15):
+            self.model.crear_consejero_directivo(dni, self.periodo, id_agrupacion_politica)
+
+    def tearDown(self):
+        self.model.connector.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_valida_en_memoria_y_envia_de_a_tandas(self):
+        with escrutinio.model_escrutinio(self.model, self.journal, tamano=4, intervalo=3600) as e:
+            e.crear_decano(1, self.periodo)
+            self.assertRaises(IntegrityError, e.crear_decano, 1, self.periodo)
+            self.assertRaises(IntegrityError, e.crear_decano, 10, self.periodo)
+            self.assertRaises(IntegrityError, e.registrar_voto_a_decano, 1, self.periodo, 99, self.periodo)
+            self.assertRaises(IntegrityError, e.registrar_voto_a_decano, 1, 2015, 10, self.periodo)
+            e.registrar_voto_a_decano(1, self.periodo, 10, self.periodo)
+            self.assertRaises(IntegrityError, e.registrar_voto_a_decano, 1, self.periodo, 10, self.periodo)
+            e.registrar_voto_a_decano(1, self.periodo, 11, self.periodo)
+
+            # Todavía no se envió nada
+            self.assertEqual(self.model.resultado_decano(self.periodo), [])
+            e.registrar_voto_a_decano(1, self.periodo, 12, self.periodo)
+            self.assertEqual(self.model.resultado_decano(self.periodo), [(1, 3)])
+
+            e.crear_consejero_superior(10, self.periodo)
+            e.registrar_voto_a_consejero_superior(10, self.periodo, 13, self.periodo)
+            e.enviar()
+            self.assertEqual(self.model.resultado_consejo_superior(self.periodo), [(10, 1)])
+            self.assertEqual(os.path.getsize(self.journal), 0)
+            e.registrar_voto_a_decano(1, self.periodo, 13, self.periodo)
+        self.assertEqual(self.model.resultado_decano(self.periodo), [(1, 4)])
+
+        # Las claves que ya están en la base se cargan al empezar
+        e = escrutinio.model_escrutinio(self.model, self.journal)
+        self.assertRaises(IntegrityError, e.registrar_voto_a_decano, 1, self.periodo, 10, self.periodo)
+        e.cerrar()
+
+    def test_recupera_el_journal_despues_de_una_caida(self):
+        e = escrutinio.model_escrutinio(self.model, self.journal, intervalo=3600)
+        e.crear_rector(1, self.periodo)
+        e.registrar_voto_de_consejero_directivo_a_rector(1, self.periodo, 10, self.periodo)
+        e.enviar()
+        e.registrar_voto_de_consejero_directivo_a_rector(1, self.periodo, 11, self.periodo)
+        e.registrar_voto_de_consejero_directivo_a_rector(1, self.periodo, 12, self.periodo)
+        # El proceso se cae sin enviar: simular además una línea a medio escribir y una ya enviada
+        e.journal.write('registrar_voto_de_consejero_directivo_a_rector 1 %d 10 %d\n' % (self.periodo, self.periodo))
+        e.journal.write('registrar_voto_de_consejero_directivo_a_rector 1 %d 1' % self.periodo)
+        e.journal.close()
+        self.assertEqual(self.model.resultado_rector(self.periodo), [(1, 1)])
+
+        with escrutinio.model_escrutinio(self.model, self.journal, intervalo=3600) as e:
+            self.assertEqual(e.cantidad_pendientes, 2)
+        self.assertEqual(self.model.resultado_rector(self.periodo), [(1, 3)])
+
+    def test_claves_fuera_de_rango(self):
+        with escrutinio.model_escrutinio(self.model, self.journal, intervalo=3600) as e:
+            # Codificadas en 48 bits chocarían con claves válidas (ej.: (1, 2 ** 16) con (2, 0))
+            self.assertRaises(ValueError, e.crear_decano, 1, 2 ** 16)
+            self.assertRaises(ValueError, e.crear_decano, 2 ** 32 + 1, self.periodo)
+            self.assertRaises(ValueError, e.registrar_voto_a_decano, 1, self.periodo, 10, -1)
+            self.assertEqual(e.cantidad_pendientes, 0)
+            self.assertEqual(os.path.getsize(self.journal), 0)
+
+    def test_envio_por_tiempo_sin_operaciones_nuevas(self):
+        e = escrutinio.model_escrutinio(self.model, self.journal, intervalo=3600)
+        e.crear_decano(1, self.periodo)
+        e.enviar_si_corresponde()
+        self.assertEqual(e.cantidad_pendientes, 1)
+
+        # Pasado el intervalo se envía aunque no se registre nada más
+        e.intervalo = 0
+        e.enviar_si_corresponde()
+        self.assertEqual(e.cantidad_pendientes, 0)
+        self.assertEqual(self.model.resultado_decano(self.periodo), [(1, 0)])
+        e.cerrar()
+
+    def test_plazo_del_envio_por_tiempo(self):
+        e = escrutinio.model_escrutinio(self.model, self.journal, intervalo=3600)
+        self.assertIsNone(e.proximo_envio())
+        e.crear_decano(1, self.periodo)
+        self.assertTrue(3500 < e.proximo_envio() <= 3600)
+        e.intervalo = 0
+        self.assertEqual(e.proximo_envio(), 0)
+        e.enviar_si_corresponde()
+        self.assertIsNone(e.proximo_envio())
+        e.cerrar()
+
+    def test_journal_se_sincroniza_de_a_tandas(self):
+        sincronizados = []
+        fsync = os.fsync
+        def contar(fd):
+            sincronizados.append(os.path.getsize(self.journal))
+            fsync(fd)
+        escrutinio.os.fsync = contar
+        self.addCleanup(setattr, escrutinio.os, 'fsync', fsync)
+
+        e = escrutinio.model_escrutinio(self.model, self.journal, intervalo=3600, sincronizar=3)
+        e.crear_decano(1, self.periodo)
+        for dni in range(10, 14):
+            e.registrar_voto_a_decano(1, self.periodo, dni, self.periodo)
+        # Cada línea ya está en el archivo, pero sólo se hizo un fsync, con las tres primeras
+        with open(self.journal) as f:
+            lineas = f.read().splitlines()
+        self.assertEqual(len(lineas), 5)
+        self.assertEqual(len(sincronizados), 1)
+        self.assertEqual(sincronizados[0], sum(len(l) + 1 for l in lineas[:3]))
+
+        # Al cerrar se sincroniza lo que falta antes de enviar
+        e.cerrar()
+        self.assertEqual(len(sincronizados), 2)
+        self.assertEqual(self.model.resultado_decano(self.periodo), [(1, 4)])
+
+class TestPool(unittest.TestCase):
+
+    def setUp(self):
+        # El pool necesita una base en disco: cada conexión de ':memory:' sería una base distinta
+        self.directorio = tempfile.mkdtemp()
+        self.bd = os.path.join(self.directorio, 'facultad.db')
+        connector = api.bd_connector()
+        connector.connect(bd=self.bd)
+        esquema.clonar(connector.conn)
+
+        self.connector = api.bd_connector_pool()
+        self.connector.connect(bd=self.bd, tamano=3)
+        self.model = api.model_test(self.connector)
+
+    def tearDown(self):
+        self.connector.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_registro_concurrente_de_votos(self):
+        hilos = 8
+        agrupaciones_por_hilo = 25
+        periodo = 2014
+        errores = []
+
+        # Cada hilo simula una mesa que crea sus agrupaciones y registra sus votos
+        def mesa(numero):
+            try:
+                for i in range(agrupaciones_por_hilo):
+                    id = self.model.crear_agrupacion_politica(u'Agrupación %d-%d' % (numero, i))
+                    self.model.registrar_votos_eleccion_consejo_directivo(id, periodo, numero)
+            except Exception as e:
+                errores.append(e)
+
+        threads = [threading.Thread(target=mesa, args=(n,)) for n in range(hilos)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Verificar que no se haya perdido ningún voto y que el pool no haya superado su tamaño
+        self.assertEqual(errores, [])
+        self.assertLessEqual(self.connector.abiertas, 3)
+        with self.connector as c:
+            c.execute('''SELECT COUNT(*), SUM(votos_recibidos)
+                         FROM agrupacion_politica_se_presenta_durante_calendario_electoral''')
+            self.assertEqual(c.fetchone(), (hilos * agrupaciones_por_hilo,
+                                            agrupaciones_por_hilo * sum(range(hilos))))
+            c.execute('PRAGMA journal_mode')
+            self.assertEqual(c.fetchone(), ('wal',))
+
+    def test_lote_es_de_cada_hilo(self):
+        self.model.empadronar_profesor(10, 'Profesor')
+        self.model.empadronar_alumno_many([(dni, 'Alumno') for dni in range(1, 3)])
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        for dni in range(1, 3):
+            self.model.crear_consejero_directivo(dni, 2014, id_agrupacion_politica)
+        self.model.crear_decano(10, 2014)
+        encolado = threading.Event()
+        otro_hilo = threading.Event()
+        errores = []
+
+        def votar_en_lote():
+            with self.model.lote():
+                self.model.registrar_voto_a_decano(10, 2014, 1, 2014)
+                encolado.set()
+                otro_hilo.wait()
+
+        # Mientras otro hilo tiene un lote abierto, las escrituras de este se ejecutan enseguida y sus
+        # errores se informan en este hilo
+        hilo = threading.Thread(target=votar_en_lote)
+        hilo.start()
+        encolado.wait()
+        try:
+            self.model.registrar_voto_a_decano(10, 2014, 2, 2014)
+            with self.connector as c:
+                c.execute('SELECT dni_consejero_directivo FROM voto_a_decano')
+                self.assertEqual(c.fetchall(), [(2,)])
+            self.assertRaises(IntegrityError, self.model.registrar_voto_a_decano, 10, 2014, 2, 2014)
+        finally:
+            otro_hilo.set()
+            hilo.join()
+        with self.connector as c:
+            c.execute('SELECT dni_consejero_directivo FROM voto_a_decano ORDER BY dni_consejero_directivo')
+            self.assertEqual(c.fetchall(), [(1,), (2,)])
+
+    def test_descarta_conexiones_rotas(self):
+        self.model.crear_agrupacion_politica(u'Agrupación')
+        self.connector.libres.queue[-1].close()
+
+        # La conexión cerrada se reemplaza por una nueva en lugar de fallar
+        self.model.crear_agrupacion_politica(u'Agrupación')
+        self.assertEqual(self.connector.abiertas, 1)
+
+    def test_devuelve_la_conexion_si_falla_al_entrar(self):
+        class instrumentacion_rota():
+            def envolver(self, cursor, conn):
+                raise RuntimeError('Rota')
+
+        self.model.crear_agrupacion_politica(u'Agrupación')
+        self.connector.instrumentar(instrumentacion_rota())
+        for _ in range(4):
+            self.assertRaises(RuntimeError, self.model.crear_agrupacion_politica, u'Agrupación')
+
+        # La conexión volvió al pool: no quedó tomada por este hilo ni se agotaron los cupos
+        self.assertEqual(self.connector.local.usos, 0)
+        self.connector.instrumentar(None)
+        self.model.crear_agrupacion_politica(u'Agrupación')
+        self.assertEqual(self.connector.abiertas, 1)
+
+class TestPerfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.bd = os.path.join(self.directorio, 'facultad.db')
+        connector = api.bd_connector()
+        connector.connect(bd=self.bd)
+        esquema.clonar(connector.conn)
+        connector.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_cada_perfil_configura_la_conexion(self):
+        for perfil, pragmas in api.PERFILES.items():
+            connector = api.bd_connector()
+            connector.connect(bd=self.bd, perfil=perfil)
+            for pragma, valor in pragmas:
+                leido = connector.conn.execute('PRAGMA %s' % pragma).fetchone()[0]
+                if pragma == 'journal_mode':
+                    self.assertEqual(leido, valor.lower(), perfil)
+                elif pragma == 'synchronous':
+                    self.assertEqual(leido, ('OFF', 'NORMAL', 'FULL').index(valor), perfil)
+                elif pragma == 'temp_store':
+                    self.assertEqual(leido, 2, perfil)
+                else:
+                    self.assertEqual(leido, valor, perfil)
+            connector.cerrar()
+
+    def test_claves_foraneas_en_conexiones_nuevas(self):
+        model = api.model_test(self.conectar(api.PERFIL_ONLINE))
+        self.assertRaises(IntegrityError, model.crear_decano, 123, 2014)
+
+    def test_perfil_de_analisis_no_escribe(self):
+        model = api.model_test(self.conectar(api.PERFIL_ANALISIS))
+        self.assertEqual(model.resultado_decano(2014), [])
+        self.assertRaises(OperationalError, model.crear_agrupacion_politica, u'Agrupación')
+
+    def test_perfil_desconocido(self):
+        self.assertRaises(ValueError, self.conectar, 'turbo')
+
+    def conectar(self, perfil):
+        connector = api.bd_connector()
+        connector.connect(bd=self.bd, perfil=perfil)
+        self.addCleanup(connector.cerrar)
+        return connector
+
+class TestLectura(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.bd = os.path.join(self.directorio, 'facultad.db')
+        self.connector = api.bd_connector()
+        self.connector.connect(bd=self.bd)
+        esquema.clonar(self.connector.conn)
+
+        self.lector = api.bd_connector_lectura()
+        self.lector.connect(bd=self.bd)
+        self.model = api.model_test(self.connector, self.lector)
+
+    def tearDown(self):
+        self.lector.cerrar()
+        self.connector.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_instantanea_no_ve_escrituras_posteriores(self):
+        self.model.empadronar_profesor(1, 'Profesor')
+        self.model.empadronar_alumno(2, 'Alumno')
+        self.model.empadronar_alumno(3, 'Alumno')
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        self.model.crear_consejero_directivo(2, 2014, id_agrupacion_politica)
+        self.model.crear_consejero_directivo(3, 2014, id_agrupacion_politica)
+        self.model.crear_decano(1, 2014)
+        self.model.registrar_voto_a_decano(1, 2014, 2, 2014)
+
+        with self.model.instantanea():
+            self.assertEqual(self.model.resultado_decano(2014), [(1, 1)])
+            # El escritor no queda bloqueado por la instantánea abierta
+            self.model.registrar_voto_a_decano(1, 2014, 3, 2014)
+            self.model.registrar_votos_eleccion_consejo_directivo(id_agrupacion_politica, 2014, 100)
+            self.assertEqual(self.model.resultado_decano(2014), [(1, 1)])
+            self.assertEqual(self.model.composicion_consejo(2014).consejeros[api.CLAUSTRO_ESTUDIANTES], [])
+        self.assertEqual(self.model.resultado_decano(2014), [(1, 2)])
+        self.assertEqual(len(self.model.composicion_consejo(2014).consejeros[api.CLAUSTRO_ESTUDIANTES]), 2)
+
+    def test_lector_no_puede_escribir(self):
+        with self.lector as c:
+            self.assertRaises(OperationalError, c.execute, 'DELETE FROM facultad')
+
+    def test_lector_requiere_wal(self):
+        bd = os.path.join(self.directorio, 'sin_wal.db')
+        conn = sqlite3.connect(bd)
+        conn.execute('CREATE TABLE t (a INTEGER)')
+        conn.close()
+        self.assertRaises(OperationalError, api.bd_connector_lectura().connect, bd=bd)
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.universidad = tp_shards.model_universidad(self.directorio, {1: 'Exactas', 2: u'Ingeniería'}, procesos=2)
+
+    def tearDown(self):
+        self.universidad.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_cada_facultad_en_su_base(self):
+        self.universidad.empadronar_alumno(1, 10, 'Alumno de Exactas')
+        self.universidad.empadronar_many(2, [(20, 'Alumno de Ingeniería', api.CLAUSTRO_ESTUDIANTES)])
+        self.assertEqual([e.dni for e in self.universidad.padron(1)], [10])
+        self.assertEqual([e.dni for e in self.universidad.padron(2)], [20])
+
+        # Cada shard tiene su facultad con el id de la universidad
+        with self.universidad.shard(2).connector as c:
+            c.execute('SELECT e.dni, f.id, f.nombre FROM empadronado e JOIN facultad f ON f.id = e.id_facultad')
+            self.assertEqual(c.fetchall(), [(20, 2, u'Ingeniería')])
+        self.assertRaises(ValueError, self.universidad.padron, 3)
+
+    def test_resultados_de_toda_la_universidad(self):
+        periodo = 2014
+        for id_facultad, base in ((1, 100), (2, 200)):
+            self.universidad.empadronar_profesor(id_facultad, base, 'Candidato')
+            self.universidad.empadronar_alumno_many(id_facultad, [(base + i, 'Consejero') for i in range(1, 4)])
+            id_agrupacion_politica = self.universidad.crear_agrupacion_politica(id_facultad, u'Agrupación')
+            for i in range(1, 4):
+                self.universidad.crear_consejero_directivo(id_facultad, base + i, periodo, id_agrupacion_politica)
+            self.universidad.crear_consejero_superior(id_facultad, base, periodo)
+            self.universidad.crear_rector(id_facultad, base, periodo)
+
+        # Los votos de cada facultad se registran en paralelo, cada facultad en su propio proceso
+        operaciones = [(1, 'registrar_voto_a_consejero_superior', (100, periodo, 101, periodo)),
+                       (2, 'registrar_voto_a_consejero_superior', (200, periodo, 201, periodo)),
+                       (2, 'registrar_voto_a_consejero_superior', (200, periodo, 202, periodo)),
+                       (1, 'registrar_voto_de_consejero_directivo_a_rector', (100, periodo, 101, periodo)),
+                       (1, 'registrar_voto_de_consejero_superior_a_rector', (100, periodo, 100, periodo))]
+        self.assertEqual(sorted(self.universidad.aplicar(operaciones)), [1, 2])
+
+        self.assertEqual(self.universidad.resultado_consejo_superior(periodo), [(200, 2), (100, 1)])
+        self.assertEqual(self.universidad.resultado_rector(periodo), [(100, 2), (200, 0)])
+        self.assertEqual(self.universidad.resultado_decano(1, periodo), [])
+
+    def test_aplicar_es_atomico_por_facultad(self):
+        operaciones = [(1, 'empadronar_alumno', (10, 'Alumno')),
+                       (2, 'empadronar_alumno', (20, 'Alumno')),
+                       (2, 'empadronar_alumno', (20, 'Repetido'))]
+        self.assertRaises(IntegrityError, self.universidad.aplicar, operaciones)
+        self.assertEqual([e.dni for e in self.universidad.padron(1)], [10])
+        self.assertEqual(list(self.universidad.padron(2)), [])
+
+class TestExportacion(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.bd = os.path.join(self.directorio, 'facultad.db')
+        self.model = api.model_test(esquema.crear_base(self.bd))
+        self.destino = os.path.join(self.directorio, 'exportacion')
+        os.mkdir(self.destino)
+
+    def tearDown(self):
+        self.model.connector.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def leer_csv(self, tabla, secuencia=None):
+        with gzip.open(exportar.ruta_exportacion(self.destino, tabla, exportar.FORMATO_CSV, secuencia), 'rt',
+                       newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    def registro(self):
+        with self.model.connector as c:
+            c.execute('SELECT secuencia FROM exportacion_modificadas ORDER BY secuencia')
+            return [fila[0] for fila in c.fetchall()]
+
+    def test_exportacion_completa_e_incremental(self):
+        estado = os.path.join(self.directorio, 'estado.json')
+        self.model.empadronar_many((dni, u'Empadronado Ñandú %d' % dni, dni % 3) for dni in range(101, 201))
+        id_agrupacion_politica = self.model.crear_agrupacion_politica(u'Agrupación')
+        self.model.afiliar_a_agrupacion(107, id_agrupacion_politica)
+
+        # La primera exportación con estado es completa
+        resultado = exportar.exportar(self.bd, self.destino, estado=estado, procesos=2, tamano_bloque=7)
+        self.assertEqual(sorted(resultado), sorted(exportar.EXPORTABLES))
+        self.assertEqual(resultado['empadronado'], 100)
+        padron = self.leer_csv('empadronado')
+        self.assertEqual(padron[0], ['dni', 'nombre', 'fecha_de_nacimiento', 'id_facultad', 'claustro'])
+        self.assertEqual([fila[0] for fila in padron[1:]], [str(dni) for dni in range(101, 201)])
+        self.assertEqual(padron[1][1], u'Empadronado Ñandú 101')
+        self.assertEqual(self.leer_csv('afiliado')[1:], [['107', str(id_agrupacion_politica)]])
+
+        # El registro de cambios se vacía salvo la última entrada
+        marca = self.registro()[-1]
+        self.assertEqual(self.registro(), [marca])
+
+        # Sin cambios sólo queda el encabezado, en un archivo aparte que no pisa la exportación completa
+        resultado = exportar.exportar(self.bd, self.destino, estado=estado, procesos=2)
+        self.assertEqual(resultado['empadronado'], 0)
+        self.assertEqual(self.leer_csv('empadronado', marca), padron[:1])
+        self.assertEqual(self.leer_csv('empadronado'), padron)
+
+        # Las filas nuevas (también las de clave menor que las ya exportadas) y las modificadas, incluidas
+        # las de un upsert
+        otra = self.model.crear_agrupacion_politica(u'Otra agrupación')
+        self.model.empadronar_alumno(500, 'Nuevo')
+        self.model.empadronar_alumno(50, 'Nuevo con DNI menor')
+        self.model.afiliar_a_agrupacion(107, otra)
+        self.model.connector.query_without_result("UPDATE empadronado SET nombre = 'Cambiado' WHERE dni = 105")
+        resultado = exportar.exportar(self.bd, self.destino, ['empadronado', 'afiliado', 'resumen_periodo'],
+                                      estado=estado, procesos=1)
+        self.assertEqual(resultado, {'empadronado': 3, 'afiliado': 1, 'resumen_periodo': 0})
+        nueva_marca = self.registro()[-1]
+        self.assertEqual([fila[:2] for fila in self.leer_csv('empadronado', nueva_marca)[1:]],
+                         [['50', 'Nuevo con DNI menor'], ['105', 'Cambiado'], ['500', 'Nuevo']])
+        self.assertEqual(self.leer_csv('afiliado', nueva_marca)[1:], [['107', str(otra)]])
+
+        # Las tablas que no se exportaron conservan su marca, y con ella las entradas del registro que
+        # todavía no exportaron
+        with open(estado) as f:
+            self.assertEqual(sorted(json.load(f)), sorted(exportar.TABLAS))
+        self.assertEqual(self.registro()[0], marca)
+        resultado = exportar.exportar(self.bd, self.destino, estado=estado, procesos=2)
+        self.assertEqual(resultado['estudiante'], 2)
+        self.assertEqual(self.registro(), [nueva_marca])
+        self.model.empadronar_alumno(600, 'Después de podar')
+        self.assertGreater(self.registro()[-1], nueva_marca)
+
+        # Sin estado se exporta todo
+        self.assertEqual(exportar.exportar(self.bd, self.destino, ['empadronado'])['empadronado'], 103)
+
+    def test_exportar_tabla_en_memoria_constante(self):
+        n = 20000
+        self.model.empadronar_many((dni, u'Empadronado Ñandú %d' % dni, dni % 3) for dni in range(1, n + 1))
+        tracemalloc.start()
+        try:
+            filas, marca = exportar.exportar_tabla(self.bd, 'empadronado', self.destino, tamano_bloque=1000)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(filas, n)
+        with self.model.connector as c:
+            c.execute('SELECT MAX(secuencia) FROM exportacion_modificadas')
+            self.assertEqual(c.fetchone(), (marca,))
+        # Todas las filas juntas ocuparían varios MB
+        self.assertLess(pico, 1024 * 1024)
+        self.assertEqual(len(self.leer_csv('empadronado')), n + 1)
+        self.assertEqual(os.listdir(self.destino), ['empadronado.csv.gz'])
+
+    def test_tablas_y_formatos_invalidos(self):
+        self.assertRaises(ValueError, exportar.exportar, self.bd, self.destino, ['no_existe'])
+        self.assertRaises(ValueError, exportar.exportar, self.bd, self.destino, formatos=('xlsx',))
+        if exportar.pa is None:
+            self.assertRaises(ValueError, exportar.exportar, self.bd, self.destino, formatos=(exportar.FORMATO_ARROW,))
+
+    @unittest.skipIf(exportar.pa is None, 'pyarrow no está instalado')
+    def test_exportar_arrow_y_parquet(self):
+        self.model.empadronar_many((dni, u'Empadronado %d' % dni, dni % 3) for dni in range(1, 101))
+        exportar.exportar(self.bd, self.destino, ['empadronado'],
+                          formatos=(exportar.FORMATO_ARROW, exportar.FORMATO_PARQUET), tamano_bloque=30)
+        with exportar.pa.ipc.open_file(exportar.ruta_exportacion(self.destino, 'empadronado', exportar.FORMATO_ARROW)) as f:
+            tabla = f.read_all()
+        self.assertEqual(tabla.column('dni').to_pylist(), list(range(1, 101)))
+        self.assertEqual(str(tabla.schema.field('nombre').type), 'string')
+        tabla = exportar.pq.read_table(exportar.ruta_exportacion(self.destino, 'empadronado', exportar.FORMATO_PARQUET))
+        self.assertEqual(tabla.column('claustro').to_pylist(), [dni % 3 for dni in range(1, 101)])
+
+class TestModelAsync(unittest.TestCase):
+
+    # El modelo se crea en el hilo escritor, que es el único que puede usar la conexión
+    def crear_modelo(self):
+        self.listo.wait()
+        connector = api.bd_connector()
+        connector.connect(bd=':memory:')
+        esquema.clonar(connector.conn)
+        return api.model_test(connector)
+
+    def test_operaciones_concurrentes_comparten_el_commit(self):
+        self.listo = threading.Event()
+        model = tp_async.model_async(self.crear_modelo)
+
+        async def empadronar():
+            # Mientras el escritor no arranca se encolan todas las operaciones
+            tareas = [asyncio.ensure_future(model.empadronar_alumno(dni, 'Alumno')) for dni in range(50)]
+            tareas.append(asyncio.ensure_future(model.empadronar_alumno(0, 'Repetido')))
+            await asyncio.sleep(0)
+            self.listo.set()
+            return await asyncio.gather(*tareas, return_exceptions=True)
+
+        resultados = asyncio.run(empadronar())
+        composicion = asyncio.run(model.composicion_consejo(2014))
+        model.cerrar()
+
+        # El DNI repetido sólo hace fallar a su propia llamada
+        self.assertEqual(resultados[:50], [None] * 50)
+        self.assertIsInstance(resultados[50], IntegrityError)
+        self.assertEqual(composicion.periodo, 2014)
+        self.assertEqual(model.grupos, 2)
+
+    def test_llamadas_fallan_si_muere_el_escritor(self):
+        def crear_modelo():
+            self.listo.wait()
+            raise OperationalError('unable to open database file')
+
+        self.listo = threading.Event()
+        model = tp_async.model_async(crear_modelo)
+
+        async def llamar():
+            # La llamada encolada antes de que muera el escritor y las posteriores fallan con su error
+            pendiente = asyncio.ensure_future(model.crear_agrupacion_politica(u'Agrupación'))
+            await asyncio.sleep(0)
+            self.listo.set()
+            with self.assertRaises(OperationalError):
+                await asyncio.wait_for(pendiente, 5)
+            with self.assertRaises(OperationalError):
+                await asyncio.wait_for(model.crear_agrupacion_politica(u'Agrupación'), 5)
+
+        asyncio.run(llamar())
+        model.cerrar()
+        self.assertIsInstance(model.error, OperationalError)
+
+    def test_varios_loops_y_loops_cerrados(self):
+        self.listo = threading.Event()
+        self.listo.set()
+        model = tp_async.model_async(self.crear_modelo, tamano_cola=2)
+
+        # Un loop que se cierra antes de recibir su resultado no frena al escritor
+        loop = asyncio.new_event_loop()
+        futuro = loop.create_future()
+        loop.close()
+        model.cola.put((loop, futuro, 'crear_agrupacion_politica', (u'Agrupación',), {}))
+
+        # El límite de llamadas pendientes vale en cada loop, aunque sean varios
+        async def crear(cantidad):
+            return await asyncio.gather(*[model.crear_agrupacion_politica(u'Agrupación %d' % i) for i in range(cantidad)])
+        self.assertEqual(len(asyncio.run(crear(5))), 5)
+        self.assertEqual(len(asyncio.run(crear(5))), 5)
+        model.cerrar()
+        self.assertIsNone(model.error)
+
 if __name__ == '__main__':
-    suite = unittest.TestLoader().loadTestsFromTestCase(TestModel)
+    suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
     unittest.TextTestRunner(verbosity=2).run(suite)
@@ -1,11 +1,30 @@
 # coding: utf-8
 
+import csv
+import heapq
+import os
+import queue
 import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from fractions import Fraction
+from itertools import groupby
+from urllib.request import pathname2url
 
 # Valores de la columna 'claustro' de la tabla 'empadronado', 'consejero_directivo' y 'consejero_superior'
 CLAUSTRO_ESTUDIANTES = 0
 CLAUSTRO_GRADUADOS   = 1
 CLAUSTRO_PROFESORES  = 2
+CLAUSTROS = (CLAUSTRO_ESTUDIANTES, CLAUSTRO_GRADUADOS, CLAUSTRO_PROFESORES)
+
+# Cantidad de bancas del consejo directivo que le corresponden a cada claustro
+BANCAS_CONSEJO_DIRECTIVO = {
+    CLAUSTRO_PROFESORES:  8,
+    CLAUSTRO_GRADUADOS:   4,
+    CLAUSTRO_ESTUDIANTES: 4,
+}
 
 # Valores de la columna 'universidad' de la tabla 'graduado'
 UBA              = 0
@@ -18,68 +37,845 @@ CARGO_PROFESOR_ADJUNTO = 1
 # Valor por defecto para la columna 'nombre' de la tabla 'facultad'
 NOMBRE_FACULTAD = 'Facultad de Ciencias Exactas y Naturales'
 
+# Base que usa model_test si no se le pasa un conector (relativa a este archivo, no al directorio actual)
+BD_FACULTAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'db', 'facultad.db')
+
 # Valor por defecto para la columna 'nacionalidad_universidad' de la tabla 'profesor'
 NACIONALIDAD_UNIVERSIDAD_PROFESOR = 'Argentina'
 
+# Motivos por los que la carga masiva del padrón puede rechazar un DNI
+RECHAZO_DNI_INVALIDO      = 'dni_invalido'
+RECHAZO_DNI_DUPLICADO     = 'dni_duplicado'
+RECHAZO_CLAUSTRO_INVALIDO = 'claustro_invalido'
+RECHAZO_FILA_INCOMPLETA   = 'fila_incompleta'
+
+# Cantidad de conexiones por defecto de bd_connector_pool y segundos que se espera por una conexión
+# libre (o por el lock de escritura de SQLite) antes de fallar
+TAMANO_POOL = 8
+ESPERA_POOL = 30
+
+# Cantidad de filas que se insertan por transacción en la carga masiva del padrón
+TAMANO_LOTE_PADRON = 5000
+
+# Cantidad máxima de parámetros por consulta 'IN (...)' (SQLite viejos admiten hasta 999)
+MAX_PARAMETROS_CONSULTA = 500
+
+# Resultado de una carga masiva: cantidad de filas insertadas y lista de pares (dni, motivo) rechazados
+resultado_empadronamiento = namedtuple('resultado_empadronamiento', ['insertados', 'rechazados'])
+
+# Cantidad de DNIs cuyo claustro recuerda cada model_test
+TAMANO_CACHE_CLAUSTRO = 10000
+
+# Composición del consejo directivo de un período: 'consejeros' tiene, para cada claustro, la lista de
+# consejeros en el orden en que se asignaron las bancas, y 'bancas_por_agrupacion' la cantidad de bancas
+# que obtuvo cada agrupación en cada claustro
+composicion_consejo_directivo = namedtuple('composicion_consejo_directivo',
+                                           ['periodo', 'consejeros', 'bancas_por_agrupacion'])
+consejero = namedtuple('consejero', ['dni', 'id_agrupacion_politica', 'claustro'])
+
+# Elecciones cuyos resultados puede consultar la API (columna 'eleccion' de la tabla 'recuento_votos')
+ELECCION_DECANO           = 0
+ELECCION_CONSEJO_SUPERIOR = 1
+ELECCION_RECTOR           = 2
+
+# Votos recibidos por un candidato
+resultado = namedtuple('resultado', ['dni', 'votos'])
+
+# Agrupaciones que se presentaron en un período y total de votos que recibieron entre todas
+votos_periodo = namedtuple('votos_periodo', ['periodo', 'agrupaciones', 'votos_recibidos'])
+
+# Fila del padrón
+empadronado = namedtuple('empadronado', ['dni', 'nombre', 'claustro'])
+
+# Empadronados por página en las búsquedas por nombre
+TAMANO_PAGINA_BUSQUEDA = 20
+
+# Filas que bd_connector.iterar() trae de la base por vez
+TAMANO_BLOQUE_LECTURA = 1000
+
+# Cargos que se eligen en cada período, con el nombre de su tabla
+CARGOS = ('consejero_directivo', 'decano', 'consejero_superior', 'rector')
+
+# Persona registrada en un cargo durante el período, que dura las fechas [inicio, fin)
+cargo_en_funciones = namedtuple('cargo_en_funciones', ['cargo', 'dni', 'periodo', 'inicio', 'fin'])
+
+# Devuelve el período electoral correspondiente a una fecha (un date/datetime, un texto 'AAAA-MM-DD' o
+# directamente el año) cuando no hay un intervalo de calendario_electoral que la contenga: el de su año
+def periodo_de_fecha(fecha):
+    if hasattr(fecha, 'year'):
+        return fecha.year
+    if isinstance(fecha, str):
+        return int(fecha[:4])
+    return int(fecha)
+
+# Fila (dni, nombre, claustro) para las cargas masivas de un solo claustro. Una fila con menos de dos
+# columnas (ej.: una línea del CSV sin nombre) se deja como está, para que se rechace como incompleta.
+def con_claustro(fila, claustro):
+    if len(fila) < 2:
+        return tuple(fila)
+    return (fila[0], fila[1], claustro)
+
+# Fecha como texto 'AAAA-MM-DD', que es como se guardan los intervalos de calendario_electoral. Un entero
+# se toma como el 1 de enero de ese año; un texto se usa tal cual.
+def fecha_iso(fecha):
+    if hasattr(fecha, 'year'):
+        return '%04d-%02d-%02d' % (fecha.year, fecha.month, fecha.day)
+    if isinstance(fecha, int):
+        return '%04d-01-01' % fecha
+    return fecha
+
+# Reparte 'bancas' entre las agrupaciones según el sistema D'Hondt. 'votos' es un dict id -> votos y
+# 'topes' (opcional) limita las bancas de cada agrupación a la cantidad de candidatos que presentó.
+# Devuelve la lista de ids en el orden en que ganaron cada banca. Los empates en el cociente los gana
+# la agrupación con más votos y, a igualdad de votos, la de menor id.
+def repartir_bancas_dhondt(votos, bancas, topes=None):
+    heap = [(-Fraction(v), -v, id, 1) for id, v in votos.items()
+            if v > 0 and (topes is None or topes.get(id, 0) > 0)]
+    heapq.heapify(heap)
+    asignadas = []
+    while heap and len(asignadas) < bancas:
+        _, menos_votos, id, divisor = heapq.heappop(heap)
+        asignadas.append(id)
+        if topes is None or divisor < topes[id]:
+            heapq.heappush(heap, (Fraction(menos_votos, divisor + 1), menos_votos, id, divisor + 1))
+    return asignadas
+
+# Cache LRU acotado que cuenta aciertos y fallos. Es seguro usarlo desde varios hilos.
+class cache_lru():
+
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self.datos = OrderedDict()
+        self.lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    # Devuelve el valor guardado para la clave o, si no está, lo calcula con calcular(clave) y lo guarda
+    def obtener(self, clave, calcular):
+        with self.lock:
+            if clave in self.datos:
+                self.datos.move_to_end(clave)
+                self.aciertos += 1
+                return self.datos[clave]
+            self.fallos += 1
+        valor = calcular(clave)
+        with self.lock:
+            self.datos[clave] = valor
+            if len(self.datos) > self.capacidad:
+                self.datos.popitem(last=False)
+        return valor
+
+    def invalidar(self, clave):
+        with self.lock:
+            self.datos.pop(clave, None)
+
+    def vaciar(self):
+        with self.lock:
+            self.datos.clear()
+
+# Consulta temporal 'nombre' (ver CONDICIONES_CARGOS) de un cargo o de todos (cargo=None)
+def sentencia_cargos(nombre, cargo):
+    if cargo is not None and cargo not in CARGOS:
+        raise ValueError('Cargo desconocido: %s' % cargo)
+    return SENTENCIAS['%s_%s' % (nombre, cargo or 'todos')]
+
+# Consulta FTS5 que busca cada palabra del texto como prefijo. Las palabras van entre comillas para que
+# los caracteres especiales de FTS5 (comillas, '*', '-', AND, OR, ...) se tomen como texto.
+def consulta_nombre(texto):
+    return ' '.join('"%s"*' % palabra.replace('"', '""') for palabra in texto.split())
+
+# Lee un padrón en formato CSV (dni,nombre[,claustro]) de a una fila por vez, salteando el encabezado si lo hubiera
+def leer_padron_csv(ruta):
+    with open(ruta) as f:
+        for i, fila in enumerate(csv.reader(f)):
+            if not fila or (i == 0 and not fila[0].strip().isdigit()):
+                continue
+            yield fila
+
+# Registro central de las sentencias SQL que ejecuta la API, por nombre. 'empadronados_existentes' es una
+# plantilla: hay que completarla con tantos '?' como DNIs se busquen.
+SENTENCIAS = {
+    # Padrón electoral
+    'buscar_facultad': 'SELECT id FROM facultad WHERE nombre = ?',
+    'insertar_facultad': 'INSERT INTO facultad (nombre) VALUES (?)',
+    'insertar_empadronado': '''INSERT INTO empadronado (dni, nombre, id_facultad, claustro)
+                               VALUES (?, ?, ?, ?)''',
+    'empadronados_existentes': 'SELECT dni FROM empadronado WHERE dni IN (%s)',
+    # Los lotes de empadronar_many pasan por una tabla temporal para insertarse con una sola sentencia
+    'crear_lote_empadronados': '''CREATE TEMP TABLE IF NOT EXISTS empadronado_lote (
+                                      dni INTEGER PRIMARY KEY, nombre TEXT, id_facultad INTEGER, claustro INTEGER)''',
+    'insertar_lote_empadronados': '''INSERT INTO empadronado_lote (dni, nombre, id_facultad, claustro)
+                                     VALUES (?, ?, ?, ?)''',
+    'copiar_lote_empadronados': '''INSERT INTO empadronado (dni, nombre, id_facultad, claustro)
+                                   SELECT dni, nombre, id_facultad, claustro FROM empadronado_lote''',
+    'vaciar_lote_empadronados': 'DELETE FROM empadronado_lote',
+    'buscar_claustro': 'SELECT claustro FROM empadronado WHERE dni = ?',
+    'listar_empadronados': 'SELECT dni, nombre, claustro FROM empadronado ORDER BY dni',
+    'listar_empadronados_claustro': 'SELECT dni, nombre, claustro FROM empadronado WHERE claustro = ? ORDER BY dni',
+    # Los nombres que los triggers de facultad.sql todavía no pasaron al índice de texto completo
+    'hay_nombres_sin_indexar': 'SELECT 1 FROM empadronado_nombre_pendiente LIMIT 1',
+    'indexar_nombres_pendientes': '''INSERT INTO empadronado_nombre (rowid, nombre)
+                                     SELECT e.dni, e.nombre FROM empadronado_nombre_pendiente
+                                     JOIN empadronado e ON e.dni = empadronado_nombre_pendiente.dni''',
+    'vaciar_nombres_pendientes': 'DELETE FROM empadronado_nombre_pendiente',
+    # La página se elige sólo con el índice y después se buscan sus filas en 'empadronado'
+    'buscar_empadronados_por_nombre': '''SELECT e.dni, e.nombre, e.claustro
+                                         FROM (SELECT rowid, rank FROM empadronado_nombre
+                                               WHERE empadronado_nombre MATCH ?
+                                               ORDER BY rank, rowid
+                                               LIMIT ? OFFSET ?) pagina
+                                         JOIN empadronado e ON e.dni = pagina.rowid
+                                         ORDER BY pagina.rank, pagina.rowid''',
+    'insertar_estudiante': '''INSERT INTO estudiante (dni, fecha_inscripcion)
+                              VALUES (?, strftime('%s', 'now'))''',
+    'insertar_graduado': '''INSERT INTO graduado (dni, universidad)
+                            VALUES (?, ?)''',
+    'insertar_profesor': '''INSERT INTO profesor (dni, nacionalidad_universidad, cargo)
+                            VALUES (?, ?, ?)''',
+
+    # Consejo directivo
+    'insertar_agrupacion_politica': 'INSERT INTO agrupacion_politica (nombre) VALUES (?)',
+    'insertar_calendario_electoral': 'INSERT OR IGNORE INTO calendario_electoral (periodo) VALUES (?)',
+    'insertar_votos_agrupacion_politica': '''INSERT INTO agrupacion_politica_se_presenta_durante_calendario_electoral
+                                             (id_agrupacion_politica, periodo, votos_recibidos)
+                                             VALUES (?, ?, ?)''',
+    'insertar_consejero_directivo': '''INSERT INTO consejero_directivo (dni, periodo, id_agrupacion_politica, claustro)
+                                       VALUES (?, ?, ?, ?)''',
+    'consejeros_directivos_con_votos': '''SELECT cd.claustro, cd.id_agrupacion_politica, ap.votos_recibidos, cd.dni
+                                          FROM consejero_directivo cd
+                                          JOIN agrupacion_politica_se_presenta_durante_calendario_electoral ap
+                                            ON ap.id_agrupacion_politica = cd.id_agrupacion_politica AND ap.periodo = cd.periodo
+                                          WHERE cd.periodo = ?
+                                          ORDER BY cd.claustro, cd.id_agrupacion_politica, cd.rowid''',
+    'listar_consejeros_directivos': '''SELECT dni, id_agrupacion_politica, claustro FROM consejero_directivo
+                                       WHERE periodo = ?
+                                       ORDER BY claustro, id_agrupacion_politica, dni''',
+    'afiliar_a_agrupacion': '''INSERT INTO afiliado (dni, id_agrupacion_politica) VALUES (?, ?)
+                               ON CONFLICT(dni) DO UPDATE SET id_agrupacion_politica = excluded.id_agrupacion_politica''',
+    'fijar_votos_candidato_a_consejero': '''INSERT INTO candidato_a_consejero (dni, periodo, votos) VALUES (?, ?, ?)
+                                            ON CONFLICT(dni, periodo) DO UPDATE SET votos = excluded.votos''',
+
+    # Decano
+    'insertar_decano': 'INSERT INTO decano (dni, periodo) VALUES (?, ?)',
+    'insertar_voto_a_decano': '''INSERT INTO voto_a_decano
+                                 (dni_decano, periodo_decano, dni_consejero_directivo, periodo_consejero_directivo)
+                                 VALUES (?, ?, ?, ?)''',
+
+    # Consejo superior
+    'insertar_consejero_superior': '''INSERT INTO consejero_superior (dni, periodo, claustro)
+                                      VALUES (?, ?, ?)''',
+    'insertar_voto_a_consejero_superior': '''INSERT INTO voto_a_consejero_superior
+                                             (dni_consejero_superior, periodo_consejero_superior, dni_consejero_directivo, periodo_consejero_directivo)
+                                             VALUES (?, ?, ?, ?)''',
+
+    # Rector
+    'insertar_rector': 'INSERT INTO rector (dni, periodo) VALUES (?, ?)',
+    'insertar_voto_de_consejero_directivo_a_rector': '''INSERT INTO rector_fue_votado_por_consejero_directivo
+                                                        (dni_rector, periodo_rector, dni_consejero_directivo, periodo_consejero_directivo)
+                                                        VALUES (?, ?, ?, ?)''',
+    'insertar_voto_de_consejero_superior_a_rector': '''INSERT INTO rector_fue_votado_por_consejero_superior
+                                                       (dni_rector, periodo_rector, dni_consejero_superior, periodo_consejero_superior)
+                                                       VALUES (?, ?, ?, ?)''',
+    'insertar_voto_de_decano_a_rector': '''INSERT INTO rector_fue_votado_por_decano
+                                           (dni_rector, periodo_rector, dni_decano, periodo_decano)
+                                           VALUES (?, ?, ?, ?)''',
+
+    # Resultados
+    'resultado_decano': '''SELECT d.dni, COUNT(v.dni_decano)
+                           FROM decano d
+                           LEFT JOIN voto_a_decano v
+                             ON v.dni_decano = d.dni AND v.periodo_decano = d.periodo
+                           WHERE d.periodo = ?
+                           GROUP BY d.dni
+                           ORDER BY 2 DESC, d.dni''',
+    'resultado_consejo_superior': '''SELECT cs.dni, COUNT(v.dni_consejero_superior)
+                                     FROM consejero_superior cs
+                                     LEFT JOIN voto_a_consejero_superior v
+                                       ON v.dni_consejero_superior = cs.dni AND v.periodo_consejero_superior = cs.periodo
+                                     WHERE cs.periodo = ?
+                                     GROUP BY cs.dni
+                                     ORDER BY 2 DESC, cs.dni''',
+    'resultado_rector': '''SELECT r.dni, COUNT(v.dni_rector)
+                           FROM rector r
+                           LEFT JOIN (SELECT dni_rector FROM rector_fue_votado_por_consejero_directivo
+                                      WHERE periodo_rector = ?
+                                      UNION ALL
+                                      SELECT dni_rector FROM rector_fue_votado_por_consejero_superior
+                                      WHERE periodo_rector = ?
+                                      UNION ALL
+                                      SELECT dni_rector FROM rector_fue_votado_por_decano
+                                      WHERE periodo_rector = ?) v
+                             ON v.dni_rector = r.dni
+                           WHERE r.periodo = ?
+                           GROUP BY r.dni
+                           ORDER BY 2 DESC, r.dni''',
+    'leer_recuento_votos': '''SELECT dni, votos FROM recuento_votos
+                              WHERE eleccion = ? AND periodo = ?
+                              ORDER BY votos DESC, dni''',
+    'resultado_candidatos_a_consejero': '''SELECT dni, votos FROM candidato_a_consejero
+                                           WHERE periodo = ?
+                                           ORDER BY votos DESC, dni''',
+    'leer_resumen_periodo': 'SELECT periodo, agrupaciones, votos_recibidos FROM resumen_periodo WHERE periodo = ?',
+    'leer_resumen_consejo_directivo': '''SELECT claustro, id_agrupacion_politica, consejeros FROM resumen_consejo_directivo
+                                         WHERE periodo = ?''',
+
+    # Calendario electoral
+    'fijar_intervalo_periodo': '''INSERT INTO calendario_electoral (periodo, inicio, fin) VALUES (?, ?, ?)
+                                  ON CONFLICT (periodo) DO UPDATE SET inicio = excluded.inicio, fin = excluded.fin''',
+    'buscar_periodo_en_fecha': '''SELECT periodo FROM calendario_electoral
+                                  WHERE inicio <= ? AND fin > ?
+                                  ORDER BY inicio DESC
+                                  LIMIT 1''',
+}
+
+# Consultas temporales sobre los cargos, para cada cargo y para todos juntos (sufijo '_todos'):
+# - 'cargos_en_intervalo': períodos que se superponen con las fechas [desde, hasta] (hasta, desde). Un
+#   punto en el tiempo es el intervalo de un solo día. El índice de calendario_electoral acota los
+#   períodos y el de cada cargo por período trae sus filas.
+# - 'historial_cargos' y 'historial_cargos_dni': todos los períodos, o los de un DNI (por la clave
+#   primaria de cada cargo), ordenados por fecha
+CONSULTA_CARGO = '''SELECT '%s', t.dni, c.periodo, c.inicio, c.fin
+                    FROM calendario_electoral c JOIN %s t ON t.periodo = c.periodo
+                    WHERE %s'''
+CONDICIONES_CARGOS = {
+    'cargos_en_intervalo': 'c.inicio <= ? AND c.fin > ?',
+    'historial_cargos': '1',
+    'historial_cargos_dni': 't.dni = ?',
+}
+
+# Arma las consultas de CONDICIONES_CARGOS de cada cargo y la de todos juntos
+def consultas_cargos():
+    sentencias = {}
+    for nombre, condicion in CONDICIONES_CARGOS.items():
+        for cargo in CARGOS:
+            sentencias['%s_%s' % (nombre, cargo)] = CONSULTA_CARGO % (cargo, cargo, condicion) + ' ORDER BY 4, 2'
+        sentencias['%s_todos' % nombre] = ' UNION ALL '.join(CONSULTA_CARGO % (cargo, cargo, condicion)
+                                                             for cargo in CARGOS) + ' ORDER BY 4, 1, 2'
+    return sentencias
+
+SENTENCIAS.update(consultas_cargos())
+
+# Sentencias preparadas que guarda cada conexión: alcanza para todo el registro y deja lugar para
+# consultas ad hoc (ej.: las búsquedas 'IN (...)' de distinto tamaño)
+TAMANO_CACHE_SENTENCIAS = len(SENTENCIAS) + 32
+
+# Perfiles de configuración de las conexiones. Cada uno fija los mismos PRAGMAs en todas las conexiones
+# que se abren con él (journal_mode va primero porque no se puede cambiar dentro de una transacción):
+# - 'online': uso normal de la API. WAL con synchronous=NORMAL no pierde consistencia ante un corte de
+#   luz (a lo sumo se pierden las últimas transacciones) y no hace fsync en cada commit.
+# - 'bulk-load': cargas masivas que se pueden rehacer desde cero. synchronous=OFF no espera a que los datos
+#   lleguen al disco, así que un corte de luz durante la carga puede dejar la base inutilizable.
+# - 'read-only-analytics': consultas de reportes; la conexión no puede escribir (query_only).
+# cache_size negativo está en KiB; mmap_size en bytes.
+PERFIL_CARGA_MASIVA = 'bulk-load'
+PERFIL_ONLINE       = 'online'
+PERFIL_ANALISIS     = 'read-only-analytics'
+PERFILES = {
+    PERFIL_CARGA_MASIVA: (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'OFF'),
+        ('cache_size', -262144),
+        ('mmap_size', 268435456),
+        ('temp_store', 'MEMORY'),
+        ('foreign_keys', 1),
+    ),
+    PERFIL_ONLINE: (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -65536),
+        ('mmap_size', 268435456),
+        ('temp_store', 'MEMORY'),
+        ('foreign_keys', 1),
+    ),
+    PERFIL_ANALISIS: (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -262144),
+        ('mmap_size', 1073741824),
+        ('temp_store', 'MEMORY'),
+        ('foreign_keys', 1),
+        ('query_only', 1),
+    ),
+}
+
+# Aplica a la conexión los PRAGMAs del perfil
+def aplicar_perfil(conn, perfil):
+    if perfil not in PERFILES:
+        raise ValueError('Perfil de conexión desconocido: %s' % perfil)
+    for pragma, valor in PERFILES[perfil]:
+        conn.execute('PRAGMA %s = %s' % (pragma, valor)).fetchall()
+
+# Filas por sentencia y segundos que model_test.lote() acumula como máximo antes de enviarlas
+TAMANO_LOTE_SENTENCIAS    = 1000
+INTERVALO_LOTE_SENTENCIAS = 1.0
+
 # Clase para generar conexiones con la BD y ejecutar queries
 # se da un ejemplo incompleto con el motor SQLite, pueden  adaptarlo
 # a cualquiera de los motores permitidos
 class bd_connector():
 
-    # Funcion que crea la conexion con su BD
-    def connect(self, port='', username='', password='', bd='bd', host='localhost'):
-        self.conn = sqlite3.connect(bd)
+    # Instrumentación activa (ver instrumentacion.py); None si está deshabilitada
+    instrumentacion = None
+
+    # Funcion que crea la conexion con su BD, configurada según 'perfil' (ver PERFILES)
+    def connect(self, port='', username='', password='', bd='bd', host='localhost', perfil=PERFIL_ONLINE):
+        self.conn = sqlite3.connect(bd, cached_statements=TAMANO_CACHE_SENTENCIAS)
+        aplicar_perfil(self.conn, perfil)
+        self.profundidad = 0
+        self.al_deshacer = []
     
     # Funcion que ejecuta queries sin esperar resultado y las comitea
     def query_without_result(self, query, parameters=()):
         with self as c:
             c.execute(query, parameters)
 
+    # Devuelve un generador de las filas de la consulta, que se traen de a 'tamano_bloque' con fetchmany:
+    # la memoria usada no depende de la cantidad de filas. Si se indica 'fila' (ej.: un namedtuple) cada
+    # fila se convierte con fila._make(). La consulta queda abierta hasta agotar o cerrar el generador.
+    def iterar(self, query, parameters=(), tamano_bloque=TAMANO_BLOQUE_LECTURA, fila=None):
+        with self as c:
+            c.execute(query, parameters)
+            try:
+                filas = c.fetchmany(tamano_bloque)
+                while filas:
+                    if fila is None:
+                        yield from filas
+                    else:
+                        yield from map(fila._make, filas)
+                    filas = c.fetchmany(tamano_bloque)
+            except GeneratorExit:
+                # Cerrar el generador antes de terminar no es un error: no hay nada que deshacer
+                return
+
+    # Unidad de trabajo: todo lo que se ejecute dentro del bloque (incluidos los métodos de model_test)
+    # se comitea junto al salir, o se deshace junto si hay una excepción. Los bloques anidados usan
+    # SAVEPOINTs, de modo que un error interno sólo deshace lo hecho en ese bloque.
+    @contextmanager
+    def transaction(self):
+        if self.profundidad == 0:
+            if not self.conn.in_transaction:
+                self.conn.execute('BEGIN IMMEDIATE')
+        else:
+            savepoint = 'sp%d' % self.profundidad
+            self.conn.execute('SAVEPOINT ' + savepoint)
+        self.profundidad += 1
+        try:
+            yield self
+        except BaseException:
+            self.profundidad -= 1
+            if self.profundidad == 0:
+                self.conn.rollback()
+            elif self.conn.in_transaction:
+                self.conn.execute('ROLLBACK TO ' + savepoint)
+                self.conn.execute('RELEASE ' + savepoint)
+            self.notificar_rollback()
+            raise
+        else:
+            self.profundidad -= 1
+            if self.profundidad == 0:
+                self.comitear()
+            else:
+                self.conn.execute('RELEASE ' + savepoint)
+
     def __enter__(self):
         self.cur = self.conn.cursor()
+        if self.instrumentacion is not None:
+            self.cur = self.instrumentacion.envolver(self.cur, self.conn)
         return self.cur
 
+    # Dentro de una transacción abierta con transaction() no se comitea ni se deshace nada:
+    # de eso se encarga el bloque que la abrió
     def __exit__(self, exc_type, exc_value, traceback):
+        if self.profundidad > 0:
+            return
         if exc_type is None and exc_value is None and traceback is None:
+            self.comitear()
+        else:
+            self.conn.rollback()
+            self.notificar_rollback()
+
+    def comitear(self):
+        if self.instrumentacion is None:
+            self.conn.commit()
+        else:
+            inicio = time.perf_counter()
             self.conn.commit()
+            self.instrumentacion.commit(time.perf_counter() - inicio)
+
+    # Habilita la instrumentación (o la deshabilita con None): desde ahora se miden todas las sentencias
+    # que se ejecuten dentro de bloques 'with' y todos los commits
+    def instrumentar(self, instrumentacion):
+        self.instrumentacion = instrumentacion
+
+    # Avisa a los interesados (ej.: los caches de model_test) que se deshicieron cambios
+    def notificar_rollback(self):
+        for f in self.al_deshacer:
+            f()
+
+    # El recolector de basura puede destruir el conector desde cualquier hilo (model_test y su conector
+    # forman un ciclo por al_deshacer); SQLite no deja cerrar la conexión desde otro hilo y en ese caso
+    # se cierra sola al liberarse
+    def __del__(self):
+        try:
+            self.cerrar()
+        except sqlite3.ProgrammingError:
+            pass
+
+    # Cierra la conexión. Hace falta llamarlo explícitamente si el conector se usa desde un hilo distinto
+    # del que lo va a destruir, porque SQLite no permite cerrarla desde otro hilo.
+    def cerrar(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+# Conector para compartir un mismo model_test entre varios hilos. Cada hilo toma una conexión propia
+# del pool al entrar al primer bloque (with / transaction()) y la devuelve al salir del último, así que
+# nunca hay más de 'tamano' conexiones abiertas. Antes de reusar una conexión se verifica que siga
+# respondiendo. Las conexiones usan WAL para que las lecturas no bloqueen a los escritores.
+class bd_connector_pool(bd_connector):
+
+    def connect(self, port='', username='', password='', bd='bd', host='localhost',
+                tamano=TAMANO_POOL, espera=ESPERA_POOL, perfil=PERFIL_ONLINE):
+        if perfil not in PERFILES:
+            raise ValueError('Perfil de conexión desconocido: %s' % perfil)
+        self.bd = bd
+        self.perfil = perfil
+        self.espera = espera
+        self.libres = queue.LifoQueue()
+        self.cupos = threading.BoundedSemaphore(tamano)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.abiertas = 0
+        self.al_deshacer = []
+
+    # El estado de la conexión es propio de cada hilo
+    @property
+    def conn(self):
+        try:
+            return self.local.conn
+        except AttributeError:
+            raise sqlite3.ProgrammingError('El hilo no tomó ninguna conexión del pool.')
+
+    @property
+    def cur(self):
+        return self.local.cur
+
+    @cur.setter
+    def cur(self, cur):
+        self.local.cur = cur
+
+    @property
+    def profundidad(self):
+        return getattr(self.local, 'profundidad', 0)
+
+    @profundidad.setter
+    def profundidad(self, profundidad):
+        self.local.profundidad = profundidad
+
+    @contextmanager
+    def transaction(self):
+        self.tomar()
+        try:
+            with bd_connector.transaction(self) as t:
+                yield t
+        finally:
+            self.devolver()
+
+    def __enter__(self):
+        self.tomar()
+        try:
+            return bd_connector.__enter__(self)
+        except BaseException:
+            self.devolver()
+            raise
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            bd_connector.__exit__(self, exc_type, exc_value, traceback)
+        finally:
+            self.devolver()
 
     def __del__(self):
-        self.conn.close()
+        self.cerrar()
+
+    # Cierra las conexiones libres del pool
+    def cerrar(self):
+        while True:
+            try:
+                self.cerrar_conexion(self.libres.get_nowait())
+            except queue.Empty:
+                break
+
+    # Asigna una conexión al hilo actual (si no tenía una) hasta el devolver() correspondiente
+    def tomar(self):
+        usos = getattr(self.local, 'usos', 0)
+        if usos == 0:
+            self.local.conn = self.obtener_conexion()
+        self.local.usos = usos + 1
+
+    def devolver(self):
+        self.local.usos -= 1
+        if self.local.usos == 0:
+            conn = self.local.conn
+            del self.local.conn
+            if conn.in_transaction:
+                conn.rollback()
+            self.libres.put(conn)
+            self.cupos.release()
+
+    def obtener_conexion(self):
+        if not self.cupos.acquire(timeout=self.espera):
+            raise sqlite3.OperationalError('No hay conexiones libres en el pool.')
+        try:
+            while True:
+                try:
+                    conn = self.libres.get_nowait()
+                except queue.Empty:
+                    return self.abrir_conexion()
+                if self.conexion_sana(conn):
+                    return conn
+                self.cerrar_conexion(conn)
+        except BaseException:
+            self.cupos.release()
+            raise
+
+    def abrir_conexion(self):
+        conn = sqlite3.connect(self.bd, timeout=self.espera, check_same_thread=False,
+                               cached_statements=TAMANO_CACHE_SENTENCIAS)
+        aplicar_perfil(conn, self.perfil)
+        with self.lock:
+            self.abiertas += 1
+        return conn
+
+    def cerrar_conexion(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self.lock:
+            self.abiertas -= 1
+
+    @staticmethod
+    def conexion_sana(conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return not conn.in_transaction
+        except sqlite3.Error:
+            return False
+
+# Conector de sólo lectura para reportes. Abre la base con una URI 'mode=ro' (SQLite rechaza cualquier
+# escritura) y el perfil 'read-only-analytics', que lee las páginas con mmap. La base tiene que estar en
+# modo WAL (lo deja así cualquier conexión abierta con un perfil): así las lecturas nunca bloquean ni
+# frenan a los escritores. transaction() abre una instantánea: todas las consultas del bloque ven la base
+# tal como estaba al empezar, sin los cambios que se comiteen mientras tanto.
+class bd_connector_lectura(bd_connector):
+
+    def connect(self, port='', username='', password='', bd='bd', host='localhost', perfil=PERFIL_ANALISIS):
+        uri = 'file:%s?mode=ro' % pathname2url(os.path.abspath(bd))
+        self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=TAMANO_CACHE_SENTENCIAS)
+        modo = self.conn.execute('PRAGMA journal_mode').fetchone()[0]
+        if modo != 'wal':
+            self.conn.close()
+            self.conn = None
+            raise sqlite3.OperationalError('La base %s no está en modo WAL (journal_mode = %s).' % (bd, modo))
+        aplicar_perfil(self.conn, perfil)
+        self.profundidad = 0
+        self.al_deshacer = []
+
+    # La instantánea empieza con la primera lectura, así que se hace una enseguida
+    @contextmanager
+    def transaction(self):
+        if self.profundidad == 0:
+            self.conn.execute('BEGIN')
+            self.conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+        self.profundidad += 1
+        try:
+            yield self
+        finally:
+            self.profundidad -= 1
+            if self.profundidad == 0:
+                self.conn.rollback()
 
 # Clase para testear una subparte del modelo realizado. La subparte a
 # testear corresponde a lo referido en una sola facultad. Es por eso
 # que el set de funciones son pocas
 class model_test():
 
-    # Permite usar un conector distinto (ej.: a una base en memoria) desde los tests
-    def __init__(self, connector=None):
+    # Permite usar un conector distinto (ej.: a una base en memoria) desde los tests. Las consultas que
+    # no escriben (composicion_consejo, resultado_*) usan 'lector' si se indica (ej.: un bd_connector_lectura
+    # sobre la misma base), para no competir con las escrituras; sólo ven lo que ya está comiteado.
+    # Los empadronados se asignan a la facultad 'nombre_facultad' (se crea si no existe).
+    def __init__(self, connector=None, lector=None, nombre_facultad=NOMBRE_FACULTAD):
         if connector is not None:
             self.connector = connector
         else:
             self.connector = bd_connector()
-            self.connector.connect('../db/facultad')
+            self.connector.connect(BD_FACULTAD)
+        self.lector = lector if lector is not None else self.connector
+        self.nombre_facultad = nombre_facultad
+
+        # Composiciones del consejo directivo ya calculadas, por período
+        self.composiciones = {}
+
+        # Ver usar_recuento_materializado()
+        self.recuento_materializado = False
+
+        # El id de la facultad y el claustro de cada DNI casi nunca cambian: se leen una sola vez. Si se
+        # deshace una transacción se descarta todo, porque podría haber leído datos que ya no existen.
+        self.cache_facultad = cache_lru(1)
+        self.cache_claustro = cache_lru(TAMANO_CACHE_CLAUSTRO)
+        self.connector.al_deshacer.append(self.vaciar_caches)
+
+        # Ver lote(). Cada hilo tiene su propio lote: un mismo model_test se puede compartir entre hilos con
+        # un bd_connector_pool, y las escrituras de un hilo no deben quedar en el lote de otro.
+        self.local = threading.local()
+
+    @property
+    def pendientes(self):
+        return getattr(self.local, 'pendientes', None)
+
+    @pendientes.setter
+    def pendientes(self, pendientes):
+        self.local.pendientes = pendientes
+
+    @property
+    def nivel_atomico(self):
+        return getattr(self.local, 'nivel_atomico', 0)
+
+    @nivel_atomico.setter
+    def nivel_atomico(self, nivel_atomico):
+        self.local.nivel_atomico = nivel_atomico
 
     def execute_query(self, query, parameters=()):
-        self.connector.query_without_result(query, parameters)
+        if self.pendientes is not None:
+            self.encolar(query, parameters)
+        else:
+            self.connector.query_without_result(query, parameters)
+
+    # Ejecuta la sentencia con cada fila de parámetros, todas en una sola transacción (dentro de lote(),
+    # las encola juntas)
+    def execute_many(self, query, filas):
+        if self.pendientes is not None:
+            with self.atomico():
+                for parameters in filas:
+                    self.encolar(query, tuple(parameters))
+        else:
+            with self.connector.transaction():
+                with self.connector as c:
+                    c.executemany(query, filas)
+
+    # Mientras el bloque está abierto, execute_query no ejecuta nada: acumula los parámetros de cada
+    # sentencia y los envía juntos con executemany cuando alguna junta 'tamano' filas, cuando pasan
+    # 'intervalo' segundos desde la primera pendiente, o al cerrar el bloque. Cada envío es una sola
+    # transacción y ejecuta las sentencias en el orden en que aparecieron por primera vez. Las lecturas
+    # no ven lo que todavía no se envió, así que está pensado para registrar votos y otras escrituras
+    # cuyos errores alcanza con conocer al enviar. Si el bloque termina con una excepción, lo pendiente
+    # se descarta. El lote es del hilo que lo abrió: las escrituras de otros hilos se ejecutan enseguida.
+    @contextmanager
+    def lote(self, tamano=TAMANO_LOTE_SENTENCIAS, intervalo=INTERVALO_LOTE_SENTENCIAS):
+        if self.pendientes is not None:
+            yield
+            return
+        self.pendientes = OrderedDict()
+        self.local.limites_lote = (tamano, intervalo)
+        try:
+            yield
+            self.enviar_lote()
+        finally:
+            self.pendientes = None
+
+    # Agrupa las escrituras de un método de la API para que se hagan todas o ninguna. Dentro de lote()
+    # no hace falta abrir una transacción: alcanza con no enviar el lote a la mitad del método.
+    @contextmanager
+    def atomico(self):
+        if self.pendientes is None:
+            with self.connector.transaction():
+                yield
+            return
+        encoladas = dict((query, len(filas)) for query, filas in self.pendientes.items())
+        self.nivel_atomico += 1
+        try:
+            yield
+        except BaseException:
+            for query in list(self.pendientes):
+                if query in encoladas:
+                    del self.pendientes[query][encoladas[query]:]
+                else:
+                    del self.pendientes[query]
+            raise
+        finally:
+            self.nivel_atomico -= 1
+        self.enviar_lote_si_corresponde()
+
+    def encolar(self, query, parameters):
+        if not self.pendientes:
+            self.local.inicio_lote = time.time()
+        self.pendientes.setdefault(query, []).append(parameters)
+        self.enviar_lote_si_corresponde()
+
+    def enviar_lote_si_corresponde(self):
+        if self.nivel_atomico > 0 or not self.pendientes:
+            return
+        tamano, intervalo = self.local.limites_lote
+        if (max(len(filas) for filas in self.pendientes.values()) >= tamano or
+                time.time() - self.local.inicio_lote >= intervalo):
+            self.enviar_lote()
+
+    # Las composiciones que se calcularon mientras las escrituras estaban encoladas ya no valen
+    def enviar_lote(self):
+        pendientes = self.pendientes
+        self.pendientes = OrderedDict()
+        with self.connector.transaction():
+            with self.connector as c:
+                for query, filas in pendientes.items():
+                    c.executemany(query, filas)
+        self.composiciones.clear()
 
     ################################################################################
     # Padrón electoral                                                             #
     ################################################################################
 
     def empadronar_alumno(self, dni, nombre): 
-        self.insertar_empadronado(dni, nombre, CLAUSTRO_ESTUDIANTES)
-        self.execute_query('''INSERT INTO estudiante (dni, fecha_inscripcion)
-                              VALUES (?, strftime('%s', 'now'))''', (dni,))
+        with self.atomico():
+            self.insertar_empadronado(dni, nombre, CLAUSTRO_ESTUDIANTES)
+            self.execute_query(SENTENCIAS['insertar_estudiante'], (dni,))
 
     def empadronar_graduado(self, dni, nombre):
-        self.insertar_empadronado(dni, nombre, CLAUSTRO_GRADUADOS)
-        self.execute_query('''INSERT INTO graduado (dni, universidad)
-                              VALUES (?, ?)''', (dni, UBA))
+        with self.atomico():
+            self.insertar_empadronado(dni, nombre, CLAUSTRO_GRADUADOS)
+            self.execute_query(SENTENCIAS['insertar_graduado'], (dni, UBA))
 
     def empadronar_profesor(self, dni,nombre):  
-        self.insertar_empadronado(dni, nombre, CLAUSTRO_PROFESORES)
-        self.execute_query('''INSERT INTO profesor (dni, nacionalidad_universidad, cargo)
-                              VALUES (?, ?, ?)''', (dni, NACIONALIDAD_UNIVERSIDAD_PROFESOR, CARGO_PROFESOR_REGULAR))
+        with self.atomico():
+            self.insertar_empadronado(dni, nombre, CLAUSTRO_PROFESORES)
+            self.execute_query(SENTENCIAS['insertar_profesor'], (dni, NACIONALIDAD_UNIVERSIDAD_PROFESOR, CARGO_PROFESOR_REGULAR))
+
+    # Carga masiva del padrón. Las filas pueden venir de cualquier iterable (ej.: leer_padron_csv) y se
+    # insertan de a 'tamano_lote' por transacción. Los DNIs repetidos o inválidos se informan en el
+    # resultado en lugar de abortar la carga, igual que las filas con menos columnas que (dni, nombre).
+    def empadronar_alumno_many(self, filas, tamano_lote=TAMANO_LOTE_PADRON):
+        return self.empadronar_many((con_claustro(f, CLAUSTRO_ESTUDIANTES) for f in filas), tamano_lote)
+
+    def empadronar_graduado_many(self, filas, tamano_lote=TAMANO_LOTE_PADRON):
+        return self.empadronar_many((con_claustro(f, CLAUSTRO_GRADUADOS) for f in filas), tamano_lote)
+
+    def empadronar_profesor_many(self, filas, tamano_lote=TAMANO_LOTE_PADRON):
+        return self.empadronar_many((con_claustro(f, CLAUSTRO_PROFESORES) for f in filas), tamano_lote)
+
+    # Igual que las anteriores, pero cada fila indica su claustro: (dni, nombre, claustro)
+    def empadronar_many(self, filas, tamano_lote=TAMANO_LOTE_PADRON):
+        id_facultad = self.obtener_id_facultad_por_defecto()
+        insertados = 0
+        rechazados = []
+        lote = []
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= tamano_lote:
+                insertados += self.insertar_lote_empadronados(lote, id_facultad, rechazados)
+                lote = []
+        if lote:
+            insertados += self.insertar_lote_empadronados(lote, id_facultad, rechazados)
+        return resultado_empadronamiento(insertados, rechazados)
 
     ################################################################################
     # Consejo directivo                                                            #
@@ -88,32 +884,97 @@ class model_test():
     # Crea una agrupación y devuelve el ID que le fue asignado
     def crear_agrupacion_politica(self, nombre):
         with self.connector as c:
-            c.execute('INSERT INTO agrupacion_politica (nombre) VALUES (?)', (nombre,))
+            c.execute(SENTENCIAS['insertar_agrupacion_politica'], (nombre,))
             return c.lastrowid
 
     def registrar_votos_eleccion_consejo_directivo(self, id_agrupacion_politica, periodo, votos_recibidos):
-        self.execute_query('INSERT OR IGNORE INTO calendario_electoral (periodo) VALUES (?)', (periodo,))
-        self.execute_query('''INSERT INTO agrupacion_politica_se_presenta_durante_calendario_electoral
-                              (id_agrupacion_politica, periodo, votos_recibidos)
-                              VALUES (?, ?, ?)''', (id_agrupacion_politica, periodo, votos_recibidos))
+        self.composiciones.pop(periodo, None)
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_calendario_electoral'], (periodo,))
+            self.execute_query(SENTENCIAS['insertar_votos_agrupacion_politica'], (id_agrupacion_politica, periodo, votos_recibidos))
 
     def crear_consejero_directivo(self, dni, periodo, id_agrupacion_politica):
+        self.composiciones.pop(periodo, None)
         claustro = self.obtener_claustro(dni)
-        self.execute_query('''INSERT INTO consejero_directivo (dni, periodo, id_agrupacion_politica, claustro)
-                              VALUES (?, ?, ?, ?)''', (dni, periodo, id_agrupacion_politica, claustro))
+        self.execute_query(SENTENCIAS['insertar_consejero_directivo'], (dni, periodo, id_agrupacion_politica, claustro))
+
+    # Afilia a la persona (dni_afiliante) a la agrupación. Cada persona está afiliada a lo sumo a una: si
+    # ya lo estaba a otra, pasa a estarlo a esta, y volver a afiliarla a la misma no es un error.
+    def afiliar_a_agrupacion(self, dni_afiliante, id_agrupacion):
+        self.execute_query(SENTENCIAS['afiliar_a_agrupacion'], (dni_afiliante, id_agrupacion))
+
+    # Afiliaciones de a muchas, en una sola transacción: filas (dni_afiliante, id_agrupacion)
+    def afiliar_a_agrupacion_many(self, filas):
+        self.execute_many(SENTENCIAS['afiliar_a_agrupacion'], filas)
+
+    # Fija la cantidad de votos que obtuvo el candidato a consejero en la votación con fecha=fecha. Volver a
+    # enviar la cantidad de un candidato reemplaza la anterior.
+    def set_cant_votos_cantidato_a_consejero(self, dni_candidato, cantidad_de_votos, fecha):
+        periodo = self.periodo_vigente(fecha, self.connector)
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_calendario_electoral'], (periodo,))
+            self.execute_query(SENTENCIAS['fijar_votos_candidato_a_consejero'], (dni_candidato, periodo, cantidad_de_votos))
+
+    # Igual que la anterior para una planilla entera (ej.: la de una mesa), en una sola transacción:
+    # filas (dni_candidato, cantidad_de_votos)
+    def set_cant_votos_cantidato_a_consejero_many(self, filas, fecha):
+        periodo = self.periodo_vigente(fecha, self.connector)
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_calendario_electoral'], (periodo,))
+            self.execute_many(SENTENCIAS['fijar_votos_candidato_a_consejero'], ((f[0], periodo, f[1]) for f in filas))
+
+    # Votos de cada candidato a consejero en la votación con fecha=fecha, de más a menos votado
+    def resultado_candidatos_a_consejero(self, fecha):
+        return self.consultar_resultado(SENTENCIAS['resultado_candidatos_a_consejero'], (self.periodo_vigente(fecha),))
+
+    # Funcion que determina como esta compuesto el consejo directivo en la fecha=fecha. Las bancas de
+    # cada claustro se reparten por D'Hondt entre las agrupaciones que presentaron consejeros de ese
+    # claustro, y cada agrupación las ocupa con sus consejeros en el orden en que fueron creados.
+    def composicion_consejo(self, fecha):
+        periodo = self.periodo_vigente(fecha)
+        if periodo in self.composiciones:
+            return self.composiciones[periodo]
+
+        filas = self.lector.iterar(SENTENCIAS['consejeros_directivos_con_votos'], (periodo,))
+
+        consejeros = dict((claustro, []) for claustro in BANCAS_CONSEJO_DIRECTIVO)
+        bancas_por_agrupacion = dict((claustro, {}) for claustro in BANCAS_CONSEJO_DIRECTIVO)
+        for claustro, filas_claustro in groupby(filas, lambda f: f[0]):
+            if claustro not in BANCAS_CONSEJO_DIRECTIVO:
+                continue
+            votos = {}
+            candidatos = {}
+            for id_agrupacion, filas_agrupacion in groupby(filas_claustro, lambda f: f[1]):
+                filas_agrupacion = list(filas_agrupacion)
+                votos[id_agrupacion] = filas_agrupacion[0][2]
+                candidatos[id_agrupacion] = [f[3] for f in filas_agrupacion]
+            topes = dict((id, len(dnis)) for id, dnis in candidatos.items())
+
+            for id_agrupacion in repartir_bancas_dhondt(votos, BANCAS_CONSEJO_DIRECTIVO[claustro], topes):
+                bancas = bancas_por_agrupacion[claustro].get(id_agrupacion, 0)
+                consejeros[claustro].append(consejero(candidatos[id_agrupacion][bancas], id_agrupacion, claustro))
+                bancas_por_agrupacion[claustro][id_agrupacion] = bancas + 1
+
+        composicion = composicion_consejo_directivo(periodo, consejeros, bancas_por_agrupacion)
+
+        # Dentro de una transacción se podrían estar viendo datos que después se deshacen, dentro de una
+        # instantánea datos que ya cambiaron y dentro de lote() faltan las escrituras encoladas
+        if self.connector.profundidad == 0 and self.lector.profundidad == 0 and self.pendientes is None:
+            self.composiciones[periodo] = composicion
+        return composicion
 
     ################################################################################
     # Decano                                                                       #
     ################################################################################
 
     def crear_decano(self, dni, periodo):
-        self.execute_query('INSERT INTO decano (dni, periodo) VALUES (?, ?)', (dni, periodo))
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_decano'], (dni, periodo))
 
     def registrar_voto_a_decano(self, dni_decano, periodo_decano, dni_consejero_directivo, periodo_consejero_directivo):
-        self.execute_query('''INSERT INTO voto_a_decano
-                              (dni_decano, periodo_decano, dni_consejero_directivo, periodo_consejero_directivo)
-                              VALUES (?, ?, ?, ?)''',
-                           (dni_decano, periodo_decano, dni_consejero_directivo, periodo_consejero_directivo))
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_voto_a_decano'],
+                               (dni_decano, periodo_decano, dni_consejero_directivo, periodo_consejero_directivo))
 
     ################################################################################
     # Consejo superior                                                             #
@@ -121,53 +982,184 @@ class model_test():
 
     def crear_consejero_superior(self, dni, periodo):
         claustro = self.obtener_claustro(dni)
-        self.execute_query('''INSERT INTO consejero_superior (dni, periodo, claustro)
-                              VALUES (?, ?, ?)''', (dni, periodo, claustro))
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_consejero_superior'], (dni, periodo, claustro))
 
     def registrar_voto_a_consejero_superior(self, dni_consejero_superior, periodo_consejero_superior, dni_consejero_directivo, periodo_consejero_directivo):
-        self.execute_query('''INSERT INTO voto_a_consejero_superior
-                              (dni_consejero_superior, periodo_consejero_superior, dni_consejero_directivo, periodo_consejero_directivo)
-                              VALUES (?, ?, ?, ?)''',
-                           (dni_consejero_superior, periodo_consejero_superior, dni_consejero_directivo, periodo_consejero_directivo))
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_voto_a_consejero_superior'],
+                               (dni_consejero_superior, periodo_consejero_superior, dni_consejero_directivo, periodo_consejero_directivo))
 
     ################################################################################
     # Rector                                                                       #
     ################################################################################
 
     def crear_rector(self, dni, periodo):
-        self.execute_query('INSERT INTO rector (dni, periodo) VALUES (?, ?)', (dni, periodo))        
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_rector'], (dni, periodo))
 
     def registrar_voto_de_consejero_directivo_a_rector(self, dni_rector, periodo_rector, dni_consejero_directivo, periodo_consejero_directivo):
-        self.execute_query('''INSERT INTO rector_fue_votado_por_consejero_directivo
-                              (dni_rector, periodo_rector, dni_consejero_directivo, periodo_consejero_directivo)
-                              VALUES (?, ?, ?, ?)''',
-                           (dni_rector, periodo_rector, dni_consejero_directivo, periodo_consejero_directivo))
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_voto_de_consejero_directivo_a_rector'],
+                               (dni_rector, periodo_rector, dni_consejero_directivo, periodo_consejero_directivo))
 
     def registrar_voto_de_consejero_superior_a_rector(self, dni_rector, periodo_rector, dni_consejero_superior, periodo_consejero_superior):
-        self.execute_query('''INSERT INTO rector_fue_votado_por_consejero_superior
-                              (dni_rector, periodo_rector, dni_consejero_superior, periodo_consejero_superior)
-                              VALUES (?, ?, ?, ?)''',
-                           (dni_rector, periodo_rector, dni_consejero_superior, periodo_consejero_superior))
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_voto_de_consejero_superior_a_rector'],
+                               (dni_rector, periodo_rector, dni_consejero_superior, periodo_consejero_superior))
 
     def registrar_voto_de_decano_a_rector(self, dni_rector, periodo_rector, dni_decano, periodo_decano):
-        self.execute_query('''INSERT INTO rector_fue_votado_por_decano
-                              (dni_rector, periodo_rector, dni_decano, periodo_decano)
-                              VALUES (?, ?, ?, ?)''',
-                           (dni_rector, periodo_rector, dni_decano, periodo_decano))
+        with self.atomico():
+            self.execute_query(SENTENCIAS['insertar_voto_de_decano_a_rector'],
+                               (dni_rector, periodo_rector, dni_decano, periodo_decano))
+
+    ################################################################################
+    # Calendario electoral                                                         #
+    ################################################################################
+
+    # Cambia las fechas [inicio, fin) en que duran los cargos del período (por defecto, su año). Las
+    # fechas son date/datetime o textos 'AAAA-MM-DD'.
+    def fijar_intervalo_periodo(self, periodo, inicio, fin):
+        self.execute_query(SENTENCIAS['fijar_intervalo_periodo'], (periodo, fecha_iso(inicio), fecha_iso(fin)))
+
+    # Período cuyo intervalo contiene la fecha, o None si no hay ninguno. Si se superponen, el que empezó último.
+    def periodo_en_fecha(self, fecha, connector=None):
+        with (connector or self.lector) as c:
+            c.execute(SENTENCIAS['buscar_periodo_en_fecha'], (fecha_iso(fecha), fecha_iso(fecha)))
+            fila = c.fetchone()
+            return fila[0] if fila is not None else None
+
+    # Período de una fecha para las funciones que reciben 'fecha': el de periodo_en_fecha y, si ningún
+    # intervalo la contiene, el de su año (periodo_de_fecha). Un entero ya es el período. Las escrituras
+    # pasan su conector, para ver los intervalos fijados en su misma transacción.
+    def periodo_vigente(self, fecha, connector=None):
+        if isinstance(fecha, int):
+            return fecha
+        periodo = self.periodo_en_fecha(fecha, connector)
+        return periodo if periodo is not None else periodo_de_fecha(fecha)
+
+    # Quiénes estaban en cada cargo (o sólo en 'cargo') en la fecha. Devuelve filas cargo_en_funciones
+    # ordenadas por fecha de inicio, cargo y DNI.
+    def en_funciones(self, fecha, cargo=None):
+        return self.en_funciones_entre(fecha, fecha, cargo)
+
+    # Igual que en_funciones, para todos los períodos que se superponen con las fechas [desde, hasta]
+    def en_funciones_entre(self, desde, hasta, cargo=None):
+        parametros = (fecha_iso(hasta), fecha_iso(desde)) * (1 if cargo else len(CARGOS))
+        return list(self.lector.iterar(sentencia_cargos('cargos_en_intervalo', cargo), parametros,
+                                       fila=cargo_en_funciones))
+
+    ################################################################################
+    # Resultados                                                                   #
+    ################################################################################
+
+    # Cada función devuelve la lista de candidatos del período (incluidos los que no recibieron votos)
+    # ordenada de mayor a menor cantidad de votos
+
+    def resultado_decano(self, periodo):
+        if self.recuento_materializado:
+            return self.leer_recuento(ELECCION_DECANO, periodo)
+        return self.consultar_resultado(SENTENCIAS['resultado_decano'], (periodo,))
+
+    def resultado_consejo_superior(self, periodo):
+        if self.recuento_materializado:
+            return self.leer_recuento(ELECCION_CONSEJO_SUPERIOR, periodo)
+        return self.consultar_resultado(SENTENCIAS['resultado_consejo_superior'], (periodo,))
+
+    # Suma los votos de consejeros directivos, consejeros superiores y decanos
+    def resultado_rector(self, periodo):
+        if self.recuento_materializado:
+            return self.leer_recuento(ELECCION_RECTOR, periodo)
+        return self.consultar_resultado(SENTENCIAS['resultado_rector'], (periodo, periodo, periodo, periodo))
+
+    # Agrupaciones que se presentaron y votos emitidos en el período, de la tabla 'resumen_periodo'
+    def resumen_periodo(self, fecha):
+        periodo = self.periodo_vigente(fecha)
+        filas = list(self.lector.iterar(SENTENCIAS['leer_resumen_periodo'], (periodo,), fila=votos_periodo))
+        return filas[0] if filas else votos_periodo(periodo, 0, 0)
+
+    # Cantidad de consejeros directivos de cada agrupación en el período, por claustro (claustro -> id -> cantidad),
+    # de la tabla 'resumen_consejo_directivo'
+    def consejeros_por_claustro(self, fecha):
+        consejeros = dict((claustro, {}) for claustro in CLAUSTROS)
+        for claustro, id_agrupacion, cantidad in self.lector.iterar(SENTENCIAS['leer_resumen_consejo_directivo'],
+                                                                    (self.periodo_vigente(fecha),)):
+            consejeros.setdefault(claustro, {})[id_agrupacion] = cantidad
+        return consejeros
+
+    # Todas las consultas de resultados hechas dentro del bloque ven el mismo estado de la base
+    def instantanea(self):
+        return self.lector.transaction()
+
+    # Lee los resultados de la tabla 'recuento_votos' en lugar de contar los votos en cada consulta. La tabla
+    # la mantienen actualizada los triggers de facultad.sql (ver resumenes.py), así que siempre es consistente.
+    def usar_recuento_materializado(self):
+        self.recuento_materializado = True
+
+    ################################################################################
+    # Listados                                                                     #
+    ################################################################################
+
+    # Los listados son generadores: traen las filas de la base de a 'tamano_bloque', así que recorrer
+    # el padrón completo usa siempre la misma memoria
+
+    # Empadronados (todos o los de un claustro) ordenados por DNI
+    def padron(self, claustro=None, tamano_bloque=TAMANO_BLOQUE_LECTURA):
+        if claustro is None:
+            return self.lector.iterar(SENTENCIAS['listar_empadronados'], (), tamano_bloque, empadronado)
+        return self.lector.iterar(SENTENCIAS['listar_empadronados_claustro'], (claustro,), tamano_bloque, empadronado)
+
+    # Empadronados cuyo nombre contiene todas las palabras de 'texto', como palabras completas o como
+    # comienzo de una (ej.: 'gonz mar' encuentra a 'María González'), sin distinguir mayúsculas ni acentos.
+    # Los resultados se ordenan por relevancia (bm25) y por DNI y se devuelven de a 'por_pagina' (la primera
+    # página es la 0).
+    def buscar_empadronados(self, texto, pagina=0, por_pagina=TAMANO_PAGINA_BUSQUEDA):
+        consulta = consulta_nombre(texto)
+        if not consulta:
+            return []
+        self.indexar_nombres()
+        with self.lector as c:
+            c.execute(SENTENCIAS['buscar_empadronados_por_nombre'], (consulta, por_pagina, pagina * por_pagina))
+            return [empadronado(*fila) for fila in c.fetchall()]
+
+    # Pasa al índice de texto completo los nombres que los triggers dejaron pendientes (los indexan de a
+    # 1000). Escribe con 'connector', así que las búsquedas con un 'lector' aparte también los ven.
+    def indexar_nombres(self):
+        with self.connector as c:
+            c.execute(SENTENCIAS['hay_nombres_sin_indexar'])
+            if c.fetchone() is not None:
+                c.execute(SENTENCIAS['indexar_nombres_pendientes'])
+                c.execute(SENTENCIAS['vaciar_nombres_pendientes'])
+
+    # Todos los cargos (o sólo los de 'cargo', uno de CARGOS) en todos los períodos, o los de una persona
+    # si se indica 'dni', ordenados por fecha de inicio. Devuelve filas cargo_en_funciones.
+    def historial_cargos(self, dni=None, cargo=None, tamano_bloque=TAMANO_BLOQUE_LECTURA):
+        if dni is None:
+            return self.lector.iterar(sentencia_cargos('historial_cargos', cargo), (), tamano_bloque, cargo_en_funciones)
+        return self.lector.iterar(sentencia_cargos('historial_cargos_dni', cargo),
+                                  (dni,) * (1 if cargo else len(CARGOS)), tamano_bloque, cargo_en_funciones)
+
+    # Consejeros directivos del período, ordenados por claustro y agrupación
+    def consejeros_directivos(self, fecha, tamano_bloque=TAMANO_BLOQUE_LECTURA):
+        return self.lector.iterar(SENTENCIAS['listar_consejeros_directivos'], (self.periodo_vigente(fecha),),
+                                  tamano_bloque, consejero)
+
+    # Escribe el padrón en un CSV (dni,nombre,claustro) que se puede volver a cargar con leer_padron_csv.
+    # Devuelve la cantidad de filas escritas.
+    def exportar_padron_csv(self, ruta, claustro=None):
+        filas = 0
+        with open(ruta, 'w', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(('dni', 'nombre', 'claustro'))
+            for fila in self.padron(claustro):
+                escritor.writerow(fila)
+                filas += 1
+        return filas
 
     ###############################################################################
     # Funciones requeridas por la cátedra aún no implementadas                    #
     ###############################################################################
 
-    # Funcion que afilia a una persona (dni_afiliante) a una agrupacion (id_agrupacion)
-    def afiliar_a_agrupacion(self, dni_afiliante, id_agrupacion): pass
-
-    # Funciones para setear la cantidad de votos que obtuvo cada candidato a consejero en la votacion con fecha=fecha
-    def set_cant_votos_cantidato_a_consejero(self, dni_candidato, cantidad_de_votos, fecha): pass
-    
-    # Funcion que determina como esta compuesto el consejo directivo en la fecha=fecha
-    def composicion_consejo(self,fecha): pass
-    
     # Funcion que emite un voto de un consejero (dni_votador) para un candidato (dni_candidato) de decano en la fecha=fecha
     def set_voto_para_decano(self,dni_consejero_votador, dni_candidato,cantidad_de_votos,fecha): pass
 
@@ -176,11 +1168,14 @@ class model_test():
     ###############################################################################
 
     def obtener_id_facultad_por_defecto(self):
+        return self.cache_facultad.obtener(self.nombre_facultad, self.buscar_o_crear_facultad)
+
+    def buscar_o_crear_facultad(self, nombre):
         with self.connector as c:
-            c.execute('SELECT id FROM facultad WHERE nombre = ?', (NOMBRE_FACULTAD,))
+            c.execute(SENTENCIAS['buscar_facultad'], (nombre,))
             row = c.fetchone()
             if row is None:
-                c.execute('INSERT INTO facultad (nombre) VALUES (?)', (NOMBRE_FACULTAD,))
+                c.execute(SENTENCIAS['insertar_facultad'], (nombre,))
                 id = c.lastrowid
             else:
                 id = row[0]
@@ -188,12 +1183,89 @@ class model_test():
 
     def insertar_empadronado(self, dni, nombre, claustro):
         id_facultad = self.obtener_id_facultad_por_defecto()
-        self.execute_query('''INSERT INTO empadronado (dni, nombre, id_facultad, claustro)
-                              VALUES (?, ?, ?, ?)''', (dni, nombre, id_facultad, claustro))
+        self.cache_claustro.invalidar(dni)
+        self.execute_query(SENTENCIAS['insertar_empadronado'], (dni, nombre, id_facultad, claustro))
+
+    # Inserta un lote de filas (dni, nombre, claustro) en una única transacción y devuelve cuántas
+    # se insertaron. Las filas rechazadas se agregan a 'rechazados'.
+    def insertar_lote_empadronados(self, lote, id_facultad, rechazados):
+        filas = {}
+        for fila in lote:
+            if len(fila) < 3:
+                rechazados.append((fila[0] if fila else None, RECHAZO_FILA_INCOMPLETA))
+                continue
+            try:
+                dni = int(fila[0])
+            except (TypeError, ValueError):
+                rechazados.append((fila[0], RECHAZO_DNI_INVALIDO))
+                continue
+            try:
+                claustro = int(fila[2])
+            except (TypeError, ValueError):
+                claustro = None
+            if claustro not in CLAUSTROS:
+                rechazados.append((dni, RECHAZO_CLAUSTRO_INVALIDO))
+            elif dni in filas:
+                rechazados.append((dni, RECHAZO_DNI_DUPLICADO))
+            else:
+                filas[dni] = (dni, fila[1], id_facultad, claustro)
+
+        with self.connector as c:
+            # Descartar los DNIs que ya estaban empadronados antes de este lote
+            dnis = list(filas)
+            for i in range(0, len(dnis), MAX_PARAMETROS_CONSULTA):
+                parte = dnis[i:i + MAX_PARAMETROS_CONSULTA]
+                c.execute(SENTENCIAS['empadronados_existentes'] % ','.join('?' * len(parte)), parte)
+                for (dni,) in c.fetchall():
+                    rechazados.append((dni, RECHAZO_DNI_DUPLICADO))
+                    del filas[dni]
+
+            for dni in filas:
+                self.cache_claustro.invalidar(dni)
+            c.execute(SENTENCIAS['crear_lote_empadronados'])
+            c.executemany(SENTENCIAS['insertar_lote_empadronados'], filas.values())
+            c.execute(SENTENCIAS['copiar_lote_empadronados'])
+            c.execute(SENTENCIAS['vaciar_lote_empadronados'])
+
+            por_claustro = dict((claustro, []) for claustro in CLAUSTROS)
+            for f in filas.values():
+                por_claustro[f[3]].append(f[0])
+            if por_claustro[CLAUSTRO_ESTUDIANTES]:
+                c.executemany(SENTENCIAS['insertar_estudiante'],
+                              ((dni,) for dni in por_claustro[CLAUSTRO_ESTUDIANTES]))
+            if por_claustro[CLAUSTRO_GRADUADOS]:
+                c.executemany(SENTENCIAS['insertar_graduado'],
+                              ((dni, UBA) for dni in por_claustro[CLAUSTRO_GRADUADOS]))
+            if por_claustro[CLAUSTRO_PROFESORES]:
+                c.executemany(SENTENCIAS['insertar_profesor'],
+                              ((dni, NACIONALIDAD_UNIVERSIDAD_PROFESOR, CARGO_PROFESOR_REGULAR)
+                               for dni in por_claustro[CLAUSTRO_PROFESORES]))
+        return len(filas)
+
+    def leer_recuento(self, eleccion, periodo):
+        return self.consultar_resultado(SENTENCIAS['leer_recuento_votos'], (eleccion, periodo))
+
+    def consultar_resultado(self, query, parameters):
+        return list(self.lector.iterar(query, parameters, fila=resultado))
 
     def obtener_claustro(self, dni):
+        return self.cache_claustro.obtener(dni, self.leer_claustro)
+
+    def leer_claustro(self, dni):
         with self.connector as c:
-            c.execute('SELECT claustro FROM empadronado WHERE dni = ?', (dni,))
+            c.execute(SENTENCIAS['buscar_claustro'], (dni,))
             row = c.fetchone()
             assert row is not None, 'El DNI %d no está empadronado.' % dni
-            return row[0]
\ No newline at end of file
+            return row[0]
+
+    def vaciar_caches(self):
+        self.cache_facultad.vaciar()
+        self.cache_claustro.vaciar()
+        self.composiciones.clear()
+
+    # Aciertos y fallos de cada cache, para medir cuántas consultas se ahorran
+    def estadisticas_cache(self):
+        return {
+            'facultad': (self.cache_facultad.aciertos, self.cache_facultad.fallos),
+            'claustro': (self.cache_claustro.aciertos, self.cache_claustro.fallos),
+        }
@@ -0,0 +1,161 @@
+# coding: utf-8
+
+# Fachada asyncio sobre model_test. Todas las llamadas se encolan y las ejecuta un único hilo escritor
+# dueño de la conexión, así el event loop nunca se bloquea esperando a SQLite. El escritor toma de la
+# cola todas las operaciones que haya (hasta 'tamano_grupo') y las ejecuta en una sola transacción,
+# cada una en su propio SAVEPOINT: un error sólo hace fallar a la operación que lo causó, y el resto
+# comparte un único commit. Cada llamada termina recién cuando su grupo quedó comiteado. Si el escritor
+# muere (ej.: falla crear_modelo), las llamadas pendientes y las siguientes fallan con el mismo error.
+
+import asyncio
+import queue
+import threading
+import weakref
+
+import tp_api as api
+
+# Operaciones pendientes como máximo de cada event loop (las llamadas que excedan el límite esperan sin
+# bloquear el loop)
+TAMANO_COLA = 1024
+
+# Operaciones que se comitean juntas como máximo
+TAMANO_GRUPO = 256
+
+# Métodos de model_test que se exponen como corutinas
+METODOS = (
+    'empadronar_alumno', 'empadronar_graduado', 'empadronar_profesor',
+    'empadronar_alumno_many', 'empadronar_graduado_many', 'empadronar_profesor_many', 'empadronar_many',
+    'crear_agrupacion_politica', 'registrar_votos_eleccion_consejo_directivo', 'crear_consejero_directivo',
+    'composicion_consejo', 'buscar_empadronados',
+    'afiliar_a_agrupacion', 'afiliar_a_agrupacion_many',
+    'set_cant_votos_cantidato_a_consejero', 'set_cant_votos_cantidato_a_consejero_many', 'resultado_candidatos_a_consejero',
+    'crear_decano', 'registrar_voto_a_decano',
+    'crear_consejero_superior', 'registrar_voto_a_consejero_superior',
+    'crear_rector', 'registrar_voto_de_consejero_directivo_a_rector',
+    'registrar_voto_de_consejero_superior_a_rector', 'registrar_voto_de_decano_a_rector',
+    'resultado_decano', 'resultado_consejo_superior', 'resultado_rector',
+    'fijar_intervalo_periodo', 'periodo_en_fecha', 'en_funciones', 'en_funciones_entre',
+)
+
+class model_async():
+
+    # 'crear_modelo' se llama desde el hilo escritor y debe devolver el model_test a usar
+    def __init__(self, crear_modelo=api.model_test, tamano_cola=TAMANO_COLA, tamano_grupo=TAMANO_GRUPO):
+        self.crear_modelo = crear_modelo
+        self.tamano_cola = tamano_cola
+        self.tamano_grupo = tamano_grupo
+        self.cola = queue.Queue()
+        # Un semáforo de asyncio sólo se puede usar desde un loop, así que cada loop tiene el suyo; se crea
+        # la primera vez que el loop llama
+        self.cupos = weakref.WeakKeyDictionary()
+        self.error = None
+        self.grupos = 0
+        self.hilo = threading.Thread(target=self.escritor)
+        self.hilo.daemon = True
+        self.hilo.start()
+
+    async def llamar(self, nombre, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        if loop not in self.cupos:
+            self.cupos[loop] = asyncio.Semaphore(self.tamano_cola)
+        async with self.cupos[loop]:
+            if self.error is not None:
+                raise self.error
+            futuro = loop.create_future()
+            self.cola.put((loop, futuro, nombre, args, kwargs))
+            # Si el escritor murió mientras tanto, puede que ya no vaya a leer la cola
+            if self.error is not None and not futuro.done():
+                futuro.set_exception(self.error)
+            return await futuro
+
+    # Espera a que se ejecute todo lo encolado y termina el hilo escritor
+    def cerrar(self):
+        if self.hilo.is_alive():
+            self.cola.put(None)
+        self.hilo.join()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await asyncio.get_running_loop().run_in_executor(None, self.cerrar)
+
+    def escritor(self):
+        grupo = []
+        try:
+            model = self.crear_modelo()
+            terminar = False
+            while not terminar:
+                operacion = self.cola.get()
+                if operacion is None:
+                    break
+                grupo = [operacion]
+                while len(grupo) < self.tamano_grupo:
+                    try:
+                        operacion = self.cola.get_nowait()
+                    except queue.Empty:
+                        break
+                    if operacion is None:
+                        terminar = True
+                        break
+                    grupo.append(operacion)
+                self.ejecutar_grupo(model, grupo)
+                grupo = []
+            model.connector.cerrar()
+        except Exception as e:
+            self.morir(e, grupo)
+
+    # Guarda el error para las llamadas siguientes y hace fallar a las pendientes: las del grupo que se
+    # estaba ejecutando y las que quedaron en la cola
+    def morir(self, error, grupo):
+        self.error = error
+        while True:
+            for loop, futuro, nombre, args, kwargs in grupo:
+                notificar(loop, futuro, None, error)
+            try:
+                operacion = self.cola.get_nowait()
+            except queue.Empty:
+                return
+            grupo = [operacion] if operacion is not None else []
+
+    def ejecutar_grupo(self, model, grupo):
+        resultados = []
+        try:
+            with model.connector.transaction():
+                for loop, futuro, nombre, args, kwargs in grupo:
+                    try:
+                        with model.connector.transaction():
+                            resultados.append((getattr(model, nombre)(*args, **kwargs), None))
+                    except Exception as e:
+                        resultados.append((None, e))
+        except Exception as e:
+            # Si falla el commit no se guardó ninguna
+            resultados = [(None, e)] * len(grupo)
+        self.grupos += 1
+
+        for (loop, futuro, nombre, args, kwargs), (resultado, error) in zip(grupo, resultados):
+            notificar(loop, futuro, resultado, error)
+
+# Resuelve el futuro desde el hilo escritor. Si su loop ya se cerró no queda nadie esperándolo.
+def notificar(loop, futuro, resultado, error):
+    try:
+        loop.call_soon_threadsafe(resolver, futuro, resultado, error)
+    except RuntimeError:
+        pass
+
+def resolver(futuro, resultado, error):
+    if futuro.done():
+        return
+    if error is not None:
+        futuro.set_exception(error)
+    else:
+        futuro.set_result(resultado)
+
+def crear_metodo(nombre):
+    async def metodo(self, *args, **kwargs):
+        return await self.llamar(nombre, *args, **kwargs)
+    metodo.__name__ = nombre
+    return metodo
+
+for nombre in METODOS:
+    setattr(model_async, nombre, crear_metodo(nombre))
@@ -0,0 +1,150 @@
+# coding: utf-8
+
+# Modo multi-facultad: una base por facultad ("shard"), todas en un mismo directorio. Cada shard tiene el
+# esquema completo de facultad.sql y una única fila en 'facultad', con el mismo id en toda la universidad.
+#
+# Las operaciones de una facultad (padrón, consejo directivo, decano) reciben como primer argumento el id
+# de la facultad y se ejecutan en su shard. Los candidatos a consejero superior y a rector se crean en el
+# shard de su facultad, y sus votos en el mismo shard: las claves foráneas de facultad.sql exigen que
+# candidato y votante estén en la misma base, así que no se pueden registrar votos entre facultades.
+# Los resultados del consejo superior y del rector se calculan consultando todos los shards en paralelo,
+# en un pool de procesos, y sumando los votos. aplicar() permite además repartir una tanda grande de
+# escrituras de varias facultades entre los procesos, para que la carga de cada facultad no frene a las otras.
+# Los DNIs no se verifican entre shards: un mismo DNI podría empadronarse en dos facultades.
+
+import concurrent.futures
+import os
+
+import esquema
+import tp_api as api
+
+SENTENCIAS = {
+    'insertar_facultad_shard': 'INSERT INTO facultad (id, nombre) VALUES (?, ?)',
+}
+
+# Métodos de model_test que se ejecutan en el shard de la facultad indicada como primer argumento
+METODOS_FACULTAD = (
+    'empadronar_alumno', 'empadronar_graduado', 'empadronar_profesor',
+    'empadronar_alumno_many', 'empadronar_graduado_many', 'empadronar_profesor_many', 'empadronar_many',
+    'crear_agrupacion_politica', 'registrar_votos_eleccion_consejo_directivo', 'crear_consejero_directivo',
+    'composicion_consejo', 'consejeros_directivos', 'padron', 'buscar_empadronados',
+    'afiliar_a_agrupacion', 'afiliar_a_agrupacion_many',
+    'set_cant_votos_cantidato_a_consejero', 'set_cant_votos_cantidato_a_consejero_many', 'resultado_candidatos_a_consejero',
+    'fijar_intervalo_periodo', 'periodo_en_fecha', 'en_funciones', 'en_funciones_entre', 'historial_cargos',
+    'crear_decano', 'registrar_voto_a_decano', 'resultado_decano',
+    'crear_consejero_superior', 'registrar_voto_a_consejero_superior',
+    'crear_rector', 'registrar_voto_de_consejero_directivo_a_rector',
+    'registrar_voto_de_consejero_superior_a_rector', 'registrar_voto_de_decano_a_rector',
+)
+
+class model_universidad():
+
+    # 'facultades' es un dict id -> nombre. Los shards que no existan se crean. 'procesos' es la cantidad
+    # de procesos del pool (por defecto, uno por CPU).
+    def __init__(self, directorio, facultades, procesos=None, perfil=api.PERFIL_ONLINE):
+        self.directorio = directorio
+        self.facultades = dict(facultades)
+        self.procesos = procesos
+        self.perfil = perfil
+        self.modelos = {}
+        self.pool = None
+        for id_facultad, nombre in self.facultades.items():
+            if not os.path.exists(self.ruta_shard(id_facultad)):
+                crear_shard(self.ruta_shard(id_facultad), id_facultad, nombre)
+
+    def ruta_shard(self, id_facultad):
+        if id_facultad not in self.facultades:
+            raise ValueError('Facultad desconocida: %s' % id_facultad)
+        return os.path.join(self.directorio, 'facultad_%d.db' % id_facultad)
+
+    # Devuelve el model_test del shard de la facultad (lo abre la primera vez)
+    def shard(self, id_facultad):
+        if id_facultad not in self.modelos:
+            self.modelos[id_facultad] = abrir_shard(self.ruta_shard(id_facultad), self.facultades[id_facultad],
+                                                    self.perfil)
+        return self.modelos[id_facultad]
+
+    def ejecutor(self):
+        if self.pool is None:
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.procesos)
+        return self.pool
+
+    # Ejecuta operaciones (id_facultad, metodo, args) agrupadas por facultad: las de cada facultad en un
+    # proceso del pool y en una sola transacción, en el orden en que aparecen. Devuelve un dict
+    # id_facultad -> lista de resultados. Si falla una operación no se guarda ninguna de su facultad.
+    def aplicar(self, operaciones):
+        por_facultad = {}
+        for id_facultad, metodo, args in operaciones:
+            por_facultad.setdefault(id_facultad, []).append((metodo, tuple(args)))
+        futuros = dict((id_facultad, self.ejecutor().submit(ejecutar_en_shard, self.ruta_shard(id_facultad),
+                                                            self.facultades[id_facultad], self.perfil, ops))
+                       for id_facultad, ops in por_facultad.items())
+        return dict((id_facultad, futuro.result()) for id_facultad, futuro in futuros.items())
+
+    # Resultados de toda la universidad: cada candidato figura en el shard de su facultad
+    def resultado_consejo_superior(self, periodo):
+        return self.resultado_universidad('resultado_consejo_superior', periodo)
+
+    def resultado_rector(self, periodo):
+        return self.resultado_universidad('resultado_rector', periodo)
+
+    def resultado_universidad(self, metodo, periodo):
+        futuros = [self.ejecutor().submit(consultar_shard, self.ruta_shard(id_facultad), nombre, metodo, (periodo,))
+                   for id_facultad, nombre in sorted(self.facultades.items())]
+        return sumar_resultados(futuro.result() for futuro in futuros)
+
+    def cerrar(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        for model in self.modelos.values():
+            model.connector.cerrar()
+        self.modelos.clear()
+
+def crear_metodo(nombre):
+    def metodo(self, id_facultad, *args, **kwargs):
+        return getattr(self.shard(id_facultad), nombre)(*args, **kwargs)
+    metodo.__name__ = nombre
+    return metodo
+
+for nombre in METODOS_FACULTAD:
+    setattr(model_universidad, nombre, crear_metodo(nombre))
+
+# Crea la base de un shard con el esquema y la fila de su facultad
+def crear_shard(ruta, id_facultad, nombre):
+    connector = esquema.crear_base(ruta)
+    connector.query_without_result(SENTENCIAS['insertar_facultad_shard'], (id_facultad, nombre))
+    connector.cerrar()
+
+def abrir_shard(ruta, nombre, perfil):
+    connector = api.bd_connector()
+    connector.connect(bd=ruta, perfil=perfil)
+    return api.model_test(connector, nombre_facultad=nombre)
+
+# Une los resultados de varios shards (listas de api.resultado) en uno solo, ordenado como los de model_test
+def sumar_resultados(resultados):
+    votos = {}
+    for lista in resultados:
+        for r in lista:
+            votos[r.dni] = votos.get(r.dni, 0) + r.votos
+    return [api.resultado(dni, v) for dni, v in sorted(votos.items(), key=lambda x: (-x[1], x[0]))]
+
+################################################################################
+# Funciones que corren en los procesos del pool                                #
+################################################################################
+
+def ejecutar_en_shard(ruta, nombre, perfil, operaciones):
+    model = abrir_shard(ruta, nombre, perfil)
+    try:
+        with model.connector.transaction():
+            return [getattr(model, metodo)(*args) for metodo, args in operaciones]
+    finally:
+        model.connector.cerrar()
+
+def consultar_shard(ruta, nombre, metodo, args):
+    connector = api.bd_connector_lectura()
+    connector.connect(bd=ruta)
+    try:
+        return getattr(api.model_test(connector, nombre_facultad=nombre), metodo)(*args)
+    finally:
+        connector.cerrar()
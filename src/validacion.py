@@ -0,0 +1,218 @@
+# coding: utf-8
+
+# Validación de archivos completos antes de cargarlos. Las claves de la base (DNIs empadronados,
+# agrupaciones, consejeros, candidatos y votos) se leen una sola vez por validador y se guardan en arrays
+# ordenados; las filas de cada archivo se buscan en ellos todas juntas. Así un archivo con errores se
+# rechaza antes de escribir nada, con un informe de todas sus filas, en lugar de descubrir los errores de
+# a un IntegrityError por vez.
+#
+# Si NumPy está instalado las búsquedas se hacen con numpy.searchsorted sobre arrays de int64; si no, con
+# bisect sobre array('q'). Los resultados son los mismos.
+
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import escrutinio
+import tp_api as api
+
+# Motivos de rechazo, además de los de la carga masiva del padrón (api.RECHAZO_*)
+RECHAZO_PERIODO_INVALIDO        = 'periodo_invalido'
+RECHAZO_DNI_NO_EMPADRONADO      = 'dni_no_empadronado'
+RECHAZO_AGRUPACION_INEXISTENTE  = 'agrupacion_inexistente'
+RECHAZO_CONSEJERO_DUPLICADO     = 'consejero_duplicado'
+RECHAZO_CANDIDATO_INEXISTENTE   = 'candidato_inexistente'
+RECHAZO_VOTANTE_INEXISTENTE     = 'votante_inexistente'
+RECHAZO_VOTO_DUPLICADO          = 'voto_duplicado'
+
+# Error de una fila: su posición en el archivo (desde 0), la fila tal como vino y el motivo
+error_validacion = namedtuple('error_validacion', ['fila', 'valores', 'motivo'])
+
+SENTENCIAS = {
+    'listar_dnis_empadronados': 'SELECT dni FROM empadronado',
+    'listar_agrupaciones': 'SELECT id FROM agrupacion_politica',
+}
+
+################################################################################
+# Arrays ordenados de claves                                                   #
+################################################################################
+
+# Array ordenado y sin repetidos con las claves de un iterable de enteros
+def ordenar(claves):
+    if np is not None:
+        return np.unique(np.fromiter(claves, dtype=np.int64))
+    return array('q', sorted(set(claves)))
+
+# Posición de cada clave en el array ordenado, o -1 si no está
+def posiciones(ordenadas, claves):
+    if np is not None:
+        claves = np.asarray(claves, dtype=np.int64)
+        if len(ordenadas) == 0:
+            return np.full(len(claves), -1, dtype=np.int64)
+        i = np.minimum(np.searchsorted(ordenadas, claves), len(ordenadas) - 1)
+        return np.where(ordenadas[i] == claves, i, -1)
+    resultado = []
+    for x in claves:
+        i = bisect_left(ordenadas, x)
+        resultado.append(i if i < len(ordenadas) and ordenadas[i] == x else -1)
+    return resultado
+
+# Indica para cada clave si ya apareció antes en la misma lista
+def repetidas(claves):
+    if np is not None:
+        claves = np.asarray(claves, dtype=np.int64)
+        orden = np.argsort(claves, kind='stable')
+        resultado = np.zeros(len(claves), dtype=bool)
+        resultado[orden[1:]] = claves[orden[1:]] == claves[orden[:-1]]
+        return resultado
+    vistas = set()
+    resultado = []
+    for x in claves:
+        resultado.append(x in vistas)
+        vistas.add(x)
+    return resultado
+
+# Entero o None si el valor no lo es o está fuera de [minimo, maximo)
+def entero(valor, minimo, maximo):
+    try:
+        x = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return x if minimo <= x < maximo else None
+
+# Los rangos de las claves de escrutinio.clave
+def dni(valor):
+    return entero(valor, 0, escrutinio.DNI_MAXIMO)
+
+def periodo(valor):
+    return entero(valor, 0, escrutinio.PERIODO_MAXIMO)
+
+# Errores ordenados por fila; los de una misma fila quedan en el orden en que se encontraron
+def ordenar_errores(errores):
+    return sorted(errores, key=lambda e: e.fila)
+
+################################################################################
+# Validador                                                                    #
+################################################################################
+
+class validador():
+
+    def __init__(self, model):
+        self.model = model
+        self.claves = {}
+
+    # Claves de la consulta como array ordenado; se leen de la base la primera vez que se piden
+    def claves_de(self, nombre):
+        if nombre not in self.claves:
+            if nombre == 'empadronados':
+                filas = self.model.connector.iterar(SENTENCIAS['listar_dnis_empadronados'])
+                self.claves[nombre] = ordenar(f[0] for f in filas)
+            elif nombre == 'agrupaciones':
+                filas = self.model.connector.iterar(SENTENCIAS['listar_agrupaciones'])
+                self.claves[nombre] = ordenar(f[0] for f in filas)
+            elif nombre.startswith('votos_'):
+                self.claves[nombre] = self.leer_votos(nombre)
+            else:
+                filas = self.model.connector.iterar(escrutinio.CLAVES[nombre])
+                self.claves[nombre] = ordenar(escrutinio.clave(f[0], f[1]) for f in filas)
+        return self.claves[nombre]
+
+    # Los votos se codifican como en escrutinio: posición del candidato en su array y clave del votante
+    def leer_votos(self, nombre):
+        candidatos = dict((tipo[3], tipo[1]) for tipo in escrutinio.OPERACIONES.values() if len(tipo) == 4)[nombre]
+        filas = list(self.model.connector.iterar(escrutinio.CLAVES[nombre]))
+        orden = posiciones(self.claves_de(candidatos), [escrutinio.clave(f[0], f[1]) for f in filas])
+        return ordenar(escrutinio.clave_voto(int(o), escrutinio.clave(f[2], f[3])) for o, f in zip(orden, filas))
+
+    # Valida filas del padrón (dni, nombre[, claustro]). Las que no traen claustro usan 'claustro'.
+    def padron(self, filas, claustro=None):
+        errores = []
+        validas = []
+        for i, fila in enumerate(filas):
+            # Como en la carga: (dni, nombre) con 'claustro', o (dni, nombre, claustro) sin él
+            if len(fila) < (2 if claustro is not None else 3):
+                errores.append(error_validacion(i, tuple(fila), api.RECHAZO_FILA_INCOMPLETA))
+                continue
+            d = entero(fila[0], 0, 2 ** 63)
+            c = entero(fila[2] if len(fila) > 2 else claustro, 0, 2 ** 63)
+            if d is None:
+                errores.append(error_validacion(i, tuple(fila), api.RECHAZO_DNI_INVALIDO))
+            elif c not in api.CLAUSTROS:
+                errores.append(error_validacion(i, tuple(fila), api.RECHAZO_CLAUSTRO_INVALIDO))
+            else:
+                validas.append((i, tuple(fila), d))
+
+        dnis = [d for _, _, d in validas]
+        existentes = posiciones(self.claves_de('empadronados'), dnis)
+        for (i, fila, _), existente, repetida in zip(validas, existentes, repetidas(dnis)):
+            if existente >= 0 or repetida:
+                errores.append(error_validacion(i, fila, api.RECHAZO_DNI_DUPLICADO))
+        return ordenar_errores(errores)
+
+    # Valida filas de consejeros directivos (dni, periodo, id_agrupacion_politica)
+    def consejeros_directivos(self, filas):
+        errores = []
+        validas = []
+        for i, fila in enumerate(filas):
+            d, p, a = dni(fila[0]), periodo(fila[1]), entero(fila[2], 0, 2 ** 63)
+            if d is None:
+                errores.append(error_validacion(i, tuple(fila), api.RECHAZO_DNI_INVALIDO))
+            elif p is None:
+                errores.append(error_validacion(i, tuple(fila), RECHAZO_PERIODO_INVALIDO))
+            elif a is None:
+                errores.append(error_validacion(i, tuple(fila), RECHAZO_AGRUPACION_INEXISTENTE))
+            else:
+                validas.append((i, tuple(fila), d, escrutinio.clave(d, p), a))
+
+        empadronados = posiciones(self.claves_de('empadronados'), [v[2] for v in validas])
+        agrupaciones = posiciones(self.claves_de('agrupaciones'), [v[4] for v in validas])
+        claves = [v[3] for v in validas]
+        existentes = posiciones(self.claves_de('consejeros_directivos'), claves)
+        for (i, fila, _, _, _), empadronado, agrupacion, existente, repetida in zip(
+                validas, empadronados, agrupaciones, existentes, repetidas(claves)):
+            if empadronado < 0:
+                errores.append(error_validacion(i, fila, RECHAZO_DNI_NO_EMPADRONADO))
+            if agrupacion < 0:
+                errores.append(error_validacion(i, fila, RECHAZO_AGRUPACION_INEXISTENTE))
+            if existente >= 0 or repetida:
+                errores.append(error_validacion(i, fila, RECHAZO_CONSEJERO_DUPLICADO))
+        return ordenar_errores(errores)
+
+    # Valida filas de votos (dni_candidato, periodo_candidato, dni_votante, periodo_votante) de una de las
+    # operaciones de voto de escrutinio.OPERACIONES (ej.: 'registrar_voto_a_decano')
+    def votos(self, operacion, filas):
+        _, candidatos, votantes, votos = escrutinio.OPERACIONES[operacion]
+        errores = []
+        validas = []
+        for i, fila in enumerate(filas):
+            claves = [dni(fila[0]), periodo(fila[1]), dni(fila[2]), periodo(fila[3])]
+            if claves[0] is None or claves[2] is None:
+                errores.append(error_validacion(i, tuple(fila), api.RECHAZO_DNI_INVALIDO))
+            elif claves[1] is None or claves[3] is None:
+                errores.append(error_validacion(i, tuple(fila), RECHAZO_PERIODO_INVALIDO))
+            else:
+                validas.append((i, tuple(fila), escrutinio.clave(claves[0], claves[1]),
+                                escrutinio.clave(claves[2], claves[3])))
+
+        orden_candidatos = posiciones(self.claves_de(candidatos), [v[2] for v in validas])
+        existentes_votantes = posiciones(self.claves_de(votantes), [v[3] for v in validas])
+        claves_votos = []
+        for (i, fila, _, votante), orden, existente in zip(validas, orden_candidatos, existentes_votantes):
+            if orden < 0:
+                errores.append(error_validacion(i, fila, RECHAZO_CANDIDATO_INEXISTENTE))
+            if existente < 0:
+                errores.append(error_validacion(i, fila, RECHAZO_VOTANTE_INEXISTENTE))
+            if orden >= 0 and existente >= 0:
+                claves_votos.append((i, fila, escrutinio.clave_voto(int(orden), votante)))
+
+        claves = [v[2] for v in claves_votos]
+        existentes = posiciones(self.claves_de(votos), claves)
+        for (i, fila, _), existente, repetida in zip(claves_votos, existentes, repetidas(claves)):
+            if existente >= 0 or repetida:
+                errores.append(error_validacion(i, fila, RECHAZO_VOTO_DUPLICADO))
+        return ordenar_errores(errores)